@@ -0,0 +1,103 @@
+import argparse
+import json
+import random
+import time
+
+from pyass.timedelta import timedelta as pyasstimedelta
+
+from lyricsheets.fonts import FontScaler, apportion
+
+from songs import make_song
+
+TRANSITION_MS = 250
+
+
+# The arguments of every split of every line of the song, with made up glyph
+# widths in 64ths of a pixel, so that no font backend is needed
+def to_split_args(song, rng: random.Random) -> list[tuple[list[int], list[list[int]]]]:
+    glyphWidths = {}
+    lines = []
+    for line in song.lyrics:
+        toSplits, widthVectors, lineWidths = [], [], []
+        for syllable in line.syllables:
+            widths = [
+                glyphWidths.setdefault(c, rng.randrange(256, 1024))
+                for c in syllable.text
+            ]
+            toSplits.append(pyasstimedelta(syllable.length).total_centiseconds())
+            widthVectors.append(widths)
+            lineWidths += widths
+        toSplits.append(TRANSITION_MS)
+        widthVectors.append(lineWidths)
+        lines.append((toSplits, widthVectors))
+    return lines
+
+
+def time_per_song(songs, split) -> tuple[float, list]:
+    # Imports NumPy before timing
+    split(songs[0])
+    start = time.perf_counter()
+    results = [split(lines) for lines in songs]
+    return (time.perf_counter() - start) / len(songs) * 1000, results
+
+
+def split_each(lines):
+    return [
+        [
+            list(FontScaler.split_by_glyph_widths(toSplit, widths))
+            for toSplit, widths in zip(toSplits, widthVectors)
+        ]
+        for toSplits, widthVectors in lines
+    ]
+
+
+def split_per_line(lines):
+    return [apportion(toSplits, widthVectors) for toSplits, widthVectors in lines]
+
+
+def split_per_song(lines):
+    splits = apportion(
+        [toSplit for toSplits, _ in lines for toSplit in toSplits],
+        [widths for _, widthVectors in lines for widths in widthVectors],
+    )
+    start = 0
+    perLine = []
+    for toSplits, _ in lines:
+        perLine.append(splits[start : start + len(toSplits)])
+        start += len(toSplits)
+    return perLine
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compares apportioning the char times of songs one syllable, one line and one song at a time"
+    )
+    parser.add_argument("--songs", type=int, default=50)
+    parser.add_argument("--lines", type=int, default=40)
+    parser.add_argument("--syllables", type=int, default=10)
+
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    songs = [
+        to_split_args(make_song(i, args.lines, args.syllables), rng)
+        for i in range(args.songs)
+    ]
+
+    results = {}
+    reference = None
+    for name, split in [
+        ("perSyllable", split_each),
+        ("perLine", split_per_line),
+        ("perSong", split_per_song),
+    ]:
+        ms, splits = time_per_song(songs, split)
+        if reference is None:
+            reference = splits
+        results[name] = {"msPerSong": ms, "identical": splits == reference}
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
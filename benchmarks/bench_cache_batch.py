@@ -0,0 +1,90 @@
+import argparse
+import json
+
+from lyricsheets.cache import Cache, RedisCache, with_cache
+
+from songs import make_song
+
+
+class Catalog:
+    def __init__(self, cache: Cache, numSongs: int) -> None:
+        self.cache = cache
+        self.songs = {f"song{i}": make_song(i) for i in range(numSongs)}
+
+    @with_cache(
+        "Bench::get_song",
+        scopes=lambda self, songName: ["spreadsheet:bench", f"sheet:{songName}"],
+    )
+    def get_song(self, songName: str):
+        return self.songs[songName]
+
+
+def count_traffic(cache: RedisCache) -> dict[str, int]:
+    traffic = {"roundTrips": 0, "bytesSent": 0, "bytesReceived": 0}
+    executeCommand = cache.cache.execute_command
+
+    def counted_execute_command(*args, **options):
+        traffic["roundTrips"] += 1
+        traffic["bytesSent"] += sum(len(arg) for arg in args if isinstance(arg, bytes))
+
+        ret = executeCommand(*args, **options)
+
+        vals = ret if isinstance(ret, list) else [ret]
+        traffic["bytesReceived"] += sum(len(v) for v in vals if isinstance(v, bytes))
+        return ret
+
+    cache.cache.execute_command = counted_execute_command
+    return traffic
+
+
+def run(args, compression, isBatch: bool) -> dict[str, int]:
+    cache = RedisCache(args.host, args.port, args.db, compression=compression)
+    if args.fake:
+        import fakeredis
+
+        cache.cache = fakeredis.FakeRedis()
+
+    cache.cache.flushdb()
+    catalog = Catalog(cache, args.songs)
+    traffic = count_traffic(cache)
+
+    # Warm the cache and then read everything back
+    for _ in range(2):
+        if isBatch:
+            Catalog.get_song.get_many(catalog, [(name,) for name in catalog.songs])
+        else:
+            for name in catalog.songs:
+                catalog.get_song(name)
+
+    return traffic
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measures Redis round trips and bytes for a catalog warmup"
+    )
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--db", type=int, default=15)
+    parser.add_argument("--songs", type=int, default=1000)
+    parser.add_argument(
+        "--fake", help="Use fakeredis instead of a server", action="store_true"
+    )
+
+    args = parser.parse_args()
+
+    results = [
+        {
+            "mode": "batch" if isBatch else "per-key",
+            "compression": compression or "none",
+            **run(args, compression, isBatch),
+        }
+        for isBatch in [False, True]
+        for compression in [None, "zlib", "zstd"]
+    ]
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import argparse
+import dataclasses
+import json
+import subprocess
+import sys
+import time
+
+from lyricsheets.ass.consts import ROMAJI_STYLE
+from lyricsheets.fonts import FONT_BACKENDS, get_font_scaler, set_font_backend
+from lyricsheets.fonts import set_glyph_cache_dir
+
+from songs import make_song
+
+
+def measure(args):
+    start = time.perf_counter()
+    set_font_backend(args.backend)
+    set_glyph_cache_dir(None)
+    style = dataclasses.replace(ROMAJI_STYLE, fontName=args.font)
+    scaler = get_font_scaler(style)
+    scaler.get_length("a")
+    startup = time.perf_counter() - start
+
+    lines = [
+        [syllable.text for syllable in line.syllables]
+        for i in range(args.songs)
+        for line in make_song(i, numLines=args.lines).lyrics
+    ]
+
+    start = time.perf_counter()
+    lengths = []
+    for syllables in lines:
+        text = "".join(syllables)
+        lengths.append(scaler.get_length(text))
+        scaler.split_by_rendered_width(1000, text)
+        for syllable in syllables:
+            scaler.split_by_rendered_width(100, syllable)
+    elapsed = time.perf_counter() - start
+
+    print(
+        json.dumps(
+            {
+                "startupMs": startup * 1000,
+                "lines": len(lines),
+                "msPerLine": elapsed / len(lines) * 1000,
+                "lengths": lengths,
+            }
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compares the speed of the font backends and how closely their layouts agree"
+    )
+    parser.add_argument(
+        "--backends", nargs="+", choices=FONT_BACKENDS, default=FONT_BACKENDS
+    )
+    parser.add_argument("--font", default=ROMAJI_STYLE.fontName)
+    parser.add_argument("--songs", type=int, default=20)
+    parser.add_argument("--lines", type=int, default=40)
+    parser.add_argument("--backend", choices=FONT_BACKENDS, help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+
+    if args.backend:
+        measure(args)
+        return
+
+    # Every backend runs in a fresh process, so that its startup is measured too
+    results = {}
+    for backend in args.backends:
+        proc = subprocess.run(
+            [
+                sys.executable,
+                __file__,
+                "--backend",
+                backend,
+                "--font",
+                args.font,
+                "--songs",
+                str(args.songs),
+                "--lines",
+                str(args.lines),
+            ],
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            results[backend] = {"error": proc.stderr.strip().splitlines()[-1]}
+            continue
+
+        results[backend] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    measured = [result for result in results.values() if "lengths" in result]
+    if len(measured) > 1:
+        # How far the line widths of the other backends are from the first one's
+        reference = measured[0]["lengths"]
+        for result in measured[1:]:
+            result["maxRelativeDiff"] = max(
+                abs(length - refLength) / refLength
+                for length, refLength in zip(result["lengths"], reference)
+                if refLength
+            )
+
+    for result in measured:
+        del result["lengths"]
+
+    print(json.dumps({"font": args.font, "backends": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each entry point with its import time budget in milliseconds
+# and the heavy dependencies it must not import before it is used
+CLI_HEAVY_MODULES = ["wx", "fontTools", "googleapiclient", "redis", "flask"]
+ENTRY_POINTS = {
+    "populate_songs": (300, CLI_HEAVY_MODULES),
+    "print_song_karaoke": (250, CLI_HEAVY_MODULES),
+    "warm_cache": (250, CLI_HEAVY_MODULES),
+    "create_song": (250, CLI_HEAVY_MODULES),
+    "edit_song_karaoke": (300, CLI_HEAVY_MODULES),
+    "convert_ass_to_karaoke_modifier": (200, CLI_HEAVY_MODULES),
+    "lyricsheets.web.asgi": (400, ["wx", "fontTools", "googleapiclient", "flask"]),
+    "lyricsheets.web.app": (500, ["wx", "fontTools", "googleapiclient"]),
+}
+
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def measure(module: str) -> tuple[float, set[str]]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_DIR,
+        env={
+            **os.environ,
+            "PYTHONPATH": os.pathsep.join(
+                filter(None, [REPO_DIR, os.environ.get("PYTHONPATH")])
+            ),
+        },
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    cumulative = 0
+    imported = set()
+    for line in proc.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match is None:
+            continue
+
+        _, cumulativeUs, indent, name = match.groups()
+        imported.add(name.split(".")[0])
+        if not indent and name == module:
+            cumulative = int(cumulativeUs)
+
+    return cumulative / 1000, imported
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measures the import time of every entry point with -X importtime and fails if one exceeds its budget or imports a heavy dependency"
+    )
+    parser.add_argument(
+        "--entry-points",
+        nargs="+",
+        choices=list(ENTRY_POINTS),
+        default=list(ENTRY_POINTS),
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--budget-scale",
+        help="Multiplies every budget, for machines slower than a developer laptop",
+        type=float,
+        default=1,
+    )
+
+    args = parser.parse_args()
+
+    results = {}
+    failed = False
+    for entryPoint in args.entry_points:
+        budget, heavyModules = ENTRY_POINTS[entryPoint]
+        budget *= args.budget_scale
+        try:
+            # The fastest run is the least disturbed by the rest of the machine
+            runs = [measure(entryPoint) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            results[entryPoint] = {"error": str(e)}
+            failed = True
+            continue
+
+        ms = min(ms for ms, _ in runs)
+        heavyImports = sorted(set(heavyModules) & runs[0][1])
+        results[entryPoint] = {
+            "ms": ms,
+            "budgetMs": budget,
+            "heavyImports": heavyImports,
+        }
+        failed |= ms > budget or bool(heavyImports)
+
+    print(json.dumps(results, indent=2))
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import json
+import time
+
+import pyass
+
+import lyricsheets.effect as _
+from lyricsheets.ass import retrieve_effect
+from lyricsheets.fonts import (
+    DEFAULT_FONT_BACKEND,
+    FONT_BACKENDS,
+    get_native_call_count,
+    prefetch_text_metrics,
+    set_font_backend,
+)
+
+from songs import ACTORS, make_song
+
+ACTOR_TAGS = [r"\c&H0000FF&", r"\c&H00FF00&", r"\c&HFF0000&"]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measures the time to render songs with an effect and the native font calls it makes"
+    )
+    parser.add_argument("--effect", default="default_live_karaoke_effect")
+    parser.add_argument("--songs", type=int, default=20)
+    parser.add_argument("--lines", type=int, default=40)
+    parser.add_argument(
+        "--font-backend", choices=FONT_BACKENDS, default=DEFAULT_FONT_BACKEND
+    )
+
+    args = parser.parse_args()
+
+    set_font_backend(args.font_backend)
+
+    effect = retrieve_effect(args.effect)
+    actorToStyle = {
+        actor: pyass.Tags.parse(tags) for actor, tags in zip(ACTORS, ACTOR_TAGS)
+    }
+    songs = [make_song(i, numLines=args.lines) for i in range(args.songs)]
+
+    times = []
+    layoutCalls = 0
+    for song in songs:
+        start = time.perf_counter()
+        prefetch_text_metrics(effect.get_styled_texts(song))
+        calls = get_native_call_count()
+        effect.to_events(song, actorToStyle, True)
+        layoutCalls += get_native_call_count() - calls
+        times.append(time.perf_counter() - start)
+
+    print(
+        json.dumps(
+            {
+                "effect": args.effect,
+                "fontBackend": args.font_backend,
+                "songs": args.songs,
+                "linesPerSong": args.lines,
+                # The first song pays for measuring every glyph and syllable
+                "firstSongMs": times[0] * 1000,
+                "msPerSong": sum(times) / len(times) * 1000,
+                "msPerSongAfterFirst": sum(times[1:]) / max(len(times) - 1, 1) * 1000,
+                "nativeFontCalls": get_native_call_count(),
+                # Made after the song's texts were measured up front, i.e. missed by the pre-pass
+                "layoutFontCalls": layoutCalls,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import argparse
+import json
+import pickle
+import time
+
+from lyricsheets.service import to_song_body
+
+from songs import make_song
+
+
+def serve_song(entry: bytes) -> bytes:
+    return pickle.loads(entry).to_json().encode()
+
+
+# Bodies are cached as the bytes which are sent
+def serve_body(entry: bytes) -> bytes:
+    return entry
+
+
+def run(serve, entries: list[bytes], seconds: float) -> float:
+    served = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for entry in entries:
+            serve(entry)
+        served += len(entries)
+
+    return served / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measures requests per second served from cached songs and cached payloads"
+    )
+    parser.add_argument("--songs", type=int, default=100)
+    parser.add_argument("--lines", type=int, default=40)
+    parser.add_argument("--seconds", type=float, default=3)
+
+    args = parser.parse_args()
+
+    songs = [make_song(i, numLines=args.lines) for i in range(args.songs)]
+    songEntries = [pickle.dumps(song) for song in songs]
+    payloadEntries = [to_song_body(song, "gzip") for song in songs]
+
+    print(
+        json.dumps(
+            {
+                "songRequestsPerSecond": run(serve_song, songEntries, args.seconds),
+                "payloadRequestsPerSecond": run(
+                    serve_body, payloadEntries, args.seconds
+                ),
+                "avgSongEntryBytes": sum(map(len, songEntries)) / len(songEntries),
+                "avgPayloadEntryBytes": sum(map(len, payloadEntries))
+                / len(payloadEntries),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
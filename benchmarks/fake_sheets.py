@@ -0,0 +1,140 @@
+from collections.abc import Sequence
+from datetime import timedelta
+from threading import Lock
+import time
+
+from lyricsheets.models import Song
+from lyricsheets.sheets import GoogleSheetsClient
+
+from songs import ACTORS, make_song
+
+TEMPLATE_SHEET_NAME = "Template"
+
+
+# Serves songs from make_song in the layout the Sheets API returns them,
+# so that the whole SongDB parsing path runs without network access
+class FakeSheetsClient(GoogleSheetsClient):
+    def __init__(self, numSongs: int, latency: float = 0, **songArgs) -> None:
+        self.latency = latency
+        self.songs = {
+            song.title.romaji: song
+            for song in (make_song(i, **songArgs) for i in range(numSongs))
+        }
+        self.actorToColor = {
+            actor: {"red": (i + 1) / (len(ACTORS) + 1)}
+            for i, actor in enumerate(ACTORS)
+        }
+
+        self.lock = Lock()
+        self.calls = 0
+
+    def get(self, spreadsheetId: str, ranges: Sequence[str] = [], fields: str = ""):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.latency)
+
+        if fields == "sheets.properties":
+            return {
+                "sheets": [
+                    {"properties": {"title": title, "sheetId": i}}
+                    for i, title in enumerate([TEMPLATE_SHEET_NAME, *self.songs])
+                ]
+            }
+
+        if isinstance(ranges, str):
+            return {"sheets": [{"data": [{"rowData": self._get_template_rows()}]}]}
+
+        return {
+            "sheets": [
+                {
+                    "properties": {"title": title},
+                    "data": [{"rowData": self._get_song_rows(self.songs[title])}],
+                }
+                for title in (songRange.strip("'") for songRange in ranges)
+            ]
+        }
+
+    def _get_template_rows(self):
+        # The color of each actor sits one column to the right of its name
+        return [
+            {
+                "values": [
+                    {"userEnteredValue": {"stringValue": r"\c&H0000FF&"}}
+                    | (
+                        {
+                            "userEnteredFormat": {
+                                "backgroundColor": self.actorToColor[ACTORS[i - 1]]
+                            }
+                        }
+                        if i
+                        else {}
+                    )
+                    for i in range(len(ACTORS) + 1)
+                ]
+            },
+            {
+                "values": [
+                    {"userEnteredValue": {"stringValue": actor}} for actor in ACTORS
+                ]
+            },
+        ]
+
+    def _get_song_rows(self, song: Song):
+        def cell(val: str = "", **kwargs):
+            return ({"formattedValue": val} if val else {}) | kwargs
+
+        def row(*cells):
+            return {"values": list(cells)}
+
+        return [
+            row(
+                cell(),
+                cell(song.title.romaji),
+                cell(),
+                cell(),
+                cell(song.creators.artist),
+            ),
+            row(
+                cell(),
+                cell(song.title.en),
+                cell(),
+                cell(),
+                cell(",".join(song.creators.composers)),
+            ),
+            row(
+                cell(), cell(), cell(), cell(), cell(",".join(song.creators.arrangers))
+            ),
+            row(cell(), cell(), cell(), cell(), cell(",".join(song.creators.writers))),
+            row(),
+            *[
+                row(
+                    cell(str(line.idxInSong)),
+                    cell(line.en),
+                    cell(),
+                    cell(),
+                    cell(),
+                    cell("x" if line.isSecondary else ""),
+                    cell(_format_timedelta(line.start)),
+                    cell(_format_timedelta(line.end)),
+                    *[
+                        c
+                        for syllable in line.syllables
+                        for c in [
+                            cell(str(syllable.length // timedelta(milliseconds=10))),
+                            cell(
+                                syllable.text,
+                                userEnteredFormat={
+                                    "backgroundColor": self.actorToColor[line.actors[0]]
+                                },
+                            ),
+                        ]
+                    ],
+                )
+                for line in song.lyrics
+            ],
+        ]
+
+
+def _format_timedelta(td: timedelta) -> str:
+    cs = td // timedelta(milliseconds=10)
+    return f"{cs // 360000}:{cs // 6000 % 60:02}:{cs // 100 % 60:02}.{cs % 100:02}"
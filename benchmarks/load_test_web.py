@@ -0,0 +1,402 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import Sequence
+
+from lyricsheets.cache import AsyncRedisCache, RedisCache, get_cache_stats
+from lyricsheets.service import SongServiceByDB
+
+from fake_sheets import FakeSheetsClient
+
+MIXES = ["hot", "long_tail", "cold", "burst"]
+SERVERS = ["flask", "asgi"]
+
+# Served next to the app by the server process, since the Sheets calls
+# and the cache stats are only known inside it
+BENCH_STATS_PATH = "/_bench/stats"
+
+# The first lookup of every song request, so its hit ratio is the share of
+# requests which were answered without going to Sheets
+REQUEST_KEY_PREFIX = "SongServiceByDB::get_song_etag"
+
+
+def get_bench_stats(sheetsClient: FakeSheetsClient) -> bytes:
+    return json.dumps(
+        {
+            "sheetsCalls": sheetsClient.calls,
+            "cache": {
+                keyPrefix: {"hits": stats.hits, "misses": stats.misses}
+                for keyPrefix, stats in get_cache_stats().items()
+            },
+        }
+    ).encode()
+
+
+def with_wsgi_bench_stats(app, sheetsClient: FakeSheetsClient):
+    def bench_app(environ, start_response):
+        if environ["PATH_INFO"] != BENCH_STATS_PATH:
+            return app(environ, start_response)
+
+        body = get_bench_stats(sheetsClient)
+        start_response(
+            "200 OK",
+            [("Content-Type", "application/json"), ("Content-Length", str(len(body)))],
+        )
+        return [body]
+
+    return bench_app
+
+
+def with_asgi_bench_stats(app, sheetsClient: FakeSheetsClient):
+    async def bench_app(scope, receive, send):
+        if scope["type"] != "http" or scope["path"] != BENCH_STATS_PATH:
+            await app(scope, receive, send)
+            return
+
+        body = get_bench_stats(sheetsClient)
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    return bench_app
+
+
+def serve(args):
+    redisCfg = {"host": args.redis_host, "port": args.redis_port, "db": args.redis_db}
+    cfg = {"redis": redisCfg}
+
+    cache = RedisCache.from_config(redisCfg)
+    asyncCache = AsyncRedisCache.from_config(redisCfg)
+    if args.cache == "memory":
+        import fakeredis
+
+        server = fakeredis.FakeServer()
+        cache.cache = fakeredis.FakeRedis(server=server)
+        asyncCache.cache = fakeredis.FakeAsyncRedis(server=server)
+
+    sheetsClient = FakeSheetsClient(args.songs, latency=args.sheets_latency)
+    songServer = SongServiceByDB({}, {"": "fake"}, "", cache, sheetsClient=sheetsClient)
+
+    if args.server == "flask":
+        from werkzeug.serving import WSGIRequestHandler, run_simple
+
+        from lyricsheets.web.app import create_app
+
+        class RequestHandler(WSGIRequestHandler):
+            def log_request(self, *args, **kwargs):
+                pass
+
+        run_simple(
+            "127.0.0.1",
+            args.port,
+            with_wsgi_bench_stats(create_app(cfg, songServer, cache), sheetsClient),
+            threaded=True,
+            request_handler=RequestHandler,
+        )
+    else:
+        import uvicorn
+
+        from lyricsheets.web.asgi import create_app
+
+        uvicorn.run(
+            with_asgi_bench_stats(
+                create_app(cfg, songServer, cache, asyncCache), sheetsClient
+            ),
+            host="127.0.0.1",
+            port=args.port,
+            log_level="warning",
+        )
+
+
+# Every mix is a list of waves of titles. The workers share each wave and
+# only move on to the next one together, so a wave of one title repeated
+# `concurrency` times sends concurrent requests for the same key
+def make_waves(args, mix: str) -> list[list[str]]:
+    rng = random.Random(args.seed)
+    titles = [f"Song {i}" for i in range(args.songs)]
+    shuffled = rng.sample(titles, len(titles))
+
+    match mix:
+        case "hot":
+            hotSet = titles[: args.hot_set]
+            return [[rng.choice(hotSet) for _ in range(args.requests)]]
+        case "long_tail":
+            weights = list(
+                itertools.accumulate(
+                    1 / (rank + 1) ** args.zipf_exponent for rank in range(len(titles))
+                )
+            )
+            return [rng.choices(titles, cum_weights=weights, k=args.requests)]
+        case "cold":
+            # Every title is only requested again after all others were
+            return [[shuffled[i % len(titles)] for i in range(args.requests)]]
+        case "burst":
+            return [
+                [shuffled[i % len(titles)]] * args.concurrency
+                for i in range(args.requests // args.concurrency)
+            ]
+
+    raise ValueError(f"Unknown mix {mix}")
+
+
+class Connection:
+    def __init__(self, port: int) -> None:
+        self.port = port
+        self.reader = self.writer = None
+
+    async def request(self, path: str) -> tuple[int, bytes]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                "127.0.0.1", self.port
+            )
+
+        self.writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+        await self.writer.drain()
+
+        statusLine, *headerLines = (
+            (await self.reader.readuntil(b"\r\n\r\n")).decode().strip().split("\r\n")
+        )
+        headers = {
+            name.lower(): val.strip()
+            for name, _, val in (header.partition(":") for header in headerLines)
+        }
+        body = await self.reader.readexactly(int(headers.get("content-length", 0)))
+
+        # The Werkzeug server closes the connection after every response
+        if headers.get("connection") == "close":
+            self.close()
+
+        return int(statusLine.split()[1]), body
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+async def get_json(port: int, path: str) -> tuple[int, dict]:
+    conn = Connection(port)
+    try:
+        status, body = await conn.request(path)
+        return status, json.loads(body)
+    finally:
+        conn.close()
+
+
+async def drive(args, port: int, waves: Sequence[Sequence[str]]) -> dict:
+    latencies = []
+    errors = 0
+    conns = [Connection(port) for _ in range(args.concurrency)]
+
+    async def worker(conn: Connection, titles):
+        nonlocal errors
+        for title in titles:
+            start = time.perf_counter()
+            status, _ = await conn.request(f"/songs/{title.replace(' ', '%20')}")
+            latencies.append(time.perf_counter() - start)
+            errors += status != 200
+
+    _, before = await get_json(port, BENCH_STATS_PATH)
+
+    start = time.perf_counter()
+    for wave in waves:
+        titles = iter(wave)
+        await asyncio.gather(*[worker(conn, titles) for conn in conns])
+    elapsed = time.perf_counter() - start
+
+    _, after = await get_json(port, BENCH_STATS_PATH)
+    for conn in conns:
+        conn.close()
+
+    cache = {}
+    for keyPrefix, stats in after["cache"].items():
+        prevStats = before["cache"].get(keyPrefix, {"hits": 0, "misses": 0})
+        hits = stats["hits"] - prevStats["hits"]
+        misses = stats["misses"] - prevStats["misses"]
+        if hits or misses:
+            cache[keyPrefix] = {
+                "hits": hits,
+                "misses": misses,
+                "hitRatio": hits / (hits + misses),
+            }
+
+    latencies.sort()
+    percentile = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": elapsed,
+        "requestsPerSecond": len(latencies) / elapsed,
+        "p50Ms": percentile(0.5) * 1000,
+        "p90Ms": percentile(0.9) * 1000,
+        "p99Ms": percentile(0.99) * 1000,
+        "maxMs": latencies[-1] * 1000,
+        "sheetsCalls": after["sheetsCalls"] - before["sheetsCalls"],
+        "hitRatio": cache.get(REQUEST_KEY_PREFIX, {}).get("hitRatio", 0),
+        "cache": cache,
+    }
+
+
+def wait_until_ready(port: int, timeout: float = 30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            status, _ = asyncio.run(get_json(port, "/readyz"))
+            if status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.1)
+
+    raise TimeoutError(f"Server on port {port} did not become ready")
+
+
+def get_free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def run(args, server: str, mix: str) -> dict:
+    # Every run starts from a cold cache
+    if args.cache != "memory":
+        RedisCache(args.redis_host, args.redis_port, args.redis_db).cache.flushdb()
+
+    port = get_free_port()
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            __file__,
+            "--serve",
+            server,
+            "--port",
+            str(port),
+            "--songs",
+            str(args.songs),
+            "--sheets-latency",
+            str(args.sheets_latency),
+            "--cache",
+            args.cache,
+            "--redis-host",
+            args.redis_host,
+            "--redis-port",
+            str(args.redis_port),
+            "--redis-db",
+            str(args.redis_db),
+        ],
+        env={**os.environ, "PYTHONUNBUFFERED": "1"},
+    )
+
+    try:
+        wait_until_ready(port)
+        return {
+            "server": server,
+            "mix": mix,
+            **asyncio.run(drive(args, port, make_waves(args, mix))),
+        }
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def get_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measures the throughput, latency percentiles, Sheets calls and cache hit ratio of the web apps against a fake Sheets backend"
+    )
+    parser.add_argument("--servers", nargs="+", choices=SERVERS, default=SERVERS)
+    parser.add_argument("--mixes", nargs="+", choices=MIXES, default=MIXES)
+    parser.add_argument("--songs", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--hot-set",
+        help="Number of titles the hot mix requests",
+        type=int,
+        default=20,
+    )
+    parser.add_argument(
+        "--zipf-exponent",
+        help="Skew of the long tail mix",
+        type=float,
+        default=1.1,
+    )
+    parser.add_argument(
+        "--sheets-latency",
+        help="Seconds each fake Sheets call takes",
+        type=float,
+        default=0.2,
+    )
+    parser.add_argument(
+        "--cache",
+        help="redis: a Redis server, fake-redis: fakeredis served over TCP, memory: fakeredis inside each server",
+        choices=["redis", "fake-redis", "memory"],
+        default="redis",
+    )
+    parser.add_argument("--redis-host", default="localhost")
+    parser.add_argument("--redis-port", type=int, default=6379)
+    parser.add_argument("--redis-db", type=int, default=15)
+    parser.add_argument("--output", help="Write the results to this file as well")
+    parser.add_argument("--serve", choices=SERVERS, help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+
+    if args.serve:
+        args.server = args.serve
+        serve(args)
+        return
+
+    if args.cache == "fake-redis":
+        from fakeredis import TcpFakeServer
+
+        args.redis_host, args.redis_port = "127.0.0.1", get_free_port()
+        redisServer = TcpFakeServer((args.redis_host, args.redis_port))
+        threading.Thread(target=redisServer.serve_forever, daemon=True).start()
+
+    results = {
+        "commit": get_commit(),
+        "args": {
+            name: val
+            for name, val in vars(args).items()
+            if name not in ("serve", "port", "output")
+        },
+        "runs": [
+            run(args, server, mix) for server in args.servers for mix in args.mixes
+        ],
+    }
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+from datetime import timedelta
+import random
+
+from lyricsheets.models import Song, SongCreators, SongLine, SongLineSyllable, SongTitle
+
+SYLLABLES = ["ka", "ze", "no", "ha", "na", "mi", "ra", "i", "to", "ki", "yo", "su"]
+ACTORS = ["Honoka", "Umi", "Kotori"]
+
+
+def make_song(idx: int, numLines: int = 40, numSyllables: int = 10) -> Song:
+    rng = random.Random(idx)
+
+    lyrics = []
+    start = timedelta(seconds=5)
+    for lineIdx in range(numLines):
+        syllables = [
+            SongLineSyllable(
+                timedelta(milliseconds=rng.randint(5, 60) * 10),
+                rng.choice(SYLLABLES) + (" " if rng.random() < 0.3 else ""),
+            )
+            for _ in range(numSyllables)
+        ]
+        length = sum((syllable.length for syllable in syllables), timedelta())
+        lyrics.append(
+            SongLine(
+                idxInSong=lineIdx + 1,
+                en=" ".join(rng.choice(SYLLABLES) for _ in range(6)),
+                start=start,
+                end=start + length,
+                syllables=syllables,
+                actors=[rng.choice(ACTORS)],
+                breakpoints=[0],
+            )
+        )
+        start += length + timedelta(milliseconds=300)
+
+    return Song(
+        title=SongTitle(romaji=f"Song {idx}", en=f"English Title {idx}"),
+        creators=SongCreators(
+            artist="Artist", composers=["Composer"], writers=["Writer"]
+        ),
+        lyrics=lyrics,
+    )
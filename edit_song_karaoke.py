@@ -3,11 +3,17 @@ import json
 import os
 import platform
 import subprocess
+import sys
 import tempfile
 import pyass
 
 from lyricsheets.ass import read_karaoke
-from lyricsheets.cache import MemoryCache
+from lyricsheets.cache import (
+    DiskCache,
+    MemoryCache,
+    default_cache_dir,
+    format_cache_stats,
+)
 from lyricsheets.effect import KaraokeOnlyEffect
 from lyricsheets.service import SongServiceByDB
 
@@ -20,6 +26,19 @@ def main():
     parser.add_argument("title", help="Title of the song")
     parser.add_argument("--group", help="Group that sang the song")
     parser.add_argument("--config", help="Path to config file", default="./config.json")
+    parser.add_argument(
+        "--cache-dir",
+        help="Directory to keep the song cache of --cache in",
+        default=default_cache_dir(),
+    )
+    parser.add_argument(
+        "--cache",
+        help=(
+            "Reuse templates and song lists cached by previous runs, "
+            "which ignores edits made in the sheets since"
+        ),
+        action="store_true",
+    )
 
     args = parser.parse_args()
 
@@ -30,10 +49,13 @@ def main():
         config["google_credentials"],
         config["spreadsheets"],
         config["default"],
-        MemoryCache(),
+        DiskCache(args.cache_dir) if args.cache else MemoryCache(),
     )
 
     print("Fetching song...")
+    # The song is written back as a whole, so it must not be an older copy
+    # from the cache which would undo edits made in the sheet since
+    songService.invalidate_song(args.title)
     song = songService.get_song(args.title)
     script = pyass.Script(
         styles=[pyass.Style()], events=KaraokeOnlyEffect().to_events(song, {}, False)
@@ -65,6 +87,8 @@ def main():
 
     os.remove(f.name)
 
+    print(format_cache_stats(), file=sys.stderr)
+
 
 if __name__ == "__main__":
     main()
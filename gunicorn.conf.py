@@ -0,0 +1,27 @@
+# Serves the web app with preforked workers: `gunicorn` picks this file up from the working directory
+import os
+
+from lyricsheets.web import prefork
+
+bind = os.environ.get("LYRICSHEETS_BIND", "127.0.0.1:8000")
+workers = int(os.environ.get("LYRICSHEETS_WORKERS", "4"))
+threads = int(os.environ.get("LYRICSHEETS_THREADS", "4"))
+
+# The master builds the song index (and the L1 cache) once and the workers share its pages
+preload_app = os.environ.get("LYRICSHEETS_PRELOAD", "1") != "0"
+wsgi_app = f"lyricsheets.web.app:create_preforked_app({preload_app})"
+
+
+def when_ready(server):
+    if preload_app:
+        prefork.freeze()
+
+
+def post_fork(server, worker):
+    prefork.start_boot()
+
+
+def post_worker_init(worker):
+    ext = worker.wsgi.extensions["lyricsheets"]
+    prefork.finish_boot(ext["redis"])
+    ext["start_background_tasks"]()
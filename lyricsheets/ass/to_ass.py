@@ -1,15 +1,15 @@
-from collections.abc import Sequence, Mapping
+from collections.abc import Iterable, Sequence, Mapping
 from datetime import timedelta
 from abc import ABC, abstractmethod
 
 import pyass
 
+from lyricsheets.fonts import prefetch_text_metrics
 from lyricsheets.models import Song, SongLine
 
 from .consts import *
 from ..models.karaoke import *
 
-
 # Timings
 TITLE_EVENT_DURATION = timedelta(seconds=5)
 
@@ -23,6 +23,11 @@ class Effect(ABC):
         shouldPrintTitle: bool = True,
     ) -> Sequence[pyass.Event]: ...
 
+    # The texts the effect lays out in each style, which are measured in one
+    # batch before any event is built. Effects which lay nothing out have none
+    def get_styled_texts(self, song: Song) -> Iterable[tuple[pyass.Style, str]]:
+        return []
+
 
 class LyricsEffect(Effect):
     def __init__(
@@ -43,6 +48,8 @@ class LyricsEffect(Effect):
         actorToStyle: Mapping[str, Sequence[pyass.Tag]],
         shouldPrintTitle: bool = True,
     ) -> Sequence[pyass.Event]:
+        prefetch_text_metrics(self.get_styled_texts(song))
+
         return [
             self.to_divider_event(song, song.title.romaji),
             self.to_title_event(song, shouldPrintTitle),
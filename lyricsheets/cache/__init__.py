@@ -1,4 +1,23 @@
-from .decorator import with_cache
-from .models import Cache
-from .memory import MemoryCache
-from .redis import RedisCache
+from .decorator import with_cache, invalidate
+from .models import Cache, AsyncCache
+from .memory import MemoryCache, LRUMemoryCache
+from .tiered import AsyncTieredCache, TieredCache
+from .disk import DiskCache, default_cache_dir
+from .stats import CacheStats, get_cache_stats, reset_cache_stats, format_cache_stats
+
+# The Redis caches are only imported when used, since most scripts never
+# touch Redis and the client takes long to import
+_LAZY_CACHES = {"RedisCache": ".redis", "AsyncRedisCache": ".aio"}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_CACHES:
+        import importlib
+
+        cacheClass = getattr(
+            importlib.import_module(_LAZY_CACHES[name], __name__), name
+        )
+        globals()[name] = cacheClass
+        return cacheClass
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
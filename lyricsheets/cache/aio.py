@@ -0,0 +1,83 @@
+from collections.abc import Mapping, Sequence
+from datetime import timedelta
+from typing import Any, Optional
+
+from redis.asyncio import BlockingConnectionPool, Redis
+
+from .compression import DEFAULT_COMPRESSION_THRESHOLD, compress, decompress
+from .models import AsyncCache
+from .redis import (
+    DEFAULT_ENTRY_TTL,
+    DEFAULT_MAX_CONNECTIONS,
+    entry_ttl_from_config,
+    to_entry_ttl,
+)
+
+
+class AsyncRedisCache(AsyncCache):
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        db: int,
+        compression: Optional[str] = None,
+        compressionThreshold: int = DEFAULT_COMPRESSION_THRESHOLD,
+        maxConnections: int = DEFAULT_MAX_CONNECTIONS,
+        socketTimeout: Optional[float] = None,
+        socketConnectTimeout: Optional[float] = None,
+        entryTTL: Optional[timedelta] = DEFAULT_ENTRY_TTL,
+    ) -> None:
+        self.compression = compression
+        self.compressionThreshold = compressionThreshold
+        self.entryTTL = entryTTL
+        self.cache = Redis(
+            connection_pool=BlockingConnectionPool(
+                host=host,
+                port=port,
+                db=db,
+                max_connections=maxConnections,
+                socket_timeout=socketTimeout,
+                socket_connect_timeout=socketConnectTimeout,
+            )
+        )
+
+    @classmethod
+    def from_config(cls, cfg: Mapping[str, Any]) -> "AsyncRedisCache":
+        return cls(
+            cfg["host"],
+            cfg["port"],
+            cfg["db"],
+            compression=cfg.get("compression"),
+            compressionThreshold=cfg.get(
+                "compression_threshold", DEFAULT_COMPRESSION_THRESHOLD
+            ),
+            maxConnections=cfg.get("max_connections", DEFAULT_MAX_CONNECTIONS),
+            socketTimeout=cfg.get("socket_timeout"),
+            socketConnectTimeout=cfg.get("socket_connect_timeout"),
+            entryTTL=entry_ttl_from_config(cfg),
+        )
+
+    async def get_many(self, keys: Sequence[str]) -> list[Optional[bytes]]:
+        if not keys:
+            return []
+
+        return [
+            decompress(val) if val is not None else None
+            for val in await self.cache.mget(keys)
+        ]
+
+    async def set_many(self, vals: Mapping[str, bytes]):
+        if not vals:
+            return
+
+        pipeline = self.cache.pipeline(transaction=False)
+        for key, val in vals.items():
+            pipeline.set(
+                key,
+                compress(val, self.compression, self.compressionThreshold),
+                ex=to_entry_ttl(key, self.entryTTL),
+            )
+        await pipeline.execute()
+
+    async def close(self):
+        await self.cache.close()
@@ -0,0 +1,39 @@
+from typing import Optional
+import zlib
+
+DEFAULT_COMPRESSION_THRESHOLD = 1024
+
+# Pickles and generation counters never start with 0xFF,
+# so values written before compression was enabled are still readable
+ZLIB_PREFIX = b"\xffZL"
+ZSTD_PREFIX = b"\xffZS"
+
+
+def compress(
+    val: bytes,
+    method: Optional[str],
+    threshold: int = DEFAULT_COMPRESSION_THRESHOLD,
+) -> bytes:
+    if method is None or len(val) < threshold:
+        return val
+
+    match method:
+        case "zlib":
+            return ZLIB_PREFIX + zlib.compress(val)
+        case "zstd":
+            import zstandard
+
+            return ZSTD_PREFIX + zstandard.compress(val)
+        case _:
+            raise ValueError(f"Unknown compression method {method}")
+
+
+def decompress(val: bytes) -> bytes:
+    if val.startswith(ZLIB_PREFIX):
+        return zlib.decompress(val[len(ZLIB_PREFIX) :])
+    elif val.startswith(ZSTD_PREFIX):
+        import zstandard
+
+        return zstandard.decompress(val[len(ZSTD_PREFIX) :])
+
+    return val
@@ -1,25 +1,299 @@
+from collections.abc import Awaitable, Callable, Mapping, Sequence
+from typing import Any, Optional
 import pickle
+import re
+import time
 
-from .models import Cacheable
+from .models import AsyncCache, Cache, Cacheable
+from .stats import record
 
+GENERATION_KEY_PREFIX = "Cache::generation"
+GENERATIONS_PATTERN = re.compile(r"@\d+(\.\d+)*:")
 
-def with_cache(keyPrefix: str):
+
+# Values are pickled, or stored as they are if raw, in which case they must be bytes.
+# A fill may return an exception in place of a value it could not get, which is
+# returned as it is and not cached
+def with_cache(
+    keyPrefix: str,
+    scopes: Optional[Callable[..., Sequence[str]]] = None,
+    raw: bool = False,
+):
     def _with_cache(f):
         def wrapper(self: Cacheable, *args: str, **kwargs):
             if self.cache is None or kwargs:
                 return f(self, *args)
 
-            key = ":".join([keyPrefix, ":".join(args)])
+            key = _to_keys(self, keyPrefix, scopes, [args])[0]
 
             val = self.cache.get(key)
             if val is not None:
-                return pickle.loads(val)
+                record(keyPrefix, hits=1)
+                return _loads(keyPrefix, val, raw)
 
-            val = f(self, *args)
-            self.cache.set(key, pickle.dumps(val))
+            record(keyPrefix, misses=1)
+            val = _timed(keyPrefix, lambda: f(self, *args))
+            self.cache.set(key, _dumps(keyPrefix, val, raw))
 
             return val
 
+        def get_many(
+            self: Cacheable,
+            argsList: Sequence[Sequence[str]],
+            fill: Optional[Callable[[Sequence[Sequence[str]]], Sequence[Any]]] = None,
+        ) -> list[Any]:
+            if fill is None:
+                fill = lambda missingArgsList: [
+                    f(self, *args) for args in missingArgsList
+                ]
+
+            if self.cache is None:
+                return list(fill(argsList))
+
+            keys = _to_keys(self, keyPrefix, scopes, argsList)
+
+            vals = self.cache.get_many(keys)
+            ret = [
+                _loads(keyPrefix, val, raw) if val is not None else None for val in vals
+            ]
+
+            missingIdxs = [i for i, val in enumerate(vals) if val is None]
+            record(
+                keyPrefix, hits=len(keys) - len(missingIdxs), misses=len(missingIdxs)
+            )
+            if not missingIdxs:
+                return ret
+
+            missingVals = _timed(
+                keyPrefix, lambda: fill([argsList[i] for i in missingIdxs])
+            )
+            for i, val in zip(missingIdxs, missingVals):
+                ret[i] = val
+
+            self.cache.set_many(
+                {
+                    keys[i]: _dumps(keyPrefix, val, raw)
+                    for i, val in zip(missingIdxs, missingVals)
+                    if not isinstance(val, Exception)
+                }
+            )
+
+            return ret
+
+        def put(self: Cacheable, val, *args: str):
+            if self.cache is None:
+                return
+
+            key = _to_keys(self, keyPrefix, scopes, [args])[0]
+            self.cache.set(key, _dumps(keyPrefix, val, raw))
+
+        def get_keys(self: Cacheable, argsList: Sequence[Sequence[str]]) -> list[str]:
+            if self.cache is None:
+                return []
+
+            return _to_keys(self, keyPrefix, scopes, argsList)
+
+        async def get_many_async(
+            self: Cacheable,
+            cache: AsyncCache,
+            argsList: Sequence[Sequence[str]],
+            fill: Callable[[Sequence[Sequence[str]]], Awaitable[Sequence[Any]]],
+        ) -> list[Any]:
+            keys = await _to_keys_async(self, cache, keyPrefix, scopes, argsList)
+
+            vals = await cache.get_many(keys)
+            ret = [
+                _loads(keyPrefix, val, raw) if val is not None else None for val in vals
+            ]
+
+            missingIdxs = [i for i, val in enumerate(vals) if val is None]
+            record(
+                keyPrefix, hits=len(keys) - len(missingIdxs), misses=len(missingIdxs)
+            )
+            if not missingIdxs:
+                return ret
+
+            start = time.perf_counter()
+            missingVals = await fill([argsList[i] for i in missingIdxs])
+            record(keyPrefix, fillTime=time.perf_counter() - start)
+            for i, val in zip(missingIdxs, missingVals):
+                ret[i] = val
+
+            await cache.set_many(
+                {
+                    keys[i]: _dumps(keyPrefix, val, raw)
+                    for i, val in zip(missingIdxs, missingVals)
+                    if not isinstance(val, Exception)
+                }
+            )
+
+            return ret
+
+        wrapper.get_many = get_many
+        wrapper.get_many_async = get_many_async
+        wrapper.get_keys = get_keys
+        wrapper.put = put
+
         return wrapper
 
     return _with_cache
+
+
+def _timed(keyPrefix: str, fill: Callable[[], Any]) -> Any:
+    start = time.perf_counter()
+    val = fill()
+    record(keyPrefix, fillTime=time.perf_counter() - start)
+
+    return val
+
+
+def _loads(keyPrefix: str, val: bytes, raw: bool) -> Any:
+    start = time.perf_counter()
+    ret = val if raw else pickle.loads(val)
+    record(
+        keyPrefix,
+        deserializeTime=time.perf_counter() - start,
+        readBytes=len(val),
+    )
+
+    return ret
+
+
+def _dumps(keyPrefix: str, val: Any, raw: bool) -> bytes:
+    start = time.perf_counter()
+    ret = val if raw else pickle.dumps(val)
+    record(
+        keyPrefix,
+        serializeTime=time.perf_counter() - start,
+        writtenBytes=len(ret),
+        writes=1,
+    )
+
+    return ret
+
+
+def is_immutable_key(key: str) -> bool:
+    # Keys with generations are never overwritten with a different value,
+    # so an L1 copy can never be stale. Generations themselves change on every invalidation.
+    return not key.startswith(GENERATION_KEY_PREFIX) and (
+        GENERATIONS_PATTERN.search(key) is not None
+    )
+
+
+def invalidate(cache: Optional[Cache], *scopes: str):
+    if cache is None:
+        return
+
+    # Entries are never deleted, bumping the generation of a scope changes the key
+    # of every entry which depends on it so that the old entries are never read again.
+    # Caches which are not bounded in size expire them, see RedisCache
+    keys = [_to_generation_key(scope) for scope in scopes]
+    cache.set_many(
+        {
+            key: _new_generation(generation)
+            for key, generation in zip(keys, cache.get_many(keys))
+        }
+    )
+
+
+def _to_keys(
+    self: Cacheable,
+    keyPrefix: str,
+    scopes: Optional[Callable[..., Sequence[str]]],
+    argsList: Sequence[Sequence[str]],
+) -> list[str]:
+    scopesList = _get_scopes_list(self, scopes, argsList)
+    generationKeys = _get_generation_keys(scopesList)
+
+    generations, missing = _seed_generations(
+        generationKeys, self.cache.get_many(generationKeys) if generationKeys else []
+    )
+    if missing:
+        self.cache.set_many(missing)
+
+    return _join_keys(keyPrefix, argsList, scopesList, generations)
+
+
+async def _to_keys_async(
+    self: Cacheable,
+    cache: AsyncCache,
+    keyPrefix: str,
+    scopes: Optional[Callable[..., Sequence[str]]],
+    argsList: Sequence[Sequence[str]],
+) -> list[str]:
+    scopesList = _get_scopes_list(self, scopes, argsList)
+    generationKeys = _get_generation_keys(scopesList)
+
+    generations, missing = _seed_generations(
+        generationKeys,
+        await cache.get_many(generationKeys) if generationKeys else [],
+    )
+    if missing:
+        await cache.set_many(missing)
+
+    return _join_keys(keyPrefix, argsList, scopesList, generations)
+
+
+def _get_scopes_list(
+    self: Cacheable,
+    scopes: Optional[Callable[..., Sequence[str]]],
+    argsList: Sequence[Sequence[str]],
+) -> list[Sequence[str]]:
+    if scopes is None:
+        return [[] for _ in argsList]
+
+    return [scopes(self, *args) for args in argsList]
+
+
+def _get_generation_keys(scopesList: Sequence[Sequence[str]]) -> list[str]:
+    return sorted(
+        {_to_generation_key(scope) for argsScopes in scopesList for scope in argsScopes}
+    )
+
+
+def _seed_generations(
+    generationKeys: Sequence[str], generations: Sequence[Optional[bytes]]
+) -> tuple[Mapping[str, str], Mapping[str, bytes]]:
+    # Seed missing generations with a fresh value instead of 0
+    # so that entries cached before the generation was evicted are not revived
+    missing = {
+        key: _new_generation(None)
+        for key, generation in zip(generationKeys, generations)
+        if generation is None
+    }
+
+    return {
+        key: (generation if generation is not None else missing[key]).decode()
+        for key, generation in zip(generationKeys, generations)
+    }, missing
+
+
+def _join_keys(
+    keyPrefix: str,
+    argsList: Sequence[Sequence[str]],
+    scopesList: Sequence[Sequence[str]],
+    generations: Mapping[str, str],
+) -> list[str]:
+    ret = []
+    for args, argsScopes in zip(argsList, scopesList):
+        argsKeyPrefix = keyPrefix
+        if argsScopes:
+            argsKeyPrefix += "@" + ".".join(
+                generations[_to_generation_key(scope)] for scope in argsScopes
+            )
+
+        ret.append(":".join([argsKeyPrefix, ":".join(args)]))
+
+    return ret
+
+
+def _to_generation_key(scope: str) -> str:
+    return f"{GENERATION_KEY_PREFIX}:{scope}"
+
+
+def _new_generation(prevGeneration: Optional[bytes]) -> bytes:
+    generation = time.time_ns()
+    if prevGeneration is not None:
+        generation = max(generation, int(prevGeneration) + 1)
+
+    return str(generation).encode()
@@ -0,0 +1,177 @@
+from collections.abc import Iterator, Mapping, Sequence
+from contextlib import contextmanager
+from datetime import timedelta
+from threading import Lock
+from typing import Optional
+import os
+import sqlite3
+import sys
+import time
+
+from .models import Cache
+
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+DEFAULT_TTL = timedelta(days=7)
+# Uses of entries are recorded with the next write, or right away once the
+# recorded use is this much out of date, so reads rarely wait on writers
+ACCESS_RESOLUTION = timedelta(hours=1)
+DB_FILE_NAME = "cache.sqlite3"
+
+
+def default_cache_dir() -> str:
+    if sys.platform == "win32":
+        root = os.environ.get("LOCALAPPDATA", os.path.expanduser("~/AppData/Local"))
+    elif sys.platform == "darwin":
+        root = os.path.expanduser("~/Library/Caches")
+    else:
+        root = os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+
+    return os.path.join(root, "lyricsheets")
+
+
+class DiskCache(Cache):
+    def __init__(
+        self,
+        cacheDir: str = "",
+        maxSize: int = DEFAULT_MAX_SIZE,
+        ttl: Optional[timedelta] = DEFAULT_TTL,
+    ) -> None:
+        cacheDir = cacheDir or default_cache_dir()
+        os.makedirs(cacheDir, exist_ok=True)
+
+        self.maxSize = maxSize
+        self.ttl = ttl
+        self.lock = Lock()
+        # Uses of entries which are recorded with the next write
+        self.pendingAccesses: dict[str, float] = {}
+
+        # Parallel runs share the file, SQLite serializes the writers
+        # and WAL lets readers proceed while another run is writing.
+        # Reads only take the write lock to record uses, see ACCESS_RESOLUTION
+        self.cache = sqlite3.connect(
+            os.path.join(cacheDir, DB_FILE_NAME),
+            timeout=30,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self.cache.execute("PRAGMA journal_mode=WAL")
+        self.cache.execute("PRAGMA synchronous=NORMAL")
+        self.cache.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                val BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expiresAt REAL,
+                accessedAt REAL NOT NULL
+            )
+            """)
+        self.cache.execute(
+            "CREATE INDEX IF NOT EXISTS entries_accessedAt ON entries (accessedAt)"
+        )
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.get_many([key])[0]
+
+    def set(self, key: str, val: bytes):
+        self.set_many({key: val})
+
+    def delete(self, key: str):
+        self.delete_many([key])
+
+    def get_many(self, keys: Sequence[str]) -> list[Optional[bytes]]:
+        now = time.time()
+        staleBefore = now - ACCESS_RESOLUTION.total_seconds()
+
+        ret: list[Optional[bytes]] = []
+        hasStaleAccesses = False
+        with self._transaction("DEFERRED"):
+            for key in keys:
+                row = self._get(key, now)
+                if row is None:
+                    ret.append(None)
+                    continue
+
+                val, accessedAt = row
+                ret.append(val)
+                self.pendingAccesses[key] = now
+                hasStaleAccesses |= accessedAt <= staleBefore
+
+        if hasStaleAccesses:
+            with self._transaction():
+                self._record_accesses()
+
+        return ret
+
+    def set_many(self, vals: Mapping[str, bytes]):
+        now = time.time()
+        expiresAt = now + self.ttl.total_seconds() if self.ttl is not None else None
+
+        with self._transaction():
+            self._record_accesses()
+            self.cache.executemany(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                [(key, val, len(val), expiresAt, now) for key, val in vals.items()],
+            )
+            self._evict(now)
+
+    def delete_many(self, keys: Sequence[str]):
+        with self._transaction():
+            self._record_accesses()
+            self.cache.executemany(
+                "DELETE FROM entries WHERE key = ?", [(key,) for key in keys]
+            )
+
+    # Expired entries are left for the next write to delete
+    def _get(self, key: str, now: float) -> Optional[tuple[bytes, float]]:
+        row = self.cache.execute(
+            "SELECT val, expiresAt, accessedAt FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        val, expiresAt, accessedAt = row
+        if expiresAt is not None and expiresAt <= now:
+            return None
+
+        return val, accessedAt
+
+    def _record_accesses(self):
+        self.cache.executemany(
+            "UPDATE entries SET accessedAt = MAX(accessedAt, ?) WHERE key = ?",
+            [(accessedAt, key) for key, accessedAt in self.pendingAccesses.items()],
+        )
+        self.pendingAccesses.clear()
+
+    def _evict(self, now: float):
+        self.cache.execute("DELETE FROM entries WHERE expiresAt <= ?", (now,))
+
+        (totalSize,) = self.cache.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        if totalSize <= self.maxSize:
+            return
+
+        # Evict the least recently used entries until the cache fits again
+        toEvict = []
+        for key, size in self.cache.execute(
+            "SELECT key, size FROM entries ORDER BY accessedAt"
+        ):
+            if totalSize <= self.maxSize:
+                break
+
+            toEvict.append((key,))
+            totalSize -= size
+
+        self.cache.executemany("DELETE FROM entries WHERE key = ?", toEvict)
+
+    @contextmanager
+    def _transaction(self, mode: str = "IMMEDIATE") -> Iterator[None]:
+        with self.lock:
+            self.cache.execute(f"BEGIN {mode}")
+            try:
+                yield
+            except BaseException:
+                self.cache.execute("ROLLBACK")
+                raise
+
+            self.cache.execute("COMMIT")
@@ -1,3 +1,6 @@
+from collections.abc import Sequence
+from collections import OrderedDict
+from threading import Lock
 from typing import Optional
 
 from .models import Cache
@@ -17,4 +20,69 @@ class MemoryCache(Cache):
         self.cache[key] = val
 
     def delete(self, key: str):
-        del self.cache[key]
+        self.cache.pop(key, None)
+
+
+class LRUMemoryCache(Cache):
+    def __init__(self, maxSize: int) -> None:
+        self.maxSize = maxSize
+        self.size = 0
+        self.cache: OrderedDict[str, bytes] = OrderedDict()
+        self.lock = Lock()
+
+        # Pinned entries are skipped by eviction, so the hot set survives bursts of cold reads
+        self.pinned: frozenset[str] = frozenset()
+        self.pinnedHits = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self.lock:
+            val = self.cache.get(key)
+            if val is None:
+                self.misses += 1
+                return None
+
+            self.cache.move_to_end(key)
+            self.hits += 1
+            if key in self.pinned:
+                self.pinnedHits += 1
+
+            return val
+
+    def set(self, key: str, val: bytes):
+        with self.lock:
+            self._delete(key)
+            self.cache[key] = val
+            self.size += len(val)
+
+            self._evict()
+
+    def delete(self, key: str):
+        with self.lock:
+            self._delete(key)
+
+    def pin(self, keys: Sequence[str]):
+        with self.lock:
+            self.pinned = frozenset(keys)
+            self._evict()
+
+    def get_pinned_size(self) -> int:
+        with self.lock:
+            return sum(len(self.cache.get(key, b"")) for key in self.pinned)
+
+    def _evict(self):
+        for _ in range(len(self.cache)):
+            if self.size <= self.maxSize:
+                return
+
+            key, val = self.cache.popitem(last=False)
+            if key in self.pinned:
+                self.cache[key] = val
+            else:
+                self.size -= len(val)
+
+    def _delete(self, key: str):
+        val = self.cache.pop(key, None)
+        if val is not None:
+            self.size -= len(val)
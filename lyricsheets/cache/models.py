@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from collections.abc import Mapping, Sequence
 from typing import Optional, Protocol
 
 
@@ -12,6 +13,26 @@ class Cache(ABC):
     @abstractmethod
     def delete(self, key: str): ...
 
+    # Batch operations, caches which can do these in a single round trip should override them
+    def get_many(self, keys: Sequence[str]) -> list[Optional[bytes]]:
+        return [self.get(key) for key in keys]
+
+    def set_many(self, vals: Mapping[str, bytes]):
+        for key, val in vals.items():
+            self.set(key, val)
+
+    def delete_many(self, keys: Sequence[str]):
+        for key in keys:
+            self.delete(key)
+
+
+class AsyncCache(ABC):
+    @abstractmethod
+    async def get_many(self, keys: Sequence[str]) -> list[Optional[bytes]]: ...
+
+    @abstractmethod
+    async def set_many(self, vals: Mapping[str, bytes]): ...
+
 
 class Cacheable(Protocol):
     cache: Cache
@@ -1,19 +1,105 @@
-from typing import Optional
+from collections.abc import Mapping, Sequence
+from datetime import timedelta
+from typing import Any, Optional
 
-from redis import Redis
+from redis import BlockingConnectionPool, Redis
 
+from .compression import DEFAULT_COMPRESSION_THRESHOLD, compress, decompress
+from .decorator import is_immutable_key
 from .models import Cache
 
+DEFAULT_MAX_CONNECTIONS = 50
+# Entries with generations are orphaned once a generation is bumped, and
+# Redis keeps every key unless it expires, so these expire after a while
+DEFAULT_ENTRY_TTL = timedelta(days=7)
+
+
+def to_entry_ttl(key: str, entryTTL: Optional[timedelta]) -> Optional[timedelta]:
+    return entryTTL if is_immutable_key(key) else None
+
+
+def entry_ttl_from_config(cfg: Mapping[str, Any]) -> Optional[timedelta]:
+    seconds = cfg.get("entry_ttl", DEFAULT_ENTRY_TTL.total_seconds())
+    return timedelta(seconds=seconds) if seconds is not None else None
+
 
 class RedisCache(Cache):
-    def __init__(self, host: str, port: int, db: int) -> None:
-        self.cache = Redis(host=host, port=port, db=db)
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        db: int,
+        compression: Optional[str] = None,
+        compressionThreshold: int = DEFAULT_COMPRESSION_THRESHOLD,
+        maxConnections: int = DEFAULT_MAX_CONNECTIONS,
+        socketTimeout: Optional[float] = None,
+        socketConnectTimeout: Optional[float] = None,
+        entryTTL: Optional[timedelta] = DEFAULT_ENTRY_TTL,
+    ) -> None:
+        self.compression = compression
+        self.compressionThreshold = compressionThreshold
+        self.entryTTL = entryTTL
+        self.cache = Redis(
+            connection_pool=BlockingConnectionPool(
+                host=host,
+                port=port,
+                db=db,
+                max_connections=maxConnections,
+                socket_timeout=socketTimeout,
+                socket_connect_timeout=socketConnectTimeout,
+            )
+        )
+
+    @classmethod
+    def from_config(cls, cfg: Mapping[str, Any]) -> "RedisCache":
+        return cls(
+            cfg["host"],
+            cfg["port"],
+            cfg["db"],
+            compression=cfg.get("compression"),
+            compressionThreshold=cfg.get(
+                "compression_threshold", DEFAULT_COMPRESSION_THRESHOLD
+            ),
+            maxConnections=cfg.get("max_connections", DEFAULT_MAX_CONNECTIONS),
+            socketTimeout=cfg.get("socket_timeout"),
+            socketConnectTimeout=cfg.get("socket_connect_timeout"),
+            entryTTL=entry_ttl_from_config(cfg),
+        )
 
     def get(self, key: str) -> Optional[bytes]:
-        return self.cache.get(key)
+        val = self.cache.get(key)
+        return decompress(val) if val is not None else None
 
     def set(self, key: str, val: bytes):
-        self.cache.set(key, val)
+        self.cache.set(key, self._compress(val), ex=to_entry_ttl(key, self.entryTTL))
 
     def delete(self, key: str):
         self.cache.delete(key)
+
+    def get_many(self, keys: Sequence[str]) -> list[Optional[bytes]]:
+        if not keys:
+            return []
+
+        return [
+            decompress(val) if val is not None else None
+            for val in self.cache.mget(keys)
+        ]
+
+    def set_many(self, vals: Mapping[str, bytes]):
+        if not vals:
+            return
+
+        # Still a single round trip, MSET cannot set expiries
+        pipeline = self.cache.pipeline(transaction=False)
+        for key, val in vals.items():
+            pipeline.set(key, self._compress(val), ex=to_entry_ttl(key, self.entryTTL))
+        pipeline.execute()
+
+    def delete_many(self, keys: Sequence[str]):
+        if not keys:
+            return
+
+        self.cache.delete(*keys)
+
+    def _compress(self, val: bytes) -> bytes:
+        return compress(val, self.compression, self.compressionThreshold)
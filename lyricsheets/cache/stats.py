@@ -0,0 +1,77 @@
+from collections.abc import Mapping
+from dataclasses import asdict, dataclass
+from threading import Lock
+from typing import Any
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    # Time spent computing values on a miss, in seconds
+    fillTime: float = 0
+    serializeTime: float = 0
+    deserializeTime: float = 0
+    readBytes: int = 0
+    writtenBytes: int = 0
+    writes: int = 0
+
+    @property
+    def hitRatio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0
+
+    @property
+    def avgFillTime(self) -> float:
+        return self.fillTime / self.misses if self.misses else 0
+
+    @property
+    def avgValueSize(self) -> float:
+        return self.writtenBytes / self.writes if self.writes else 0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            **asdict(self),
+            "hitRatio": self.hitRatio,
+            "avgFillTime": self.avgFillTime,
+            "avgValueSize": self.avgValueSize,
+        }
+
+
+_stats: dict[str, CacheStats] = {}
+_lock = Lock()
+
+
+def record(keyPrefix: str, **deltas: float):
+    with _lock:
+        stats = _stats.setdefault(keyPrefix, CacheStats())
+        for name, delta in deltas.items():
+            setattr(stats, name, getattr(stats, name) + delta)
+
+
+def get_cache_stats() -> Mapping[str, CacheStats]:
+    with _lock:
+        return {
+            keyPrefix: CacheStats(**asdict(stats))
+            for keyPrefix, stats in _stats.items()
+        }
+
+
+def reset_cache_stats():
+    with _lock:
+        _stats.clear()
+
+
+def format_cache_stats() -> str:
+    lines = [
+        f"{'Cache':<45} {'Hits':>6} {'Misses':>6} {'Hit %':>6} {'Avg fill':>9} {'Avg size':>9} {'(De)ser':>8}"
+    ]
+
+    for keyPrefix, stats in sorted(get_cache_stats().items()):
+        lines.append(
+            f"{keyPrefix:<45} {stats.hits:>6} {stats.misses:>6} {stats.hitRatio:>6.0%}"
+            f" {stats.avgFillTime * 1000:>7.1f}ms {stats.avgValueSize / 1024:>7.1f}KB"
+            f" {(stats.serializeTime + stats.deserializeTime) * 1000:>6.1f}ms"
+        )
+
+    return "\n".join(lines)
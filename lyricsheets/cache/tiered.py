@@ -0,0 +1,81 @@
+from collections.abc import Mapping, Sequence
+from typing import Optional
+
+from .decorator import is_immutable_key
+from .models import AsyncCache, Cache
+
+
+class TieredCache(Cache):
+    def __init__(self, l1: Cache, l2: Cache) -> None:
+        self.l1 = l1
+        self.l2 = l2
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.get_many([key])[0]
+
+    def set(self, key: str, val: bytes):
+        self.set_many({key: val})
+
+    def delete(self, key: str):
+        self.delete_many([key])
+
+    def get_many(self, keys: Sequence[str]) -> list[Optional[bytes]]:
+        ret: list[Optional[bytes]] = [
+            self.l1.get(key) if is_immutable_key(key) else None for key in keys
+        ]
+
+        missingIdxs = [i for i, val in enumerate(ret) if val is None]
+        if not missingIdxs:
+            return ret
+
+        for i, val in zip(
+            missingIdxs, self.l2.get_many([keys[i] for i in missingIdxs])
+        ):
+            ret[i] = val
+            if val is not None and is_immutable_key(keys[i]):
+                self.l1.set(keys[i], val)
+
+        return ret
+
+    def set_many(self, vals: Mapping[str, bytes]):
+        self.l2.set_many(vals)
+        for key, val in vals.items():
+            if is_immutable_key(key):
+                self.l1.set(key, val)
+
+    def delete_many(self, keys: Sequence[str]):
+        self.l2.delete_many(keys)
+        for key in keys:
+            self.l1.delete(key)
+
+
+# The same for the async caches of the ASGI app. The L1 lives in memory, so it
+# is read and written directly from the event loop
+class AsyncTieredCache(AsyncCache):
+    def __init__(self, l1: Cache, l2: AsyncCache) -> None:
+        self.l1 = l1
+        self.l2 = l2
+
+    async def get_many(self, keys: Sequence[str]) -> list[Optional[bytes]]:
+        ret: list[Optional[bytes]] = [
+            self.l1.get(key) if is_immutable_key(key) else None for key in keys
+        ]
+
+        missingIdxs = [i for i, val in enumerate(ret) if val is None]
+        if not missingIdxs:
+            return ret
+
+        for i, val in zip(
+            missingIdxs, await self.l2.get_many([keys[i] for i in missingIdxs])
+        ):
+            ret[i] = val
+            if val is not None and is_immutable_key(keys[i]):
+                self.l1.set(keys[i], val)
+
+        return ret
+
+    async def set_many(self, vals: Mapping[str, bytes]):
+        await self.l2.set_many(vals)
+        for key, val in vals.items():
+            if is_immutable_key(key):
+                self.l1.set(key, val)
@@ -5,10 +5,25 @@ import itertools
 import operator
 from typing import Optional, Any
 
-from lyricsheets.cache import Cache, with_cache
+from lyricsheets.cache import Cache, with_cache, invalidate
 from lyricsheets.models import *
 from lyricsheets.sheets import GoogleSheetsClient, RateLimitedGoogleSheetsClient
 
+# Number of songs read from Google Sheets in a single request
+DEFAULT_SONG_BATCH_SIZE = 20
+
+
+def spreadsheet_scope(spreadsheetId: str) -> str:
+    return f"spreadsheet:{spreadsheetId}"
+
+
+def sheet_names_scope(spreadsheetId: str) -> str:
+    return f"spreadsheet:{spreadsheetId}:sheets"
+
+
+def sheet_scope(spreadsheetId: str, sheetName: str) -> str:
+    return f"spreadsheet:{spreadsheetId}:sheet:{sheetName}"
+
 
 class SongTemplateDB:
     TEMPLATE_SHEET_NAME = "Template"
@@ -26,7 +41,19 @@ class SongTemplateDB:
 
         self.cache = cache
 
-    @with_cache("SongTemplateDB::get_sheet_name_to_id_map")
+    def get_sheet_names_scopes(self, spreadsheetId: str) -> Sequence[str]:
+        return [spreadsheet_scope(spreadsheetId), sheet_names_scope(spreadsheetId)]
+
+    def get_template_scopes(self, spreadsheetId: str) -> Sequence[str]:
+        return [
+            spreadsheet_scope(spreadsheetId),
+            sheet_scope(spreadsheetId, SongTemplateDB.TEMPLATE_SHEET_NAME),
+        ]
+
+    @with_cache(
+        "SongTemplateDB::get_sheet_name_to_id_map",
+        scopes=lambda self, spreadsheetId: self.get_sheet_names_scopes(spreadsheetId),
+    )
     def get_sheet_name_to_id_map(self, spreadsheetId: str) -> Mapping[str, int]:
         resp = self.sheetsClient.get(
             spreadsheetId,
@@ -38,7 +65,10 @@ class SongTemplateDB:
             for sheet in resp["sheets"]
         }
 
-    @with_cache("SongTemplateDB::get_format_map")
+    @with_cache(
+        "SongTemplateDB::get_format_map",
+        scopes=lambda self, spreadsheetId: self.get_template_scopes(spreadsheetId),
+    )
     def get_format_map(self, spreadsheetId: str) -> Mapping[str, Any]:
         rootPos = "I1"
         rootPosRow = self.sheetsClient.get_row("I1") + 1
@@ -61,7 +91,10 @@ class SongTemplateDB:
             )
         }
 
-    @with_cache("SongTemplateDB::get_format_tags")
+    @with_cache(
+        "SongTemplateDB::get_format_tags",
+        scopes=lambda self, spreadsheetId: self.get_template_scopes(spreadsheetId),
+    )
     def get_format_tags(self, spreadsheetId: str) -> Mapping[str, str]:
         rootPos = "I1"
         row = self.sheetsClient.get_row(rootPos) + 1
@@ -101,16 +134,74 @@ class SongDB:
         )
         self.cache = cache
 
-    @with_cache("SongDB::list_song_names")
+    def get_song_scopes(self, spreadsheetId: str, songName: str) -> Sequence[str]:
+        # Parsing a song depends on the actor formats in the template sheet
+        return [
+            *self.songTemplateDB.get_template_scopes(spreadsheetId),
+            sheet_scope(spreadsheetId, songName),
+        ]
+
+    def invalidate_spreadsheet(self, spreadsheetId: str):
+        invalidate(self.cache, spreadsheet_scope(spreadsheetId))
+
+    def invalidate_song(self, spreadsheetId: str, songName: str):
+        invalidate(self.cache, sheet_scope(spreadsheetId, songName))
+
+    @with_cache(
+        "SongDB::list_song_names",
+        scopes=lambda self, spreadsheetId: self.songTemplateDB.get_sheet_names_scopes(
+            spreadsheetId
+        ),
+    )
     def list_song_names(self, spreadsheetId: str) -> Sequence[str]:
         return list(self.songTemplateDB.get_sheet_name_to_id_map(spreadsheetId).keys())
 
-    @with_cache("SongDB::get_song")
+    @with_cache(
+        "SongDB::get_song",
+        scopes=lambda self, spreadsheetId, songName: self.get_song_scopes(
+            spreadsheetId, songName
+        ),
+    )
     def get_song(self, spreadsheetId: str, songName: str) -> song.Song:
         return self._parse_song(
             spreadsheetId, self._get_song_data(spreadsheetId, songName)
         )
 
+    def get_songs(
+        self,
+        songLocations: Sequence[tuple[str, str]],
+        batchSize: int = DEFAULT_SONG_BATCH_SIZE,
+    ) -> Sequence[Song]:
+        return SongDB.get_song.get_many(
+            self,
+            songLocations,
+            fill=lambda missing: self._fetch_songs(missing, batchSize),
+        )
+
+    def _fetch_songs(
+        self, songLocations: Sequence[tuple[str, str]], batchSize: int
+    ) -> Sequence[Song]:
+        songNamesBySpreadsheet: dict[str, list[str]] = {}
+        for spreadsheetId, songName in songLocations:
+            songNamesBySpreadsheet.setdefault(spreadsheetId, []).append(songName)
+
+        # Each batch of songs is read with a single multi-range request
+        songs: dict[tuple[str, str], Song] = {}
+        for spreadsheetId, songNames in songNamesBySpreadsheet.items():
+            for i in range(0, len(songNames), batchSize):
+                batch = songNames[i : i + batchSize]
+                for songName, sheetData in zip(
+                    batch, self._get_songs_data(spreadsheetId, batch)
+                ):
+                    songs[(spreadsheetId, songName)] = self._parse_song(
+                        spreadsheetId, sheetData
+                    )
+
+        return [
+            songs[(spreadsheetId, songName)]
+            for spreadsheetId, songName in songLocations
+        ]
+
     def _get_song_data(self, spreadsheetId: str, songName: str):
         resp = self.sheetsClient.get(
             spreadsheetId,
@@ -119,6 +210,20 @@ class SongDB:
         )
         return resp["sheets"][0]["data"][0]["rowData"]
 
+    def _get_songs_data(self, spreadsheetId: str, songNames: Sequence[str]):
+        resp = self.sheetsClient.get(
+            spreadsheetId,
+            ranges=[f"'{songName}'" for songName in dict.fromkeys(songNames)],
+            fields="sheets(properties.title,data.rowData.values(formattedValue,userEnteredFormat(backgroundColor,textFormat.foregroundColor)))",
+        )
+
+        # Sheets are returned in spreadsheet order, not in the order of the ranges
+        sheetNameToData = {
+            sheet["properties"]["title"]: sheet["data"][0]["rowData"]
+            for sheet in resp["sheets"]
+        }
+        return [sheetNameToData[songName] for songName in songNames]
+
     def _parse_song(self, spreadsheetId: str, sheetData) -> song.Song:
         return song.Song(
             title=self._parse_title(sheetData),
@@ -242,6 +347,13 @@ class SongDB:
     def create_song(self, spreadsheetId: str, song: Song):
         self._create_song_sheet(spreadsheetId, song.title)
 
+        # The new sheet has to be visible to the sheet ID lookups below
+        invalidate(
+            self.cache,
+            sheet_names_scope(spreadsheetId),
+            sheet_scope(spreadsheetId, song.title.romaji),
+        )
+
         self._create_title(spreadsheetId, song.title.romaji, song.title)
         self._create_creators(spreadsheetId, song.title.romaji, song.creators)
         self._create_english(spreadsheetId, song.title.romaji, song.lyrics)
@@ -251,6 +363,8 @@ class SongDB:
         self._create_romaji(spreadsheetId, song.title.romaji, song.lyrics)
         self._create_line_actors(spreadsheetId, song.title.romaji, song.lyrics)
 
+        self.invalidate_song(spreadsheetId, song.title.romaji)
+
     def _create_song_sheet(self, spreadsheetId: str, songTitle: SongTitle):
         sheetNameToId = self.songTemplateDB.get_sheet_name_to_id_map(spreadsheetId)
 
@@ -431,9 +545,9 @@ class SongDB:
             valueInputOption=GoogleSheetsClient.ValueInputOption.USER_ENTERED,
         )
 
-    def update_song_karaoke(self, spreadsheetId: str, newSong: Song):
+    def update_song_karaoke(self, spreadsheetId: str, newSong: Song) -> Optional[Song]:
         if len(newSong.lyrics) == 0:
-            return []
+            return None
 
         sheetName = newSong.title.romaji
         oldSongData = self._get_song_data(spreadsheetId, sheetName)
@@ -455,11 +569,23 @@ class SongDB:
             ),
         ]
 
+        updatedSong = self._get_updated_song(oldSong, newSong)
+
         if len(requests) > 0:
-            self.sheetsClient.batch_update(spreadsheetId, requests)
+            try:
+                self.sheetsClient.batch_update(spreadsheetId, requests)
+            except Exception:
+                # The update may or may not have been applied
+                self.invalidate_song(spreadsheetId, sheetName)
+                raise
+
+            # Move to a new generation rather than overwriting the entries in place
+            # so that a key never refers to two different songs
+            self.invalidate_song(spreadsheetId, sheetName)
 
-            if self.cache is not None:
-                self.cache.delete(f"SongDB::get_song:{spreadsheetId}:{sheetName}")
+        SongDB.get_song.put(self, updatedSong, spreadsheetId, sheetName)
+
+        return updatedSong
 
     def _get_update_line_times_requests(
         self,
@@ -507,39 +633,9 @@ class SongDB:
             if oldLine.syllables == newLine.syllables:
                 continue
 
-            # Derive the actor for each char in the old line
-            oldLine.breakpoints.append(len(oldLine.syllables))
-            oldSyllableToActor = []
-            for i in range(len(oldLine.breakpoints) - 1):
-                numSyllables = oldLine.breakpoints[i + 1] - oldLine.breakpoints[i]
-                oldSyllableToActor.extend(
-                    [oldLine.actors[i] for _ in range(numSyllables)]
-                )
-
-            charToActor = []
-            for actor, newSyllable in zip(oldSyllableToActor, oldLine.syllables):
-                charToActor.extend([actor for _ in range(len(newSyllable.text))])
-
-            # Use the actor of each char to try to derive a unique actor for each new syllable
-            # Fail if this cannot be done
-            newSyllableToActor = []
-            currCharIdx = 0
-            for newSyllable in newLine.syllables:
-                # If the syllable is empty, take the actor of the last syllable
-                if newSyllable.text == "":
-                    newSyllableToActor.append(charToActor[currCharIdx - 1])
-                else:
-                    actors = set(
-                        charToActor[currCharIdx : currCharIdx + len(newSyllable.text)]
-                    )
-
-                    if len(actors) != 1:
-                        raise NotImplementedError(
-                            f"Syllable '{newSyllable.text}' in line {lineIdx + 1} does not have a unique actor, actors: {actors}"
-                        )
-
-                    newSyllableToActor.append(list(actors)[0])
-                    currCharIdx += len(newSyllable.text)
+            oldSyllableToActor, newSyllableToActor = self._get_syllable_actors(
+                lineIdx, oldLine, newLine
+            )
 
             for syllableIdx, (
                 oldSyllable,
@@ -617,6 +713,92 @@ class SongDB:
 
         return requests
 
+    def _get_syllable_actors(
+        self, lineIdx: int, oldLine: SongLine, newLine: SongLine
+    ) -> tuple[list[str], list[str]]:
+        # Derive the actor for each char in the old line
+        breakpoints = [*oldLine.breakpoints, len(oldLine.syllables)]
+        oldSyllableToActor = []
+        for i in range(len(breakpoints) - 1):
+            numSyllables = breakpoints[i + 1] - breakpoints[i]
+            oldSyllableToActor.extend([oldLine.actors[i] for _ in range(numSyllables)])
+
+        charToActor = []
+        for actor, newSyllable in zip(oldSyllableToActor, oldLine.syllables):
+            charToActor.extend([actor for _ in range(len(newSyllable.text))])
+
+        # Use the actor of each char to try to derive a unique actor for each new syllable
+        # Fail if this cannot be done
+        newSyllableToActor = []
+        currCharIdx = 0
+        for newSyllable in newLine.syllables:
+            # If the syllable is empty, take the actor of the last syllable
+            if newSyllable.text == "":
+                newSyllableToActor.append(charToActor[currCharIdx - 1])
+            else:
+                actors = set(
+                    charToActor[currCharIdx : currCharIdx + len(newSyllable.text)]
+                )
+
+                if len(actors) != 1:
+                    raise NotImplementedError(
+                        f"Syllable '{newSyllable.text}' in line {lineIdx + 1} does not have a unique actor, actors: {actors}"
+                    )
+
+                newSyllableToActor.append(list(actors)[0])
+                currCharIdx += len(newSyllable.text)
+
+        return oldSyllableToActor, newSyllableToActor
+
+    def _get_updated_song(self, oldSong: Song, newSong: Song) -> Song:
+        # Rebuilds the song as it will be parsed back from the sheet after the update
+        # Only timings and syllables are written, everything else is kept from the sheet
+        return Song(
+            title=oldSong.title,
+            creators=oldSong.creators,
+            lyrics=[
+                self._get_updated_line(lineIdx, oldLine, newLine)
+                for lineIdx, (oldLine, newLine) in enumerate(
+                    zip(oldSong.lyrics, newSong.lyrics)
+                )
+            ],
+        )
+
+    def _get_updated_line(
+        self, lineIdx: int, oldLine: SongLine, newLine: SongLine
+    ) -> SongLine:
+        ret = SongLine(
+            idxInSong=oldLine.idxInSong,
+            en=oldLine.en,
+            isSecondary=oldLine.isSecondary,
+            start=self._parse_timedelta(self._format_timedelta(newLine.start)),
+            end=self._parse_timedelta(self._format_timedelta(newLine.end)),
+            syllables=oldLine.syllables,
+            actors=oldLine.actors,
+            breakpoints=oldLine.breakpoints,
+        )
+
+        if oldLine.syllables == newLine.syllables:
+            return ret
+
+        _, newSyllableToActor = self._get_syllable_actors(lineIdx, oldLine, newLine)
+
+        ret.syllables = [
+            SongLineSyllable(
+                timedelta(milliseconds=int(syllable.length.total_seconds() * 100) * 10),
+                syllable.text,
+            )
+            for syllable in newLine.syllables
+        ]
+        ret.actors = []
+        ret.breakpoints = []
+        for i, actor in enumerate(newSyllableToActor):
+            if not ret.actors or actor != ret.actors[-1]:
+                ret.actors.append(actor)
+                ret.breakpoints.append(i)
+
+        return ret
+
     def _get_update_cell_value_request(
         self, sheetId: int, rowIdx: int, colIdx: int, userEnteredValue: dict[str, Any]
     ) -> Mapping[str, Any]:
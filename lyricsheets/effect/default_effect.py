@@ -1,4 +1,4 @@
-from collections.abc import Sequence, Mapping
+from collections.abc import Iterable, Sequence, Mapping
 from datetime import timedelta
 import functools
 
@@ -288,6 +288,11 @@ def get_switch_syl_fade_offsets(
 
 
 class DefaultLiveKaraokeEffect(DependentKaraokeEffect):
+    def get_styled_texts(self, song: Song) -> Iterable[tuple[pyass.Style, str]]:
+        for line in song.lyrics:
+            yield ROMAJI_STYLE, line.romaji
+            yield EN_STYLE, line.en
+
     def to_romaji_k_events(
         self,
         romajiLines: Sequence[KLine],
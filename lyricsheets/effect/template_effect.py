@@ -1,4 +1,4 @@
-from collections.abc import Sequence, Mapping
+from collections.abc import Iterable, Sequence, Mapping
 
 from ..ass.to_ass import *
 from enum import Enum
@@ -285,6 +285,16 @@ class TemplateEffect(KaraokeEffect):
 
         return event
 
+    def get_styled_texts(self, song: Song) -> Iterable[tuple[pyass.Style, str]]:
+        for line in song.lyrics:
+            for templates, text in (
+                (self.romaji_templates, line.romaji),
+                (self.en_templates, line.en),
+            ):
+                for template in templates:
+                    if template.contains(line.idxInSong):
+                        yield template.style, text
+
     def apply_templates_to_lines(
         self, songLines: Sequence[KLine]
     ) -> Sequence[pyass.Event]:
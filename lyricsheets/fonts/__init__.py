@@ -1 +1,15 @@
-from .fonts import FontScaler
+from .apportionment import apportion
+from .files import MissingFontWarning, warn_missing_fonts
+from .fonts import (
+    FONT_BACKENDS,
+    DEFAULT_FONT_BACKEND,
+    PREVIEW_FONT_BACKEND,
+    FontNotFoundError,
+    FontScaler,
+    get_font_scaler,
+    get_native_call_count,
+    prefetch_text_metrics,
+    set_font_backend,
+    set_font_workers,
+    set_glyph_cache_dir,
+)
@@ -0,0 +1,74 @@
+from collections.abc import Sequence
+from itertools import chain
+
+from .fonts import FontScaler
+
+# Below this many glyphs, setting up the arrays takes longer than splitting in Python
+MIN_VECTORIZED_GLYPHS = 64
+
+
+# Splits every toSplit into integers proportional to the glyph widths next to
+# it, like FontScaler.split_by_glyph_widths, but for all of them in one NumPy
+# pass. Every float operation is the same as in split_by_glyph_widths, so the
+# results are identical, including which glyphs get the remainders on ties
+def apportion(
+    toSplits: Sequence[int], widthVectors: Sequence[Sequence[int]]
+) -> list[list[int]]:
+    numGlyphs = sum(map(len, widthVectors))
+    if numGlyphs < MIN_VECTORIZED_GLYPHS:
+        return _apportion_each(toSplits, widthVectors)
+
+    try:
+        import numpy as np
+    except ImportError:
+        return _apportion_each(toSplits, widthVectors)
+
+    numVectors = len(widthVectors)
+    lengths = np.fromiter(map(len, widthVectors), dtype=np.int64, count=numVectors)
+    widths = np.fromiter(
+        chain.from_iterable(widthVectors), dtype=np.float64, count=numGlyphs
+    )
+    vectorIdxs = np.repeat(np.arange(numVectors), lengths)
+    starts = np.cumsum(lengths) - lengths
+
+    totals = np.bincount(vectorIdxs, weights=widths, minlength=numVectors)
+    if np.any(totals[lengths > 0] == 0):
+        raise ZeroDivisionError("division by zero")
+
+    splits = np.asarray(toSplits, dtype=np.int64)
+    scaled = splits[vectorIdxs] * (widths / totals[vectorIdxs])
+    floors = np.floor(scaled)
+    missing = splits - np.bincount(
+        vectorIdxs, weights=floors, minlength=numVectors
+    ).astype(np.int64)
+
+    # Within every vector, the glyphs with the largest fractional parts get
+    # the missing units first, and of equal ones the last glyph does. Packing
+    # this order into one unique integer per glyph lets it be sorted without
+    # the much slower stable sort of the fractional parts
+    glyphIdxs = np.arange(numGlyphs) - starts[vectorIdxs]
+    fractions, fractionRanks = np.unique(scaled - floors, return_inverse=True)
+    numFractions = len(fractions)
+    maxLength = int(lengths.max())
+    if numVectors * numFractions * maxLength < 2**63:
+        keys = vectorIdxs * numFractions + (numFractions - 1 - fractionRanks)
+        order = np.argsort(keys * maxLength + (maxLength - 1 - glyphIdxs))
+    else:
+        order = np.lexsort((-glyphIdxs, -fractionRanks, vectorIdxs))
+    ranks = np.empty(numGlyphs, dtype=np.int64)
+    ranks[order] = np.arange(numGlyphs) - starts[vectorIdxs[order]]
+
+    apportioned = (floors.astype(np.int64) + (ranks < missing[vectorIdxs])).tolist()
+    return [
+        apportioned[start:end]
+        for start, end in zip(starts.tolist(), (starts + lengths).tolist())
+    ]
+
+
+def _apportion_each(
+    toSplits: Sequence[int], widthVectors: Sequence[Sequence[int]]
+) -> list[list[int]]:
+    return [
+        list(FontScaler.split_by_glyph_widths(toSplit, widths))
+        for toSplit, widths in zip(toSplits, widthVectors)
+    ]
@@ -0,0 +1,298 @@
+from collections.abc import Iterable, Iterator, Mapping
+from typing import Optional
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import warnings
+
+from lyricsheets.cache import default_cache_dir
+
+# fontconfig weights from which a face is bold, and slants from which it is italic
+FC_WEIGHT_BOLD = 200
+FC_SLANT_ITALIC = 100
+# The words Windows appends to the family of a face to name its style in the registry
+WINDOWS_STYLE_WORDS = {"regular", "bold", "italic", "oblique"}
+
+# e.g. (family, isBold, isItalic, fontFile)
+InstalledFace = tuple[str, bool, bool, str]
+
+
+class MissingFontWarning(UserWarning):
+    pass
+
+
+# The file of every installed face, by family and style. Listing the
+# installed fonts takes long, so the index is kept on disk and only rebuilt
+# once one of the directories the fonts are installed in changed
+class FontIndex:
+    def __init__(
+        self, faces: Mapping[str, Mapping[str, str]], fontDirs: Mapping[str, int]
+    ):
+        # The files of the styles of each family, by casefolded family
+        self.faces = faces
+        # The modification time of each font directory when it was indexed
+        self.fontDirs = fontDirs
+
+    @staticmethod
+    def build() -> Optional["FontIndex"]:
+        # Directories are stated first, so fonts installed while listing invalidate the index.
+        # Every directory below the roots is, since installing a font into a new
+        # subdirectory only changes the directory the subdirectory is created in
+        fontDirs = _stat_dirs(_walk_dirs(_get_font_roots()))
+        installedFaces = (
+            _list_windows_faces() if sys.platform == "win32" else _list_fc_faces()
+        )
+        if installedFaces is None:
+            return None
+
+        faces: dict[str, dict[str, str]] = {}
+        for family, isBold, isItalic, fontFile in installedFaces:
+            faces.setdefault(family.casefold(), {}).setdefault(
+                _to_style_key(isBold, isItalic), fontFile
+            )
+
+        fontDirs.update(
+            _stat_dirs(
+                {
+                    os.path.dirname(fontFile)
+                    for styles in faces.values()
+                    for fontFile in styles.values()
+                }
+            )
+        )
+        return FontIndex(faces, fontDirs)
+
+    @staticmethod
+    def load(path: str) -> Optional["FontIndex"]:
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            return FontIndex(data["faces"], data["fontDirs"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmpPath = f"{path}.{os.getpid()}.tmp"
+        with open(tmpPath, "w") as f:
+            json.dump({"faces": self.faces, "fontDirs": self.fontDirs}, f)
+        os.replace(tmpPath, path)
+
+    def is_stale(self) -> bool:
+        currFontDirs = _stat_dirs([*self.fontDirs, *_get_font_roots()])
+        return currFontDirs != self.fontDirs
+
+    def has_family(self, fontName: str) -> bool:
+        return fontName.casefold() in self.faces
+
+    def find(self, fontName: str, isBold: bool, isItalic: bool) -> Optional[str]:
+        styles = self.faces.get(fontName.casefold())
+        if styles is None:
+            return None
+
+        # Like the backends, a missing style is synthesized from another style of the family
+        for styleKey in (
+            _to_style_key(isBold, isItalic),
+            _to_style_key(isBold, False),
+            _to_style_key(False, isItalic),
+            _to_style_key(False, False),
+        ):
+            fontFile = styles.get(styleKey)
+            if fontFile is not None:
+                return fontFile
+
+        return next(iter(styles.values()))
+
+
+_fontIndexPath: Optional[str] = os.path.join(default_cache_dir(), "fonts", "index.json")
+_fontIndex: Optional[FontIndex] = None
+_isFontIndexLoaded = False
+_fontIndexLock = threading.Lock()
+_warnedMissingFonts: set[str] = set()
+
+
+# The index is kept in this file between runs, or only in memory if None
+def set_font_index_path(path: Optional[str]):
+    global _fontIndexPath, _fontIndex, _isFontIndexLoaded
+    with _fontIndexLock:
+        _fontIndexPath = path
+        _fontIndex = None
+        _isFontIndexLoaded = False
+
+
+# Built or loaded once per process. None if the installed fonts cannot be listed
+def get_font_index() -> Optional[FontIndex]:
+    global _fontIndex, _isFontIndexLoaded
+    with _fontIndexLock:
+        if not _isFontIndexLoaded:
+            index = FontIndex.load(_fontIndexPath) if _fontIndexPath else None
+            if index is None or index.is_stale():
+                index = FontIndex.build()
+                if index is not None and _fontIndexPath:
+                    try:
+                        index.save(_fontIndexPath)
+                    except OSError:
+                        pass
+
+            _fontIndex = index
+            _isFontIndexLoaded = True
+
+        return _fontIndex
+
+
+# The file the system renders a face from, used to tell when an installed
+# font changed. Faces which cannot be located are not cached between runs
+def find_font_file(fontName: str, isBold: bool, isItalic: bool) -> Optional[str]:
+    index = get_font_index()
+    return index.find(fontName, isBold, isItalic) if index is not None else None
+
+
+# None are missing if the installed fonts cannot be listed
+def find_missing_fonts(fontNames: Iterable[str]) -> list[str]:
+    index = get_font_index()
+    if index is None:
+        return []
+
+    return sorted(
+        {fontName for fontName in fontNames if not index.has_family(fontName)}
+    )
+
+
+# Backends silently measure the text of a font which is not installed with a
+# fallback font, so each missing font is warned about once
+def warn_missing_fonts(fontNames: Iterable[str]):
+    missingFonts = [
+        fontName
+        for fontName in find_missing_fonts(fontNames)
+        if fontName not in _warnedMissingFonts
+    ]
+    if not missingFonts:
+        return
+
+    _warnedMissingFonts.update(missingFonts)
+    warnings.warn(
+        f"Fonts not installed, their text is laid out with a fallback font: {', '.join(missingFonts)}",
+        MissingFontWarning,
+        stacklevel=2,
+    )
+
+
+def _to_style_key(isBold: bool, isItalic: bool) -> str:
+    return f"{int(isBold)}{int(isItalic)}"
+
+
+def _get_font_roots() -> list[str]:
+    if sys.platform == "win32":
+        return [
+            os.path.join(os.environ.get("WINDIR", "C:\\Windows"), "Fonts"),
+            os.path.join(
+                os.environ.get("LOCALAPPDATA", os.path.expanduser("~/AppData/Local")),
+                "Microsoft",
+                "Windows",
+                "Fonts",
+            ),
+        ]
+    if sys.platform == "darwin":
+        return [
+            "/System/Library/Fonts",
+            "/Library/Fonts",
+            os.path.expanduser("~/Library/Fonts"),
+        ]
+
+    dataHome = os.environ.get("XDG_DATA_HOME", os.path.expanduser("~/.local/share"))
+    return [
+        "/usr/share/fonts",
+        "/usr/local/share/fonts",
+        os.path.join(dataHome, "fonts"),
+        os.path.expanduser("~/.fonts"),
+    ]
+
+
+def _walk_dirs(roots: Iterable[str]) -> Iterator[str]:
+    for root in roots:
+        for dirPath, _, _ in os.walk(root):
+            yield dirPath
+
+
+def _stat_dirs(dirs: Iterable[str]) -> dict[str, int]:
+    mtimes = {}
+    for fontDir in dirs:
+        try:
+            mtimes[fontDir] = os.stat(fontDir).st_mtime_ns
+        except OSError:
+            pass
+
+    return mtimes
+
+
+def _list_fc_faces() -> Optional[list[InstalledFace]]:
+    if shutil.which("fc-list") is None:
+        return None
+
+    try:
+        result = subprocess.run(
+            ["fc-list", "--format=%{family}\t%{weight}\t%{slant}\t%{file}\n"],
+            capture_output=True,
+            text=True,
+            timeout=30,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+
+    faces = []
+    for line in result.stdout.splitlines():
+        try:
+            families, weight, slant, fontFile = line.split("\t")
+            # Variable fonts report a range of weights
+            isBold = float(weight.strip("[]").split()[0]) >= FC_WEIGHT_BOLD
+            isItalic = float(slant.strip("[]").split()[0]) >= FC_SLANT_ITALIC
+        except (ValueError, IndexError):
+            continue
+
+        # A face may be known under several families, e.g. localized ones
+        for family in families.split(","):
+            faces.append((family.strip(), isBold, isItalic, fontFile))
+
+    return faces
+
+
+def _list_windows_faces() -> Optional[list[InstalledFace]]:
+    import winreg
+
+    fontsDir = os.path.join(os.environ.get("WINDIR", "C:\\Windows"), "Fonts")
+    faces = []
+    for root in (winreg.HKEY_LOCAL_MACHINE, winreg.HKEY_CURRENT_USER):
+        try:
+            key = winreg.OpenKey(
+                root, r"SOFTWARE\Microsoft\Windows NT\CurrentVersion\Fonts"
+            )
+        except OSError:
+            continue
+
+        with key:
+            for i in range(winreg.QueryInfoKey(key)[1]):
+                name, fontFile, _ = winreg.EnumValue(key, i)
+                # Per user fonts are registered with their full path
+                fontFile = os.path.join(fontsDir, fontFile)
+
+                # e.g. "Proxima Nova Bold Italic (OpenType)", or
+                # "Cambria & Cambria Math (TrueType)" for collections
+                for name in name.rsplit(" (", 1)[0].split(" & "):
+                    words = name.split()
+                    styles = set()
+                    while len(words) > 1 and words[-1].lower() in WINDOWS_STYLE_WORDS:
+                        styles.add(words.pop().lower())
+
+                    faces.append(
+                        (
+                            " ".join(words),
+                            "bold" in styles,
+                            bool(styles & {"italic", "oblique"}),
+                            fontFile,
+                        )
+                    )
+
+    return faces
@@ -1,24 +1,171 @@
-from collections.abc import Sequence
-from functools import cache
+from abc import ABC, abstractmethod
+from collections.abc import Iterable, Sequence
+from typing import TYPE_CHECKING, Optional
 import math
+import os
+import threading
 
 from pyass import Style
-import wx
 
-_ = wx.App()
-PRECISION_SCALE = 64
+from lyricsheets.cache import default_cache_dir
+
+from .files import find_font_file, set_font_index_path, warn_missing_fonts
+from .glyphs import GlyphTable, get_font_fingerprint, open_glyph_table
+
+if TYPE_CHECKING:
+    from .pool import FontMetricsPool
+
+WX_FONT_BACKEND = "wx"
+FONTTOOLS_FONT_BACKEND = "fonttools"
+# Approximates text from the glyphs measured by earlier runs, for quick previews
+PREVIEW_FONT_BACKEND = "preview"
+FONT_BACKENDS = (WX_FONT_BACKEND, FONTTOOLS_FONT_BACKEND, PREVIEW_FONT_BACKEND)
+DEFAULT_FONT_BACKEND = WX_FONT_BACKEND
+
+# The style fields which change how text is rendered, as opposed to where and in which color
+FontKey = tuple[str, int, bool, bool, bool, bool]
+
+
+class FontNotFoundError(Exception):
+    pass
+
+
+def to_font_key(style: Style) -> FontKey:
+    return (
+        style.fontName,
+        style.fontSize,
+        style.isBold,
+        style.isItalic,
+        style.isUnderline,
+        style.isStrikeout,
+    )
+
+
+# Measures text in one font. Backends measure every string in a single call,
+# and every string is only measured once, since a song repeats the same few
+# dozen syllables over and over. With a glyph table, strings are composed from
+# the advances and kerning of their glyphs instead, which are only measured
+# the first time they are seen by any run. Extents and heights are in the
+# backend's own units, only their ratios are used
+class FontMetrics(ABC):
+    def __init__(self, fontKey: FontKey, glyphTable: Optional[GlyphTable] = None):
+        self.fontKey = fontKey
+        self.glyphTable = glyphTable
+
+        self.partialExtents: dict[str, Sequence[int]] = {}
+        self.height: Optional[int] = glyphTable.height if glyphTable else None
+        self.nativeCalls = 0
+
+    # The advance from the start of the text to the end of each of its characters
+    def get_partial_extents(self, text: str) -> Sequence[int]:
+        extents = self.partialExtents.get(text)
+        if extents is None:
+            extents = self.partialExtents[text] = (
+                self._compose_partial_extents(text)
+                if self.glyphTable is not None
+                else self._measure_partial_extents(text)
+            )
+
+        return extents
+
+    # Measures all the texts which were not measured yet, in as few calls as the
+    # backend can. With a glyph table, that is one call per glyph never seen
+    # before and a single call for the kerning of all the texts together
+    def prefetch_partial_extents(self, texts: Iterable[str]):
+        unknown = [
+            text
+            for text in dict.fromkeys(texts)
+            if text and text not in self.partialExtents
+        ]
+        if self.glyphTable is not None:
+            self._learn_glyphs(unknown)
+
+        for text in unknown:
+            self.get_partial_extents(text)
+
+    def get_height(self) -> int:
+        if self.height is None:
+            self.nativeCalls += 1
+            self.height = self.measure_height()
+            if self.glyphTable is not None:
+                self.glyphTable.height = self.height
+
+        return self.height
+
+    @abstractmethod
+    def measure_partial_extents(self, text: str) -> Sequence[int]: ...
+
+    @abstractmethod
+    def measure_height(self) -> int: ...
+
+    def _measure_partial_extents(self, text: str) -> Sequence[int]:
+        if not text:
+            return []
+
+        self.nativeCalls += 1
+        return self.measure_partial_extents(text)
+
+    def _compose_partial_extents(self, text: str) -> Sequence[int]:
+        self._learn_glyphs([text])
+
+        table = self.glyphTable
+        codepoints = [ord(c) for c in text]
+        extents = [table.get_advance(codepoints[0])] if codepoints else []
+        for pair in zip(codepoints, codepoints[1:]):
+            extents.append(
+                extents[-1] + table.get_kern(pair) + table.get_advance(pair[1])
+            )
+
+        return extents
+
+    # Measures the advances and kerning of the texts' glyphs which are not in the table yet
+    def _learn_glyphs(self, texts: Sequence[str]):
+        table = self.glyphTable
+        for codepoint in {ord(c) for text in texts for c in text}:
+            if table.get_advance(codepoint) is None:
+                table.set_advance(
+                    codepoint, self._measure_partial_extents(chr(codepoint))[0]
+                )
+
+        # Measuring the texts one after the other gives the kerning of all of
+        # their pairs at once, and of the pairs where they meet, which are just as real
+        unkerned = "".join(
+            text
+            for text in texts
+            if any(table.get_kern(pair) is None for pair in _to_pairs(text))
+        )
+        if unkerned:
+            extents = self._measure_partial_extents(unkerned)
+            table.add_kerns(
+                {
+                    pair: extents[i + 1] - extents[i] - table.get_advance(pair[1])
+                    for i, pair in enumerate(_to_pairs(unkerned))
+                }
+            )
+
+    def get_glyph_widths(self, text: str) -> list[int]:
+        extents = self.get_partial_extents(text)
+        return [end - start for start, end in zip([0, *extents], extents)]
 
 
 class FontScaler:
     def __init__(self, style: Style):
-        self.dc = wx.MemoryDC()
-        self.dc.SetFont(_find_font(style))
+        self.metrics = get_font_metrics(to_font_key(style))
         self.style = style
 
+        self.prefixWidths: dict[str, Sequence[float]] = {}
+
     def split_by_rendered_width(
         self, toSplit: int, text: str, shouldRoundToInteger: bool = True
     ) -> Sequence[float]:
-        vector = [self.dc.GetTextExtent(c).width for c in text]
+        return self.split_by_glyph_widths(
+            toSplit, self.metrics.get_glyph_widths(text), shouldRoundToInteger
+        )
+
+    @staticmethod
+    def split_by_glyph_widths(
+        toSplit: int, vector: Sequence[int], shouldRoundToInteger: bool = True
+    ) -> Sequence[float]:
         totalLength = sum(vector)
         unitVector = [dim / totalLength for dim in vector]
 
@@ -38,56 +185,174 @@ class FontScaler:
 
         return ans
 
-    def get_length(self, text: str) -> float:
-        width = 0
-        if self.style.spacing:
-            for c in text:
-                extent = self.dc.GetTextExtent(c)
-                scaling = (
-                    self.style.fontSize
-                    * PRECISION_SCALE
-                    / (extent.height if extent.height > 0 else 1)
-                )
-                width += (extent.width + self.style.spacing) * scaling
-        else:
-            extent = self.dc.GetTextExtent(text)
+    # The rendered width of every prefix of the text, i.e. the right edge of each
+    # of its characters, including the kerning between them and the style's spacing
+    def prefix_widths(self, text: str) -> Sequence[float]:
+        widths = self.prefixWidths.get(text)
+        if widths is None:
+            height = self.metrics.get_height()
             scaling = (
-                self.style.fontSize
-                * PRECISION_SCALE
-                / (extent.height if extent.height > 0 else 1)
+                self.style.scaleX
+                / 100
+                * self.style.fontSize
+                / (height if height > 0 else 1)
             )
-            width = extent.width * scaling
+            widths = self.prefixWidths[text] = [
+                (extent + self.style.spacing * i) * scaling
+                for i, extent in enumerate(
+                    self.metrics.get_partial_extents(text), start=1
+                )
+            ]
 
-        return self.style.scaleX / 100 * width / PRECISION_SCALE
+        return widths
 
+    def get_length(self, text: str) -> float:
+        return self.prefix_widths(text)[-1] if text else 0
 
-def _find_font(style: Style) -> wx.Font:
-    return _find_font_cached(
-        style.fontName,
-        style.fontSize,
-        style.isBold,
-        style.isItalic,
-        style.isUnderline,
-        style.isStrikeout,
-    )
 
+_fontBackend = DEFAULT_FONT_BACKEND
+_fontMetrics: dict[FontKey, FontMetrics] = {}
+_glyphCacheDir: Optional[str] = os.path.join(default_cache_dir(), "fonts")
+_fontScalers: dict[tuple[FontKey, float, float], FontScaler] = {}
+_fontWorkers = 0
+_fontPool: Optional["FontMetricsPool"] = None
+_fontPoolLock = threading.Lock()
 
-@cache
-def _find_font_cached(
-    fontName: str,
-    fontSize: int,
-    isBold: bool,
-    isItalic: bool,
-    isUnderline: bool,
-    isStrikethrough: bool,
-) -> wx.Font:
-    return wx.Font(
-        wx.FontInfo(fontSize * PRECISION_SCALE)
-        .FaceName(fontName)
-        .Family(wx.FONTFAMILY_DEFAULT)
-        .Bold(isBold)
-        .Italic(isItalic)
-        .Underlined(isUnderline)
-        .Strikethrough(isStrikethrough)
-        .Encoding(wx.FONTENCODING_SYSTEM)
-    )
+
+def get_font_metrics(fontKey: FontKey) -> FontMetrics:
+    metrics = _fontMetrics.get(fontKey)
+    if metrics is None:
+        metrics = _fontMetrics[fontKey] = _create_font_metrics(fontKey)
+
+    return metrics
+
+
+# Styles only differing in colors, margins or alignment share one scaler
+def get_font_scaler(style: Style) -> FontScaler:
+    scalerKey = (to_font_key(style), style.spacing, style.scaleX)
+    scaler = _fontScalers.get(scalerKey)
+    if scaler is None:
+        scaler = _fontScalers[scalerKey] = FontScaler(style)
+
+    return scaler
+
+
+def set_font_backend(fontBackend: str):
+    global _fontBackend
+    if fontBackend not in FONT_BACKENDS:
+        raise ValueError(f"Unknown font backend {fontBackend}")
+
+    if fontBackend != _fontBackend:
+        _reset_font_metrics()
+        _fontBackend = fontBackend
+
+
+# Text is measured in this many worker processes instead of the calling thread, or in it if 0
+def set_font_workers(numWorkers: int):
+    global _fontWorkers
+    if numWorkers != _fontWorkers:
+        _reset_font_metrics()
+        _fontWorkers = numWorkers
+
+
+# Glyph metrics and the index of installed fonts are kept in this directory
+# between runs, or only in memory if None
+def set_glyph_cache_dir(cacheDir: Optional[str]):
+    global _glyphCacheDir
+    _glyphCacheDir = cacheDir
+    set_font_index_path(os.path.join(cacheDir, "index.json") if cacheDir else None)
+
+
+# Measures every text in its style before any of them is laid out, batched by
+# font, so that laying them out afterwards makes no native calls at all. Fonts
+# which cannot be found only fail once their text is actually laid out
+def prefetch_text_metrics(styledTexts: Iterable[tuple[Style, str]]):
+    textsByMetrics: dict[FontMetrics, list[str]] = {}
+    for style, text in styledTexts:
+        try:
+            metrics = get_font_scaler(style).metrics
+        except FontNotFoundError:
+            continue
+
+        textsByMetrics.setdefault(metrics, []).append(text)
+
+    for metrics, texts in textsByMetrics.items():
+        metrics.prefetch_partial_extents(texts)
+        metrics.get_height()
+
+
+def get_native_call_count() -> int:
+    return sum(metrics.nativeCalls for metrics in _fontMetrics.values())
+
+
+def _reset_font_metrics():
+    global _fontPool
+    _fontMetrics.clear()
+    _fontScalers.clear()
+
+    with _fontPoolLock:
+        if _fontPool is not None:
+            _fontPool.close()
+            _fontPool = None
+
+
+def _to_pairs(text: str) -> list[tuple[int, int]]:
+    codepoints = [ord(c) for c in text]
+    return list(zip(codepoints, codepoints[1:]))
+
+
+def _get_font_pool() -> "FontMetricsPool":
+    global _fontPool
+    with _fontPoolLock:
+        if _fontPool is None:
+            from .pool import FontMetricsPool
+
+            _fontPool = FontMetricsPool(_fontWorkers, _fontBackend, _glyphCacheDir)
+
+        return _fontPool
+
+
+# Backends are only imported once used, since each needs its own library
+def _create_font_metrics(fontKey: FontKey) -> FontMetrics:
+    fontName, _, isBold, isItalic, _, _ = fontKey
+
+    if _fontWorkers:
+        from .pool import PooledFontMetrics
+
+        return PooledFontMetrics(fontKey, _get_font_pool())
+
+    # Pooled fonts are warned about by the worker measuring them
+    warn_missing_fonts([fontName])
+
+    if _fontBackend == PREVIEW_FONT_BACKEND:
+        from .preview_backend import PreviewFontMetrics
+
+        return PreviewFontMetrics(fontKey, _open_glyph_table(fontKey))
+
+    if _fontBackend == FONTTOOLS_FONT_BACKEND:
+        from .fonttools_backend import FontToolsFontMetrics
+
+        fontFile = find_font_file(fontName, isBold, isItalic)
+        if fontFile is None:
+            raise FontNotFoundError(f"Cannot find the file of font {fontName}")
+
+        return FontToolsFontMetrics(fontKey, fontFile)
+
+    from .wx_backend import WxFontMetrics
+
+    return WxFontMetrics(fontKey, _open_glyph_table(fontKey))
+
+
+def _open_glyph_table(fontKey: FontKey) -> Optional[GlyphTable]:
+    if _glyphCacheDir is None:
+        return None
+
+    fontName, _, isBold, isItalic, _, _ = fontKey
+    fontFile = find_font_file(fontName, isBold, isItalic)
+    if fontFile is None:
+        return None
+
+    try:
+        return open_glyph_table(_glyphCacheDir, fontKey, get_font_fingerprint(fontFile))
+    except OSError:
+        return None
@@ -0,0 +1,182 @@
+from collections.abc import Mapping, Sequence
+from typing import Optional
+
+from fontTools.ttLib import TTCollection, TTFont
+
+from .fonts import FontKey, FontMetrics
+
+# GPOS lookups wrapping their subtables in extension subtables
+PAIR_POS_LOOKUP_TYPE = 2
+EXTENSION_LOOKUP_TYPE = 9
+
+
+# Reads advances, kerning and vertical metrics from the font file itself, so
+# it needs neither a GUI toolkit nor a display. Extents are in font units.
+# Like libass and GDI, it kerns with the pairs of the GPOS kern feature or the
+# legacy kern table, but does not shape, so ligatures and fallback fonts are
+# not taken into account
+class FontToolsFontMetrics(FontMetrics):
+    def __init__(self, fontKey: FontKey, fontFile: str):
+        super().__init__(fontKey)
+        fontName, _, isBold, isItalic, _, _ = fontKey
+
+        self.font = _open_font(fontFile, fontName, isBold, isItalic)
+        self.cmap = self.font.getBestCmap()
+        self.advances = self.font["hmtx"].metrics
+        self.kernLookups = _read_kern_lookups(self.font)
+        self.legacyKerns = _read_legacy_kerns(self.font)
+
+        self.glyphKerns: dict[tuple[str, str], int] = {}
+
+    def measure_partial_extents(self, text: str) -> Sequence[int]:
+        glyphs = [self.cmap.get(ord(c), ".notdef") for c in text]
+
+        extents = []
+        extent = 0
+        prevGlyph = None
+        for glyph in glyphs:
+            if prevGlyph is not None:
+                extent += self.get_kern(prevGlyph, glyph)
+            extent += self.advances[glyph][0]
+            extents.append(extent)
+            prevGlyph = glyph
+
+        return extents
+
+    def measure_height(self) -> int:
+        os2 = self.font.get("OS/2")
+        if os2 is not None and os2.usWinAscent + os2.usWinDescent > 0:
+            return os2.usWinAscent + os2.usWinDescent
+
+        hhea = self.font["hhea"]
+        return hhea.ascent - hhea.descent
+
+    def get_kern(self, first: str, second: str) -> int:
+        kern = self.glyphKerns.get((first, second))
+        if kern is None:
+            kern = self.glyphKerns[first, second] = (
+                sum(
+                    _get_lookup_kern(lookup, first, second)
+                    for lookup in self.kernLookups
+                )
+                if self.kernLookups
+                else self.legacyKerns.get((first, second), 0)
+            )
+
+        return kern
+
+
+def _open_font(fontFile: str, fontName: str, isBold: bool, isItalic: bool) -> TTFont:
+    if not fontFile.lower().endswith((".ttc", ".otc")):
+        return TTFont(fontFile, lazy=True)
+
+    # Collections hold several faces, of which the one named like the font is used
+    fonts = TTCollection(fontFile, lazy=True).fonts
+    for font in fonts:
+        names = font["name"]
+        familyName = names.getBestFamilyName() or ""
+        subfamilyName = (names.getBestSubFamilyName() or "").lower()
+        if (
+            familyName.lower() == fontName.lower()
+            and ("bold" in subfamilyName) == isBold
+            and ("italic" in subfamilyName or "oblique" in subfamilyName) == isItalic
+        ):
+            return font
+
+    return fonts[0]
+
+
+def _read_kern_lookups(font: TTFont) -> Sequence[Sequence]:
+    if "GPOS" not in font:
+        return []
+
+    gpos = font["GPOS"].table
+    if not gpos.FeatureList or not gpos.LookupList:
+        return []
+
+    lookupIdxs = sorted(
+        {
+            idx
+            for record in gpos.FeatureList.FeatureRecord
+            if record.FeatureTag == "kern"
+            for idx in record.Feature.LookupListIndex
+        }
+    )
+
+    lookups = []
+    for idx in lookupIdxs:
+        lookup = gpos.LookupList.Lookup[idx]
+        subtables = [
+            (
+                subtable.ExtSubTable
+                if lookup.LookupType == EXTENSION_LOOKUP_TYPE
+                else subtable
+            )
+            for subtable in lookup.SubTable
+        ]
+        subtables = [
+            subtable
+            for subtable in subtables
+            if subtable.LookupType == PAIR_POS_LOOKUP_TYPE
+        ]
+        if subtables:
+            lookups.append([_to_pair_kerns(subtable) for subtable in subtables])
+
+    return lookups
+
+
+# Every pair adjustment subtable as a mapping of the first glyph of a pair
+# to a function returning the kerning of the pair, or None if the subtable
+# does not apply to it
+def _to_pair_kerns(subtable) -> Mapping:
+    if subtable.Format == 1:
+        pairKerns = {}
+        for first, pairSet in zip(subtable.Coverage.glyphs, subtable.PairSet):
+            kerns = {
+                record.SecondGlyph: _get_x_advance(record.Value1)
+                for record in pairSet.PairValueRecord
+            }
+            pairKerns[first] = kerns.get
+
+        return pairKerns
+
+    classDefs1 = subtable.ClassDef1.classDefs if subtable.ClassDef1 else {}
+    classDefs2 = subtable.ClassDef2.classDefs if subtable.ClassDef2 else {}
+
+    def get_class_kern(first: str, second: str) -> Optional[int]:
+        record = subtable.Class1Record[classDefs1.get(first, 0)]
+        return _get_x_advance(record.Class2Record[classDefs2.get(second, 0)].Value1)
+
+    return {
+        first: lambda second, first=first: get_class_kern(first, second)
+        for first in subtable.Coverage.glyphs
+    }
+
+
+# Within a lookup, the first subtable which applies to a pair kerns it
+def _get_lookup_kern(lookup: Sequence[Mapping], first: str, second: str) -> int:
+    for pairKerns in lookup:
+        get_kern = pairKerns.get(first)
+        if get_kern is not None:
+            kern = get_kern(second)
+            if kern is not None:
+                return kern
+
+    return 0
+
+
+def _get_x_advance(valueRecord) -> int:
+    return getattr(valueRecord, "XAdvance", 0) if valueRecord is not None else 0
+
+
+def _read_legacy_kerns(font: TTFont) -> Mapping[tuple[str, str], int]:
+    if "kern" not in font:
+        return {}
+
+    kerns = {}
+    for table in font["kern"].kernTables:
+        if getattr(table, "format", None) == 0:
+            for pair, kern in table.kernTable.items():
+                kerns.setdefault(pair, kern)
+
+    return kerns
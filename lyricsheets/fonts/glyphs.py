@@ -0,0 +1,141 @@
+from collections.abc import Mapping, Sequence
+from typing import Optional
+import array
+import glob
+import hashlib
+import json
+import mmap
+import os
+
+UNKNOWN_ADVANCE = -1
+# The advance table grows by whole blocks of codepoints, which are
+# filled with UNKNOWN_ADVANCE
+ADVANCE_BLOCK_SIZE = 0x1000
+ADVANCE_ITEM_SIZE = array.array("i").itemsize
+
+
+def get_font_fingerprint(fontFile: str) -> str:
+    stat = os.stat(fontFile)
+    return f"{os.path.abspath(fontFile)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+# The advance of every glyph and the kerning of every pair of glyphs which
+# were measured in one font, persisted between runs. The advances are a
+# memory mapped array indexed by codepoint, so only the glyphs which are used
+# are read. The kerning pairs are appended to a file as they are measured.
+# Parallel runs share the files, and a glyph measured by one run is picked
+# up by the others
+class GlyphTable:
+    def __init__(self, path: str) -> None:
+        self.advancePath = path + ".adv"
+        self.kernPath = path + ".kern"
+        self.metaPath = path + ".json"
+
+        self.advanceFile = open(self.advancePath, "a+b")
+        self.advanceMap: Optional[mmap.mmap] = None
+        self.advances: Sequence[int] = memoryview(b"").cast("i")
+        self._map_advances(ADVANCE_BLOCK_SIZE)
+
+        self.kerns: dict[tuple[int, int], int] = {}
+        if os.path.exists(self.kernPath):
+            with open(self.kernPath, "rb") as f:
+                data = f.read()
+
+            triples = array.array("i")
+            triples.frombytes(
+                data[: len(data) // (3 * ADVANCE_ITEM_SIZE) * 3 * ADVANCE_ITEM_SIZE]
+            )
+            for i in range(0, len(triples), 3):
+                self.kerns.setdefault((triples[i], triples[i + 1]), triples[i + 2])
+
+        # Unreadable metadata is measured again, like a missing file
+        self.meta = {}
+        try:
+            with open(self.metaPath) as f:
+                meta = json.load(f)
+            if isinstance(meta, dict):
+                self.meta = meta
+        except (OSError, ValueError):
+            pass
+
+    @property
+    def height(self) -> Optional[int]:
+        return self.meta.get("height")
+
+    @height.setter
+    def height(self, height: int):
+        self.meta["height"] = height
+
+        # Replaced as a whole, so that parallel runs never read a partly written file
+        tmpPath = f"{self.metaPath}.{os.getpid()}.tmp"
+        with open(tmpPath, "w") as f:
+            json.dump(self.meta, f)
+        os.replace(tmpPath, self.metaPath)
+
+    def get_advance(self, codepoint: int) -> Optional[int]:
+        if codepoint >= len(self.advances):
+            return None
+
+        advance = self.advances[codepoint]
+        return advance if advance != UNKNOWN_ADVANCE else None
+
+    def set_advance(self, codepoint: int, advance: int):
+        if codepoint >= len(self.advances):
+            self._map_advances(codepoint + 1)
+
+        self.advances[codepoint] = advance
+
+    def get_kern(self, pair: tuple[int, int]) -> Optional[int]:
+        return self.kerns.get(pair)
+
+    def add_kerns(self, kerns: Mapping[tuple[int, int], int]):
+        triples = array.array("i")
+        for (first, second), kern in kerns.items():
+            if (first, second) not in self.kerns:
+                self.kerns[first, second] = kern
+                triples.extend((first, second, kern))
+
+        if triples:
+            with open(self.kernPath, "ab") as f:
+                f.write(triples.tobytes())
+
+    def close(self):
+        self.advances.release()
+        if self.advanceMap is not None:
+            self.advanceMap.close()
+        self.advanceFile.close()
+
+    def _map_advances(self, minLength: int):
+        numBlocks = -(-minLength // ADVANCE_BLOCK_SIZE)
+        size = numBlocks * ADVANCE_BLOCK_SIZE * ADVANCE_ITEM_SIZE
+
+        # Another run may have grown the file already
+        currSize = os.fstat(self.advanceFile.fileno()).st_size
+        if currSize < size:
+            self.advanceFile.write(b"\xff" * (size - currSize))
+            self.advanceFile.flush()
+
+        self.advances.release()
+        if self.advanceMap is not None:
+            self.advanceMap.close()
+
+        self.advanceMap = mmap.mmap(self.advanceFile.fileno(), max(size, currSize))
+        self.advances = memoryview(self.advanceMap).cast("i")
+
+
+def open_glyph_table(cacheDir: str, fontKey: Sequence, fingerprint: str) -> GlyphTable:
+    os.makedirs(cacheDir, exist_ok=True)
+
+    keyHash = hashlib.sha1(repr(tuple(fontKey)).encode()).hexdigest()[:16]
+    fingerprintHash = hashlib.sha1(fingerprint.encode()).hexdigest()[:16]
+    path = os.path.join(cacheDir, f"{keyHash}-{fingerprintHash}")
+
+    # Tables of the same font measured before its file changed are stale
+    for stalePath in glob.glob(os.path.join(cacheDir, f"{keyHash}-*")):
+        if not stalePath.startswith(path + "."):
+            try:
+                os.remove(stalePath)
+            except OSError:
+                pass
+
+    return GlyphTable(path)
@@ -0,0 +1,174 @@
+from collections.abc import Iterable, Sequence
+from multiprocessing.connection import Connection
+from multiprocessing.process import BaseProcess
+from typing import Optional
+import multiprocessing
+import queue
+import threading
+
+from .fonts import (
+    FontKey,
+    FontMetrics,
+    FontNotFoundError,
+    get_font_metrics,
+    set_font_backend,
+    set_glyph_cache_dir,
+)
+
+# Seconds a worker may take to answer before it is considered hung
+DEFAULT_TIMEOUT = 60
+
+
+# Measures text in worker processes which each own a font backend, so that
+# render threads never touch the backend themselves. wx device contexts in
+# particular cannot be shared between threads. Each request takes whichever
+# worker is idle, so as many requests are measured at once as there are workers
+class FontMetricsPool:
+    def __init__(
+        self,
+        numWorkers: int,
+        fontBackend: str,
+        glyphCacheDir: Optional[str],
+        timeout: float = DEFAULT_TIMEOUT,
+    ):
+        # Forked workers would inherit the parent's backend state, e.g. its wx.App
+        self.context = multiprocessing.get_context("spawn")
+        self.fontBackend = fontBackend
+        self.glyphCacheDir = glyphCacheDir
+        self.timeout = timeout
+
+        self.lock = threading.Lock()
+        self.processes: dict[Connection, BaseProcess] = {}
+        self.idleConnections: queue.SimpleQueue[Connection] = queue.SimpleQueue()
+        for _ in range(numWorkers):
+            self.idleConnections.put(self._spawn())
+
+    # The height of the font and the partial extents of every text
+    def measure(
+        self, fontKey: FontKey, texts: Sequence[str]
+    ) -> tuple[int, list[Sequence[int]]]:
+        connection = self.idleConnections.get()
+        try:
+            connection.send((fontKey, texts))
+            if not connection.poll(self.timeout):
+                raise TimeoutError(
+                    f"Font worker did not measure {fontKey} within {self.timeout}s"
+                )
+            response = connection.recv()
+        except (EOFError, OSError):
+            # The worker died or hung, so it is replaced by a new one
+            self._replace(connection)
+            raise
+
+        self.idleConnections.put(connection)
+        if isinstance(response, Exception):
+            raise response
+
+        return response
+
+    def close(self):
+        with self.lock:
+            for connection in self.processes:
+                try:
+                    connection.send(None)
+                except OSError:
+                    pass
+                connection.close()
+
+            for process in self.processes.values():
+                process.join(self.timeout)
+                if process.is_alive():
+                    process.kill()
+                    process.join()
+
+            self.processes.clear()
+
+    def _spawn(self) -> Connection:
+        connection, workerConnection = self.context.Pipe()
+        process = self.context.Process(
+            target=_serve,
+            args=(workerConnection, self.fontBackend, self.glyphCacheDir),
+            daemon=True,
+        )
+        process.start()
+        workerConnection.close()
+
+        self.processes[connection] = process
+        return connection
+
+    def _replace(self, connection: Connection):
+        with self.lock:
+            # Unless the pool was closed meanwhile
+            process = self.processes.pop(connection, None)
+            if process is None:
+                return
+
+            connection.close()
+            process.kill()
+            process.join()
+
+            self.idleConnections.put(self._spawn())
+
+
+# A proxy for the metrics of a font in the pool's workers. Like every other
+# backend, it keeps what it measured, so a text is only sent to a worker once
+class PooledFontMetrics(FontMetrics):
+    def __init__(self, fontKey: FontKey, pool: FontMetricsPool):
+        super().__init__(fontKey)
+        self.pool = pool
+
+    def measure_partial_extents(self, text: str) -> Sequence[int]:
+        return self._measure([text])[0]
+
+    def measure_height(self) -> int:
+        height, _ = self.pool.measure(self.fontKey, [])
+        return height
+
+    # Sends all the texts which were not measured yet in a single request
+    def prefetch_partial_extents(self, texts: Iterable[str]):
+        unknown = [
+            text
+            for text in dict.fromkeys(texts)
+            if text and text not in self.partialExtents
+        ]
+        if not unknown:
+            return
+
+        self.nativeCalls += 1
+        for text, extents in zip(unknown, self._measure(unknown)):
+            self.partialExtents[text] = extents
+
+    def _measure(self, texts: Sequence[str]) -> list[Sequence[int]]:
+        # Every response carries the height, which saves a request for it
+        self.height, extents = self.pool.measure(self.fontKey, texts)
+        return extents
+
+
+def _serve(connection: Connection, fontBackend: str, glyphCacheDir: Optional[str]):
+    set_font_backend(fontBackend)
+    set_glyph_cache_dir(glyphCacheDir)
+
+    while True:
+        try:
+            request = connection.recv()
+        except EOFError:
+            return
+
+        if request is None:
+            return
+
+        fontKey, texts = request
+        try:
+            metrics = get_font_metrics(fontKey)
+            metrics.prefetch_partial_extents(texts)
+            response = (
+                metrics.get_height(),
+                [metrics.get_partial_extents(text) for text in texts],
+            )
+        except FontNotFoundError as e:
+            response = e
+        except Exception as e:
+            # Backend errors may not survive pickling
+            response = RuntimeError(f"Cannot measure text in {fontKey}: {e!r}")
+
+        connection.send(response)
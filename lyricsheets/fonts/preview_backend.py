@@ -0,0 +1,61 @@
+from collections.abc import Sequence
+from typing import Optional
+
+from .fonts import FontKey, FontMetrics
+from .glyphs import UNKNOWN_ADVANCE, GlyphTable
+
+# Without a glyph table, text is laid out as if the font were monospaced with
+# glyphs half as wide as the font is high, which is close to the average of
+# Latin text
+MONOSPACE_HEIGHT = 1000
+MONOSPACE_ADVANCE = 500
+
+
+# Lays text out from the advances and kerning which earlier runs stored in
+# the font's glyph table, without any native backend, so it is fast to start
+# and never measures anything. Glyphs which were never measured are as wide as
+# the average glyph of the table, so the layout is only approximate
+class PreviewFontMetrics(FontMetrics):
+    def __init__(self, fontKey: FontKey, glyphTable: Optional[GlyphTable] = None):
+        # The table is only read, since nothing is measured to compose text from
+        super().__init__(fontKey)
+        self.table = glyphTable if glyphTable and glyphTable.height else None
+
+        self.averageAdvance = MONOSPACE_ADVANCE
+        if self.table is not None:
+            advances = [a for a in self.table.advances if a != UNKNOWN_ADVANCE]
+            if advances:
+                self.averageAdvance = round(sum(advances) / len(advances))
+            else:
+                self.averageAdvance = self.table.height // 2
+
+    def measure_partial_extents(self, text: str) -> Sequence[int]:
+        extents = []
+        extent = 0
+        prevCodepoint = None
+        for c in text:
+            codepoint = ord(c)
+            advance = None
+            if self.table is not None:
+                advance = self.table.get_advance(codepoint)
+                if prevCodepoint is not None:
+                    extent += self.table.get_kern((prevCodepoint, codepoint)) or 0
+
+            extent += self.averageAdvance if advance is None else advance
+            extents.append(extent)
+            prevCodepoint = codepoint
+
+        return extents
+
+    def measure_height(self) -> int:
+        return self.table.height if self.table is not None else MONOSPACE_HEIGHT
+
+    # Nothing is measured natively
+    def get_height(self) -> int:
+        if self.height is None:
+            self.height = self.measure_height()
+
+        return self.height
+
+    def _measure_partial_extents(self, text: str) -> Sequence[int]:
+        return self.measure_partial_extents(text)
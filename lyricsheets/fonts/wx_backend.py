@@ -0,0 +1,52 @@
+from collections.abc import Sequence
+from functools import cache
+from typing import Optional
+
+import wx
+
+from .fonts import FontKey, FontMetrics
+from .glyphs import GlyphTable
+
+# Fonts are created this many times larger than their size, so that the
+# integer extents wx measures in are precise enough
+PRECISION_SCALE = 64
+
+_app: Optional[wx.App] = None
+
+
+class WxFontMetrics(FontMetrics):
+    def __init__(self, fontKey: FontKey, glyphTable: Optional[GlyphTable] = None):
+        global _app
+        if _app is None:
+            _app = wx.App()
+
+        super().__init__(fontKey, glyphTable)
+        self.dc = wx.MemoryDC()
+        self.dc.SetFont(_find_font_cached(*fontKey))
+
+    def measure_partial_extents(self, text: str) -> Sequence[int]:
+        return list(self.dc.GetPartialTextExtents(text))
+
+    def measure_height(self) -> int:
+        return self.dc.GetCharHeight()
+
+
+@cache
+def _find_font_cached(
+    fontName: str,
+    fontSize: int,
+    isBold: bool,
+    isItalic: bool,
+    isUnderline: bool,
+    isStrikethrough: bool,
+) -> wx.Font:
+    return wx.Font(
+        wx.FontInfo(fontSize * PRECISION_SCALE)
+        .FaceName(fontName)
+        .Family(wx.FONTFAMILY_DEFAULT)
+        .Bold(isBold)
+        .Italic(isItalic)
+        .Underlined(isUnderline)
+        .Strikethrough(isStrikethrough)
+        .Encoding(wx.FONTENCODING_SYSTEM)
+    )
@@ -10,7 +10,7 @@ import pyass
 from pyass.timedelta import timedelta as pyasstimedelta
 
 from lyricsheets.models import SongLine
-from lyricsheets.fonts import FontScaler
+from lyricsheets.fonts import apportion, get_font_scaler
 
 
 KChar = TypeVar("KChar", bound="KChar")
@@ -228,15 +228,12 @@ class KChar(KObject):
 
     @cached_property
     def width(self) -> float:
-        return FontScaler(self.style).get_length(self._text)
+        prefixWidths = self.line._prefixWidths
+        return prefixWidths[self.idxInLine] - prefixWidths[self.idxInLine - 1]
 
     @cached_property
     def left(self) -> float:
-        if self.idxInLine == 1:
-            return self.line.left
-
-        prevChar = self.line.chars[self.idxInLine - 2]
-        return prevChar.left + prevChar.width
+        return self.line.left + self.line._prefixWidths[self.idxInLine - 1]
 
     @property
     def height(self) -> float:
@@ -366,37 +363,40 @@ class KSyl(KObject):
     def style(self) -> pyass.Style:
         return self.line.style
 
+    # The offsets in the line's text of the syllable, and of its text without
+    # the surrounding spaces. A syllable of only spaces is all pre-spaces
+    @property
+    def _textBounds(self) -> tuple[int, int, int, int]:
+        start = self.line._sylTextOffsets[self.idxInLine - 1]
+        end = start + len(self.chars)
+        text = self.text
+
+        strippedStart = start + len(text) - len(text.lstrip())
+        strippedEnd = max(strippedStart, end - (len(text) - len(text.rstrip())))
+        return start, strippedStart, strippedEnd, end
+
     @cached_property
     def width(self) -> float:
-        return FontScaler(self.style).get_length(self.text.strip())
+        _, strippedStart, strippedEnd, _ = self._textBounds
+        prefixWidths = self.line._prefixWidths
+        return prefixWidths[strippedEnd] - prefixWidths[strippedStart]
 
     @cached_property
     def preSpaceWidth(self) -> float:
-        numPreSpaces = len(self.text) - len(self.text.lstrip())
-        return (
-            FontScaler(self.style).get_length(self.text[:numPreSpaces])
-            if numPreSpaces
-            else 0
-        )
+        start, strippedStart, _, _ = self._textBounds
+        prefixWidths = self.line._prefixWidths
+        return prefixWidths[strippedStart] - prefixWidths[start]
 
     @cached_property
     def postSpaceWidth(self) -> float:
-        numPostSpaces = len(self.text) - len(self.text.rstrip())
-        return (
-            FontScaler(self.style).get_length(self.text[-(numPostSpaces):])
-            if numPostSpaces and numPostSpaces != len(self.text)
-            else 0
-        )
+        _, _, strippedEnd, end = self._textBounds
+        prefixWidths = self.line._prefixWidths
+        return prefixWidths[end] - prefixWidths[strippedEnd]
 
     @cached_property
     def left(self) -> float:
-        if self.idxInLine == 1:
-            return self.line.left + self.preSpaceWidth
-
-        prevSyl = self.line.syls[self.idxInLine - 2]
-        return (
-            prevSyl.left + prevSyl.width + prevSyl.postSpaceWidth + self.preSpaceWidth
-        )
+        _, strippedStart, _, _ = self._textBounds
+        return self.line.left + self.line._prefixWidths[strippedStart]
 
     @property
     def height(self) -> float:
@@ -430,9 +430,7 @@ class KSyl(KObject):
     def _charKaraTimes(self) -> list[timedelta]:
         syllableCharLengths = [
             timedelta(milliseconds=c * 10)
-            for c in FontScaler(self.style).split_by_rendered_width(
-                pyass.timedelta(self.duration).total_centiseconds(), self.text
-            )
+            for c in self.line._charTimeSplits[self.idxInLine - 1]
         ]
 
         return list(accumulate(syllableCharLengths, operator.add, initial=self._start))
@@ -605,6 +603,9 @@ class KLine(KObject):
 
         # Invalidate cached properties
         self.__dict__.pop("width", None)
+        self.__dict__.pop("_prefixWidths", None)
+        self.__dict__.pop("_glyphWidths", None)
+        self.__dict__.pop("_charTimeSplits", None)
         self.__dict__.pop("_charFadeOffsets", None)
 
         for syl in self.syls:
@@ -648,6 +649,7 @@ class KLine(KObject):
             return
 
         # Invalidate cached properties
+        self.__dict__.pop("_charTimeSplits", None)
         self.__dict__.pop("_charFadeOffsets", None)
 
         for syl in self.syls:
@@ -655,9 +657,41 @@ class KLine(KObject):
 
         self._transitionDuration = transitionDuration
 
+    # The rendered width of every prefix of the line's text, starting with the
+    # empty one. Every position in the line is derived from these
+    @cached_property
+    def _prefixWidths(self) -> list[float]:
+        return [0, *get_font_scaler(self.style).prefix_widths(self.text)]
+
+    @cached_property
+    def _glyphWidths(self) -> list[int]:
+        return get_font_scaler(self.style).metrics.get_glyph_widths(self.text)
+
+    # The centiseconds of every char of every syllable, followed by the fade
+    # milliseconds of every char of the line, all apportioned in one pass
+    @cached_property
+    def _charTimeSplits(self) -> list[list[int]]:
+        return apportion(*self._char_time_split_args())
+
+    def _char_time_split_args(self) -> tuple[list[int], list[list[int]]]:
+        glyphWidths = self._glyphWidths
+        toSplits = [
+            pyass.timedelta(syl.duration).total_centiseconds() for syl in self.syls
+        ]
+        widthVectors = [
+            glyphWidths[syl._textBounds[0] : syl._textBounds[3]] for syl in self.syls
+        ]
+        toSplits.append(pyass.timedelta(self.transitionDuration).total_milliseconds())
+        widthVectors.append(glyphWidths)
+        return toSplits, widthVectors
+
+    @cached_property
+    def _sylTextOffsets(self) -> list[int]:
+        return list(accumulate((len(syl.chars) for syl in self.syls), initial=0))
+
     @cached_property
     def width(self) -> float:
-        return FontScaler(self.style).get_length(self.text)
+        return self._prefixWidths[-1]
 
     @property
     def height(self) -> float:
@@ -759,12 +793,7 @@ class KLine(KObject):
 
     @cached_property
     def _charFadeOffsets(self) -> list[timedelta]:
-        lineCharTimes = [
-            timedelta(milliseconds=m)
-            for m in FontScaler(self.style).split_by_rendered_width(
-                pyass.timedelta(self.transitionDuration).total_milliseconds(), self.text
-            )
-        ]
+        lineCharTimes = [timedelta(milliseconds=m) for m in self._charTimeSplits[-1]]
 
         return list(accumulate(lineCharTimes, operator.add, initial=timedelta()))
 
@@ -785,6 +814,23 @@ class StyleNotBoundException(Exception):
     pass
 
 
+# Apportions the char times of all the lines, whose styles must be bound,
+# in one pass, instead of one pass per line when each is first laid out
+def apportion_k_lines(kLines: Sequence[KLine]):
+    toSplits, widthVectors = [], []
+    for kLine in kLines:
+        lineToSplits, lineWidthVectors = kLine._char_time_split_args()
+        toSplits += lineToSplits
+        widthVectors += lineWidthVectors
+
+    splits = apportion(toSplits, widthVectors)
+    start = 0
+    for kLine in kLines:
+        end = start + len(kLine.syls) + 1
+        kLine.__dict__["_charTimeSplits"] = splits[start:end]
+        start = end
+
+
 def to_romaji_k_line(line: SongLine) -> KLine:
     timedeltaUpToIdx = reduce(
         lambda a, b: a + [a[-1] + b.length], line.syllables, [timedelta(0)]
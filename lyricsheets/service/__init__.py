@@ -1,2 +1,11 @@
 from .service import SongService
+from .payload import IDENTITY_ENCODING, to_song_body, to_song_etag
 from .db import SongServiceByDB
+from .warmup import (
+    WarmupProgress,
+    warm_cache,
+    warm_songs,
+    format_progress,
+    format_failures,
+)
+from .aio import AsyncSongServiceByDB
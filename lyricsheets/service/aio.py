@@ -0,0 +1,84 @@
+from collections.abc import Sequence
+from typing import Union
+import asyncio
+
+from lyricsheets.cache import AsyncCache
+
+from .db import SongServiceByDB
+from .payload import IDENTITY_ENCODING, to_song_bodies, to_song_etag
+
+
+# Cache lookups go through the async cache, only misses fall back to
+# the synchronous SongServiceByDB in a worker thread since the Sheets client blocks
+class AsyncSongServiceByDB:
+    def __init__(self, service: SongServiceByDB, cache: AsyncCache) -> None:
+        self.service = service
+        self.cache = cache
+
+    @property
+    def payloadEncodings(self) -> Sequence[str]:
+        return self.service.payloadEncodings
+
+    def has_song(self, songName: str) -> bool:
+        return self.service.has_song(songName)
+
+    def to_song_key(self, songName: str) -> str:
+        return self.service.to_song_key(songName)
+
+    async def get_song_etag(self, songName: str) -> str:
+        songKey = self.service.to_existing_song_key(songName)
+
+        async def fill(
+            missing: Sequence[Sequence[str]],
+        ) -> Sequence[Union[str, Exception]]:
+            return [
+                body if isinstance(body, Exception) else to_song_etag(body)
+                for body in await self._get_song_bodies(
+                    [songKey for songKey, in missing], IDENTITY_ENCODING
+                )
+            ]
+
+        (etag,) = await SongServiceByDB._get_song_etag.get_many_async(
+            self.service, self.cache, [(songKey,)], fill
+        )
+        if isinstance(etag, Exception):
+            raise etag
+
+        return etag
+
+    async def get_song_body(
+        self, songName: str, encoding: str = IDENTITY_ENCODING
+    ) -> bytes:
+        (body,) = await self.get_song_bodies([songName], encoding)
+        if isinstance(body, Exception):
+            raise body
+
+        return body
+
+    # Songs which cannot be fetched are returned as their error, as by SongServiceByDB
+    async def get_song_bodies(
+        self, songNames: Sequence[str], encoding: str = IDENTITY_ENCODING
+    ) -> Sequence[Union[bytes, Exception]]:
+        return await self._get_song_bodies(
+            [self.service.to_existing_song_key(songName) for songName in songNames],
+            encoding,
+        )
+
+    async def _get_song_bodies(
+        self, songKeys: Sequence[str], encoding: str
+    ) -> Sequence[Union[bytes, Exception]]:
+        async def fill(
+            missing: Sequence[Sequence[str]],
+        ) -> Sequence[Union[bytes, Exception]]:
+            songs = await asyncio.to_thread(
+                self.service.get_songs_or_errors,
+                [songKey for songKey, _ in missing],
+            )
+            return to_song_bodies(songs, encoding)
+
+        return await SongServiceByDB._get_song_body.get_many_async(
+            self.service,
+            self.cache,
+            [(songKey, encoding) for songKey in songKeys],
+            fill,
+        )
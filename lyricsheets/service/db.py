@@ -1,12 +1,20 @@
-from collections.abc import Mapping
-from typing import Optional
+from collections.abc import Mapping, Sequence
+from typing import Optional, Union
 import string
 
 from lyricsheets.models import Song
 from lyricsheets.db import SongDB
 from lyricsheets.cache import Cache, with_cache
+from lyricsheets.sheets import GoogleSheetsClient
 
 from .service import SongService, NotFoundError
+from .payload import (
+    IDENTITY_ENCODING,
+    encode,
+    to_song_bodies,
+    to_song_body,
+    to_song_etag,
+)
 
 
 class SongServiceByDB(SongService):
@@ -16,45 +24,259 @@ class SongServiceByDB(SongService):
         groupToSpreadsheetIds: Mapping[str, str],
         defaultGroup: str = "",
         cache: Optional[Cache] = None,
+        payloadEncodings: Sequence[str] = (),
+        sheetsClient: Optional[GoogleSheetsClient] = None,
     ) -> None:
         self.groupToSpreadsheetIds = groupToSpreadsheetIds
+        self.payloadEncodings = payloadEncodings
         self.defaultSpreadsheetId = groupToSpreadsheetIds[defaultGroup]
-        self.service = SongDB(googleCredentials, cache=cache)
+        self.service = SongDB(googleCredentials, client=sheetsClient, cache=cache)
         self.cache = cache
 
         self._create_song_mappings()
 
     def _create_song_mappings(self):
         self.songMappings = {
-            self._to_song_key(song): {"group": group, "name": song}
+            self.to_song_key(song): {"group": group, "name": song}
             for group, id in self.groupToSpreadsheetIds.items()
             for song in self.service.list_song_names(id)
         }
 
-    @with_cache("SongServiceByDB::get_song")
-    def get_song(self, songName: str) -> Song:
-        songKeyToFind = self._to_song_key(songName)
+    def _get_song_location(self, songName: str) -> tuple[str, str]:
+        songKeyToFind = self.to_song_key(songName)
         if songKeyToFind not in self.songMappings:
             raise NotFoundError(songName)
 
         group = self.songMappings[songKeyToFind]["group"]
         existingSongName = self.songMappings[songKeyToFind]["name"]
         spreadsheetId = self.groupToSpreadsheetIds.get(group, self.defaultSpreadsheetId)
-        return self.service.get_song(spreadsheetId, existingSongName)
+        return spreadsheetId, existingSongName
+
+    def _get_song_scopes(self, songName: str) -> Sequence[str]:
+        try:
+            return self.service.get_song_scopes(*self._get_song_location(songName))
+        except NotFoundError:
+            return []
+
+    def _get_all_template_scopes(self) -> Sequence[str]:
+        return [
+            scope
+            for spreadsheetId in self.groupToSpreadsheetIds.values()
+            for scope in self.service.songTemplateDB.get_template_scopes(spreadsheetId)
+        ]
+
+    def has_song(self, songName: str) -> bool:
+        return self.to_song_key(songName) in self.songMappings
+
+    def get_song(self, songName: str) -> Song:
+        return self._get_song(self.to_existing_song_key(songName))
+
+    def get_songs(self, songNames: Sequence[str]) -> Sequence[Song]:
+        songKeys = [self.to_song_key(songName) for songName in songNames]
+        for songName, songKey in zip(songNames, songKeys):
+            if songKey not in self.songMappings:
+                raise NotFoundError(songName)
+
+        return SongServiceByDB._get_song.get_many(
+            self, [(songKey,) for songKey in songKeys], fill=self._fetch_songs
+        )
+
+    def _fetch_songs(self, missing: Sequence[Sequence[str]]) -> Sequence[Song]:
+        return self.service.get_songs(
+            [self._get_song_location(songKey) for songKey, in missing]
+        )
+
+    # Like get_songs_or_errors, for songs which are known not to be cached
+    def _fetch_songs_or_errors(
+        self, missing: Sequence[Sequence[str]]
+    ) -> list[Union[Song, Exception]]:
+        try:
+            return list(self._fetch_songs(missing))
+        except Exception as e:
+            if len(missing) == 1:
+                return [e]
+
+        ret: list[Union[Song, Exception]] = []
+        for args in missing:
+            try:
+                ret.extend(self._fetch_songs([args]))
+            except Exception as e:
+                ret.append(e)
+
+        return ret
+
+    # Songs are fetched together, and one at a time if that fails, so that a
+    # song which cannot be fetched or parsed is returned as its error in place
+    # of failing the others
+    def get_songs_or_errors(
+        self, songNames: Sequence[str]
+    ) -> list[Union[Song, Exception]]:
+        try:
+            return list(self.get_songs(songNames))
+        except Exception as e:
+            if len(songNames) == 1:
+                return [e]
+
+        ret: list[Union[Song, Exception]] = []
+        for songName in songNames:
+            try:
+                ret.append(self.get_song(songName))
+            except Exception as e:
+                ret.append(e)
+
+        return ret
+
+    # Keyed by song key so that every spelling of a title shares one entry
+    @with_cache(
+        "SongServiceByDB::get_song",
+        scopes=lambda self, songKey: self._get_song_scopes(songKey),
+    )
+    def _get_song(self, songKey: str) -> Song:
+        return self.service.get_song(*self._get_song_location(songKey))
+
+    def get_song_etag(self, songName: str) -> str:
+        return self._get_song_etag(self.to_existing_song_key(songName))
+
+    # Like get_song_bodies, songs which cannot be fetched are returned as their error
+    def get_song_etags(
+        self, songNames: Sequence[str]
+    ) -> Sequence[Union[str, Exception]]:
+        songKeys = [self.to_existing_song_key(songName) for songName in songNames]
+
+        return SongServiceByDB._get_song_etag.get_many(
+            self,
+            [(songKey,) for songKey in songKeys],
+            fill=lambda missing: [
+                body if isinstance(body, Exception) else to_song_etag(body)
+                for body in self.get_song_bodies([songKey for songKey, in missing])
+            ],
+        )
+
+    def get_song_body(self, songName: str, encoding: str = IDENTITY_ENCODING) -> bytes:
+        return self._get_song_body(self.to_existing_song_key(songName), encoding)
+
+    # Songs which cannot be fetched are returned as their error, see get_songs_or_errors
+    def get_song_bodies(
+        self, songNames: Sequence[str], encoding: str = IDENTITY_ENCODING
+    ) -> Sequence[Union[bytes, Exception]]:
+        songKeys = [self.to_existing_song_key(songName) for songName in songNames]
 
-    def _to_song_key(self, songName: str):
+        return SongServiceByDB._get_song_body.get_many(
+            self,
+            [(songKey, encoding) for songKey in songKeys],
+            fill=lambda missing: to_song_bodies(
+                self.get_songs_or_errors([songKey for songKey, _ in missing]), encoding
+            ),
+        )
+
+    # Caches every entry which serving the songs reads, and returns how many
+    # songs had to be fetched for it, leaving out those fetched by other callers,
+    # along with the error of every song which could not be fetched
+    def cache_songs(
+        self, songNames: Sequence[str]
+    ) -> tuple[int, Mapping[str, Exception]]:
+        songKeys = [self.to_existing_song_key(songName) for songName in songNames]
+
+        fetched = 0
+
+        def fetch(
+            missing: Sequence[Sequence[str]],
+        ) -> Sequence[Union[Song, Exception]]:
+            nonlocal fetched
+            fetched += len(missing)
+            return self._fetch_songs_or_errors(missing)
+
+        songs = SongServiceByDB._get_song.get_many(
+            self, [(songKey,) for songKey in songKeys], fill=fetch
+        )
+        failed = {
+            songName: song
+            for songName, song in zip(songNames, songs)
+            if isinstance(song, Exception)
+        }
+
+        # Songs which failed would only be fetched again for their other entries
+        songKeys = [
+            songKey
+            for songKey, song in zip(songKeys, songs)
+            if not isinstance(song, Exception)
+        ]
+        for encoding in [IDENTITY_ENCODING, *self.payloadEncodings]:
+            self.get_song_bodies(songKeys, encoding)
+        self.get_song_etags(songKeys)
+
+        return fetched, failed
+
+    # The entries which serving the songs reads, e.g. to keep them in memory
+    def get_song_cache_keys(self, songNames: Sequence[str]) -> Sequence[str]:
+        songKeys = [self.to_existing_song_key(songName) for songName in songNames]
+
+        return [
+            *SongServiceByDB._get_song_etag.get_keys(
+                self, [(songKey,) for songKey in songKeys]
+            ),
+            *(
+                key
+                for encoding in [IDENTITY_ENCODING, *self.payloadEncodings]
+                for key in SongServiceByDB._get_song_body.get_keys(
+                    self, [(songKey, encoding) for songKey in songKeys]
+                )
+            ),
+        ]
+
+    # Stored as an entry of its own so that conditional requests
+    # can be answered without loading the song itself
+    @with_cache(
+        "SongServiceByDB::get_song_etag",
+        scopes=lambda self, songKey: self._get_song_scopes(songKey),
+    )
+    def _get_song_etag(self, songKey: str) -> str:
+        return to_song_etag(self._get_song_body(songKey, IDENTITY_ENCODING))
+
+    # Every encoding is an entry of raw bytes of its own, so that
+    # a request only reads the one it is served and sends it as-is
+    @with_cache(
+        "SongServiceByDB::get_song_body",
+        scopes=lambda self, songKey, encoding: self._get_song_scopes(songKey),
+        raw=True,
+    )
+    def _get_song_body(self, songKey: str, encoding: str) -> bytes:
+        return to_song_body(self._get_song(songKey), encoding)
+
+    def to_existing_song_key(self, songName: str) -> str:
+        songKey = self.to_song_key(songName)
+        if songKey not in self.songMappings:
+            raise NotFoundError(songName)
+
+        return songKey
+
+    def invalidate_song(self, songName: str):
+        self.service.invalidate_song(*self._get_song_location(songName))
+
+    def close(self):
+        self.service.sheetsClient.close()
+
+    def to_song_key(self, songName: str) -> str:
         return "".join(
             "" if c in string.punctuation or c in string.whitespace else c
             for c in songName.encode("ascii", "ignore").decode().lower()
         )
 
-    @with_cache("SongServiceByDB::get_format_tags")
+    @with_cache(
+        "SongServiceByDB::get_format_tags",
+        scopes=lambda self, group="": self.service.songTemplateDB.get_template_scopes(
+            self.groupToSpreadsheetIds.get(group, self.defaultSpreadsheetId)
+        ),
+    )
     def get_format_tags(self, group: str = "") -> Mapping[str, str]:
         spreadsheetId = self.groupToSpreadsheetIds.get(group, self.defaultSpreadsheetId)
 
         return self.service.songTemplateDB.get_format_tags(spreadsheetId)
 
-    @with_cache("SongServiceByDB::get_all_format_tags")
+    @with_cache(
+        "SongServiceByDB::get_all_format_tags",
+        scopes=lambda self: self._get_all_template_scopes(),
+    )
     def get_all_format_tags(self) -> Mapping[str, str]:
         return {
             actor: style
@@ -66,8 +288,22 @@ class SongServiceByDB(SongService):
         spreadsheetId = self.groupToSpreadsheetIds.get(group, self.defaultSpreadsheetId)
         self.service.create_song(spreadsheetId, song)
 
+        self.songMappings[self.to_song_key(song.title.romaji)] = {
+            "group": group,
+            "name": song.title.romaji,
+        }
+
     def update_song_karaoke(self, song: Song):
-        songKey = self._to_song_key(song.title.romaji)
-        group = self.songMappings[songKey]["group"]
-        spreadsheetId = self.groupToSpreadsheetIds.get(group, self.defaultSpreadsheetId)
-        self.service.update_song_karaoke(spreadsheetId, song)
+        songKey = self.to_song_key(song.title.romaji)
+        spreadsheetId, _ = self._get_song_location(songKey)
+        updatedSong = self.service.update_song_karaoke(spreadsheetId, song)
+
+        if updatedSong is not None:
+            SongServiceByDB._get_song.put(self, updatedSong, songKey)
+            body = to_song_body(updatedSong)
+            SongServiceByDB._get_song_etag.put(self, to_song_etag(body), songKey)
+            SongServiceByDB._get_song_body.put(self, body, songKey, IDENTITY_ENCODING)
+            for encoding in self.payloadEncodings:
+                SongServiceByDB._get_song_body.put(
+                    self, encode(body, encoding), songKey, encoding
+                )
@@ -0,0 +1,41 @@
+from collections.abc import Sequence
+from typing import Union
+import gzip
+import hashlib
+
+from lyricsheets.models import Song
+
+IDENTITY_ENCODING = "identity"
+
+
+# The JSON of the song, compressed with the given Content-Encoding
+def to_song_body(song: Song, encoding: str = IDENTITY_ENCODING) -> bytes:
+    return encode(song.to_json().encode(), encoding)
+
+
+def to_song_bodies(
+    songs: Sequence[Union[Song, Exception]], encoding: str = IDENTITY_ENCODING
+) -> list[Union[bytes, Exception]]:
+    return [
+        song if isinstance(song, Exception) else to_song_body(song, encoding)
+        for song in songs
+    ]
+
+
+def to_song_etag(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+def encode(body: bytes, encoding: str) -> bytes:
+    match encoding:
+        case "identity":
+            return body
+        case "gzip":
+            # A fixed mtime keeps the output, and so any downstream ETag, stable
+            return gzip.compress(body, mtime=0)
+        case "br":
+            import brotli
+
+            return brotli.compress(body)
+        case _:
+            raise ValueError(f"Unknown content encoding {encoding}")
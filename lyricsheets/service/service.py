@@ -1,5 +1,5 @@
 from abc import abstractmethod
-from collections.abc import Mapping
+from collections.abc import Mapping, Sequence
 
 from lyricsheets.models import Song
 
@@ -12,6 +12,9 @@ class SongService:
     @abstractmethod
     def get_song(self, songName: str) -> Song: ...
 
+    def get_songs(self, songNames: Sequence[str]) -> Sequence[Song]:
+        return [self.get_song(songName) for songName in songNames]
+
     @abstractmethod
     def get_format_tags(self, group: str = "") -> Mapping[str, str]: ...
 
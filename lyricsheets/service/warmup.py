@@ -0,0 +1,90 @@
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+from typing import Optional
+import time
+
+from lyricsheets.db import SongTemplateDB
+
+from .db import SongServiceByDB
+
+DEFAULT_WARMUP_BATCH_SIZE = 50
+
+
+@dataclass
+class WarmupProgress:
+    done: int
+    total: int
+    fetched: int
+    elapsed: float
+    # The error of every song which could not be fetched, by title
+    failed: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def songsPerSecond(self) -> float:
+        return self.done / self.elapsed if self.elapsed else 0
+
+
+def warm_cache(
+    songService: SongServiceByDB,
+    priority: Sequence[str] = (),
+    batchSize: int = DEFAULT_WARMUP_BATCH_SIZE,
+    onProgress: Optional[Callable[[WarmupProgress], None]] = None,
+) -> WarmupProgress:
+    # Songs which are already cached are hits, so an interrupted warmup
+    # resumes where it stopped by simply running it again
+    songKeys = [
+        songKey
+        for songKey in dict.fromkeys(
+            [*map(songService.to_song_key, priority), *songService.songMappings]
+        )
+        if songKey in songService.songMappings
+        # The template sheet is listed alongside the songs but is not one
+        and songService.songMappings[songKey].get("name")
+        != SongTemplateDB.TEMPLATE_SHEET_NAME
+    ]
+
+    return warm_songs(songService, songKeys, batchSize, onProgress)
+
+
+def warm_songs(
+    songService: SongServiceByDB,
+    songNames: Sequence[str],
+    batchSize: int = DEFAULT_WARMUP_BATCH_SIZE,
+    onProgress: Optional[Callable[[WarmupProgress], None]] = None,
+) -> WarmupProgress:
+    start = time.perf_counter()
+    fetched = 0
+    failed: dict[str, str] = {}
+    progress = WarmupProgress(0, len(songNames), 0, 0)
+    for i in range(0, len(songNames), batchSize):
+        batch = songNames[i : i + batchSize]
+        batchFetched, batchFailed = songService.cache_songs(batch)
+        fetched += batchFetched
+        failed.update(
+            (songName, f"{type(e).__name__}: {e}")
+            for songName, e in batchFailed.items()
+        )
+
+        progress = WarmupProgress(
+            done=i + len(batch),
+            total=len(songNames),
+            fetched=fetched,
+            elapsed=time.perf_counter() - start,
+            failed=dict(failed),
+        )
+        if onProgress is not None:
+            onProgress(progress)
+
+    return progress
+
+
+def format_progress(progress: WarmupProgress) -> str:
+    failed = f", {len(progress.failed)} failed" if progress.failed else ""
+    return (
+        f"{progress.done}/{progress.total} songs ({progress.fetched} fetched{failed})"
+        f" in {progress.elapsed:.1f}s, {progress.songsPerSecond:.1f} songs/s"
+    )
+
+
+def format_failures(progress: WarmupProgress) -> Sequence[str]:
+    return [f"{songName}: {error}" for songName, error in progress.failed.items()]
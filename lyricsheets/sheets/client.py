@@ -1,15 +1,10 @@
 from collections.abc import Mapping, Sequence
 from enum import Enum
-from http import HTTPStatus
 from typing import Any
 
-from apiclient import discovery
-from backoff import on_exception, expo
-from google.oauth2 import service_account
-from googleapiclient.errors import HttpError
 from token_bucket import MemoryStorage
 
-from .decorator import token_bucket
+from .decorator import retry_on_rate_limit, token_bucket
 from .limiter import BurstLimiter
 
 
@@ -21,6 +16,9 @@ class GoogleSheetsClient:
         USER_ENTERED = "USER_ENTERED"
 
     def __init__(self, googleCredentials: Mapping[str, str]) -> None:
+        from apiclient import discovery
+        from google.oauth2 import service_account
+
         self.service = discovery.build(
             "sheets",
             "v4",
@@ -29,13 +27,7 @@ class GoogleSheetsClient:
             ),
         ).spreadsheets()
 
-    @on_exception(
-        expo,
-        exception=HttpError,
-        giveup=lambda e: not isinstance(e, HttpError)
-        or e.status_code != HTTPStatus.TOO_MANY_REQUESTS,
-        max_tries=10,
-    )
+    @retry_on_rate_limit
     def get_values(self, spreadsheetId: str, range: str = ""):
         return (
             self.service.values()
@@ -43,25 +35,13 @@ class GoogleSheetsClient:
             .execute()["values"]
         )
 
-    @on_exception(
-        expo,
-        exception=HttpError,
-        giveup=lambda e: not isinstance(e, HttpError)
-        or e.status_code != HTTPStatus.TOO_MANY_REQUESTS,
-        max_tries=10,
-    )
+    @retry_on_rate_limit
     def get(self, spreadsheetId: str, ranges: Sequence[str] = [], fields: str = ""):
         return self.service.get(
             spreadsheetId=spreadsheetId, ranges=ranges, fields=fields
         ).execute()
 
-    @on_exception(
-        expo,
-        exception=HttpError,
-        giveup=lambda e: not isinstance(e, HttpError)
-        or e.status_code != HTTPStatus.TOO_MANY_REQUESTS,
-        max_tries=10,
-    )
+    @retry_on_rate_limit
     def append_values(
         self,
         spreadsheetId: str,
@@ -78,13 +58,7 @@ class GoogleSheetsClient:
             valueInputOption=valueInputOption.name,
         ).execute()
 
-    @on_exception(
-        expo,
-        exception=HttpError,
-        giveup=lambda e: not isinstance(e, HttpError)
-        or e.status_code != HTTPStatus.TOO_MANY_REQUESTS,
-        max_tries=10,
-    )
+    @retry_on_rate_limit
     def batch_update(self, spreadsheetId: str, requests: Sequence[Mapping[str, Any]]):
         self.service.batchUpdate(
             spreadsheetId=spreadsheetId, body={"requests": requests}
@@ -134,6 +108,10 @@ class GoogleSheetsClient:
     def is_white(self, color: Mapping[str, int]) -> bool:
         return self.color_to_hex(color).upper() == "FFFFFF"
 
+    # Later requests open new connections
+    def close(self):
+        self.service.close()
+
 
 class RateLimitedGoogleSheetsClient(GoogleSheetsClient):
     def __init__(self, googleCredentials: Mapping[str, str]) -> None:
@@ -1,9 +1,13 @@
 from abc import ABC, abstractmethod
+from http import HTTPStatus
 from typing import Protocol
+import functools
 
 
 from backoff import on_exception, expo
 
+MAX_RATE_LIMITED_TRIES = 10
+
 
 class TokenBucket(ABC):
     @abstractmethod
@@ -29,3 +33,28 @@ def token_bucket(key: str, num_tokens: int):
         return wrapper
 
     return _token_bucket
+
+
+# Retries requests which Google Sheets rejected for exceeding the rate limit.
+# The Google API client is only imported once a request is made, since it
+# takes longer to import than everything else a script needs
+def retry_on_rate_limit(f):
+    retrying = None
+
+    @functools.wraps(f)
+    def wrapper(*args, **kwargs):
+        nonlocal retrying
+        if retrying is None:
+            from googleapiclient.errors import HttpError
+
+            retrying = on_exception(
+                expo,
+                exception=HttpError,
+                giveup=lambda e: not isinstance(e, HttpError)
+                or e.status_code != HTTPStatus.TOO_MANY_REQUESTS,
+                max_tries=MAX_RATE_LIMITED_TRIES,
+            )(f)
+
+        return retrying(*args, **kwargs)
+
+    return wrapper
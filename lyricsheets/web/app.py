@@ -1,29 +1,335 @@
+from collections.abc import Mapping, Sequence
+from dataclasses import asdict
+from typing import Any, Optional
 import json
+import logging
+import os
+import threading
+import time
 
 from lyricsheets.service import SongServiceByDB
-from lyricsheets.cache import RedisCache
+from lyricsheets.service.payload import IDENTITY_ENCODING
+from lyricsheets.service.service import NotFoundError
+from lyricsheets.cache import RedisCache, TieredCache, get_cache_stats
+from lyricsheets.fonts import DEFAULT_FONT_BACKEND
+from lyricsheets.web.batch import (
+    NDJSON_CONTENT_TYPE,
+    get_batch,
+    parse_titles,
+    to_json_array,
+    to_ndjson,
+)
+from lyricsheets.web.config import create_l1_cache, create_song_server, load_config
+from lyricsheets.web.http import (
+    DEFAULT_MAX_BATCH_BODY_SIZE,
+    DEFAULT_MAX_BATCH_SIZE,
+    choose_encoding,
+    to_cache_control,
+    to_representation_etag,
+    wants_ndjson,
+)
+from lyricsheets.web.popularity import RequestCounter
+from lyricsheets.web.render import (
+    DEFAULT_RENDER_EFFECT,
+    DEFAULT_RENDER_WORKERS,
+    InvalidRenderError,
+    SongRenderer,
+)
+from lyricsheets.web.startup import DEFAULT_RETRY_AFTER, NotReadyError, Startup
+from lyricsheets.web.prefetch import (
+    DEFAULT_PREFETCH_INTERVAL,
+    HotSongPrefetcher,
+    create_prefetcher,
+)
+from lyricsheets.web.warmup import to_warmup_result, warm_cache_with_lock
+from lyricsheets.web import prefork
 
-from flask import Flask
+from flask import Flask, request
 from flask.wrappers import Response
 
+EVENTS_CONTENT_TYPE = "text/plain; charset=utf-8"
+DEFAULT_PRELOAD_TIMEOUT = 30
 
-config_file_path = "./config.json"
+# Answered while the song index is still being built
+ALWAYS_SERVED_ENDPOINTS = {
+    "get_healthz_handler",
+    "get_readyz_handler",
+    "get_workers_handler",
+    "get_metrics_handler",
+}
 
-with open(config_file_path) as f:
-    cfg = json.load(f)
-    redis_cfg = cfg["redis"]
 
-songServer = SongServiceByDB(
-    cfg["google_credentials"],
-    cfg["spreadsheet_id"],
-    cfg["default"],
-    RedisCache(redis_cfg["host"], redis_cfg["port"], redis_cfg["db"]),
-)
-app = Flask(__name__)
+def create_app(
+    cfg: Mapping[str, Any],
+    songServer: Optional[SongServiceByDB] = None,
+    cache: Optional[RedisCache] = None,
+    shouldStartBackgroundTasks: bool = True,
+) -> Flask:
+    if cache is None:
+        cache = RedisCache.from_config(cfg["redis"])
+
+    l1 = create_l1_cache(cfg)
+    songCache = TieredCache(l1, cache) if l1 is not None else cache
+
+    requestCounter = RequestCounter(cache.cache)
+    cacheControl = to_cache_control(cfg.get("cache_control", {}))
+    maxBatchSize = cfg.get("max_batch_size", DEFAULT_MAX_BATCH_SIZE)
+    maxBatchBodySize = cfg.get("max_batch_body_size", DEFAULT_MAX_BATCH_BODY_SIZE)
+
+    app = Flask(__name__)
+    app.logger.setLevel(logging.INFO)
+
+    # Listing the songs goes to Sheets, so it happens after the server is up
+    startup = Startup(app.logger, cfg.get("retry_after", DEFAULT_RETRY_AFTER))
+    renderer: Optional[SongRenderer] = None
+    prefetcher: Optional[HotSongPrefetcher] = None
+    prefetchCfg = cfg.get("prefetch")
+
+    def load_song_index() -> Mapping[str, Any]:
+        nonlocal songServer, renderer, prefetcher
+        if songServer is None:
+            songServer = create_song_server(cfg, songCache)
+        renderer = SongRenderer(
+            songServer,
+            songCache,
+            numWorkers=cfg.get("render_workers", DEFAULT_RENDER_WORKERS),
+            fontBackend=cfg.get("font_backend", DEFAULT_FONT_BACKEND),
+            fontWorkers=cfg.get("font_workers", 0),
+        )
+        if prefetchCfg is not None:
+            prefetcher = create_prefetcher(prefetchCfg, songServer, requestCounter, l1)
+
+        return {"songs": len(songServer.songMappings)}
+
+    startup.add_step("song_index", load_song_index)
+
+    # The hot songs are pinned before the first song request is served,
+    # and before forking when the master builds the song index
+    if prefetchCfg is not None:
+        startup.add_step("prefetch", lambda: asdict(prefetcher.prefetch()))
+
+    if cfg.get("warmup_on_startup", False):
+        startup.add_step(
+            "warmup",
+            lambda: to_warmup_result(
+                warm_cache_with_lock(songServer, cache, requestCounter, app.logger)
+            ),
+            isRequired=False,
+        )
+
+    def refresh_hot_songs():
+        startup.wait()
+        prefetcher.run_periodically(
+            prefetchCfg.get("interval", DEFAULT_PREFETCH_INTERVAL), app.logger
+        )
+
+    def start_background_tasks():
+        startup.start()
+        if prefetchCfg is not None:
+            threading.Thread(target=refresh_hot_songs, daemon=True).start()
+
+    # A preloading master runs the startup steps once for all workers, unless
+    # Sheets fails or is too slow, in which case the workers finish them
+    def run_startup_before_forking(timeout: float):
+        if not prefork.can_limit_time():
+            return
+
+        try:
+            with prefork.time_limit(timeout):
+                startup.run_until_ready()
+        except Exception:
+            app.logger.exception(
+                "Startup failed before forking, the workers will retry it"
+            )
+
+        # The workers must not share the master's connections to Sheets
+        if songServer is not None:
+            songServer.close()
+
+    # Threads don't survive a fork, so preforking servers start these in each worker
+    app.extensions["lyricsheets"] = {
+        "redis": cache.cache,
+        "startup": startup,
+        "run_startup_before_forking": run_startup_before_forking,
+        "start_background_tasks": start_background_tasks,
+    }
+    if shouldStartBackgroundTasks:
+        start_background_tasks()
+
+    @app.before_request
+    def check_ready_handler():
+        if request.endpoint not in ALWAYS_SERVED_ENDPOINTS:
+            startup.check_ready()
+
+    @app.errorhandler(NotReadyError)
+    def not_ready_handler(e: NotReadyError):
+        resp = json_error(str(e), 503)
+        resp.headers["Retry-After"] = str(e.retryAfter)
+        return resp
+
+    @app.errorhandler(NotFoundError)
+    def not_found_handler(e: NotFoundError):
+        return json_error(f"Song {e} not found", 404)
+
+    @app.route("/songs/<title>")
+    def get_song_handler(title: str):
+        etag = songServer.get_song_etag(title)
+        # Every spelling of a title is counted as the same song
+        requestCounter.record(songServer.to_song_key(title))
+
+        encoding = choose_encoding(
+            request.headers.get("Accept-Encoding", ""), songServer.payloadEncodings
+        )
+        etag = to_representation_etag(etag, encoding)
+
+        if request.if_none_match.contains(etag):
+            resp = Response(status=304)
+        else:
+            body = songServer.get_song_body(title, encoding)
+            resp = Response(body, content_type="application/json")
+            if encoding != IDENTITY_ENCODING:
+                resp.content_encoding = encoding
+
+        resp.set_etag(etag)
+        resp.vary.add("Accept-Encoding")
+        resp.headers["Cache-Control"] = cacheControl
 
+        return resp
 
-@app.route("/songs/<title>")
-def get_song_handler(title: str):
+    @app.errorhandler(InvalidRenderError)
+    def invalid_render_handler(e: InvalidRenderError):
+        return json_error(str(e))
+
+    @app.route("/songs/<title>/events")
+    def get_song_events_handler(title: str):
+        events = renderer.render(
+            title,
+            request.args.get("effect", DEFAULT_RENDER_EFFECT),
+            request.args.get("modifiers", ""),
+            request.args.get("title", "true").lower() != "false",
+        )
+
+        return Response(events, content_type=EVENTS_CONTENT_TYPE)
+
+    @app.route("/songs")
+    def get_songs_handler():
+        return batch_response(parse_titles(request.args.getlist("titles")))
+
+    @app.route("/songs:batch", methods=["POST"])
+    def post_songs_batch_handler():
+        # Reads at most one byte more than allowed, however long the body is
+        if (request.content_length or 0) > maxBatchBodySize:
+            return json_error("Request body is too large", 413)
+        data = request.stream.read(maxBatchBodySize + 1)
+        if len(data) > maxBatchBodySize:
+            return json_error("Request body is too large", 413)
+
+        try:
+            body = json.loads(data)
+        except ValueError:
+            body = None
+
+        titles = body.get("titles") if isinstance(body, dict) else body
+        if not isinstance(titles, list) or not all(isinstance(t, str) for t in titles):
+            return json_error('Expected a JSON body of the form {"titles": [...]}')
+
+        return batch_response(titles)
+
+    def batch_response(titles: Sequence[str]) -> Response:
+        if len(titles) > maxBatchSize:
+            return json_error(f"At most {maxBatchSize} titles can be requested")
+
+        items = get_batch(songServer, titles)
+        requestCounter.record_many(
+            [
+                songServer.to_song_key(item.title)
+                for item in items
+                if item.body is not None
+            ]
+        )
+
+        if wants_ndjson(
+            request.headers.get("Accept", ""), request.args.get("format", "")
+        ):
+            return Response(to_ndjson(items), content_type=NDJSON_CONTENT_TYPE)
+
+        return Response(to_json_array(items), content_type="application/json")
+
+    @app.route("/healthz")
+    def get_healthz_handler():
+        return Response(
+            json.dumps({"status": "ok", "pid": os.getpid()}),
+            content_type="application/json",
+        )
+
+    @app.route("/readyz")
+    def get_readyz_handler():
+        return Response(
+            json.dumps({**startup.to_dict(), "pid": os.getpid()}),
+            status=200 if startup.isReady else 503,
+            content_type="application/json",
+        )
+
+    @app.route("/hot")
+    def get_hot_handler():
+        if prefetcher is None:
+            return json_error("Prefetching is not enabled", 404)
+
+        return Response(
+            json.dumps(prefetcher.get_status()), content_type="application/json"
+        )
+
+    @app.route("/workers")
+    def get_workers_handler():
+        return Response(
+            json.dumps(prefork.to_dicts(prefork.get_worker_reports(cache.cache))),
+            content_type="application/json",
+        )
+
+    @app.route("/metrics")
+    def get_metrics_handler():
+        return Response(
+            json.dumps(
+                {
+                    keyPrefix: stats.to_dict()
+                    for keyPrefix, stats in get_cache_stats().items()
+                }
+            ),
+            content_type="application/json",
+        )
+
+    return app
+
+
+def json_error(message: str, status: int = 400) -> Response:
     return Response(
-        songServer.get_song(title).to_json(), content_type="application/json"
+        json.dumps({"error": message}), status=status, content_type="application/json"
     )
+
+
+# A preloading master builds the song index (and the L1 cache) once and the
+# workers share its pages. It gives up after preload_timeout seconds, so that
+# it starts even while Sheets or the credentials fail, and every worker then
+# runs the remaining startup steps in the background, answering 503 until done
+def create_preforked_app(isPreloaded: bool = True) -> Flask:
+    start = time.perf_counter()
+    cfg = load_config()
+    app = create_app(cfg, shouldStartBackgroundTasks=False)
+    if isPreloaded:
+        app.extensions["lyricsheets"]["run_startup_before_forking"](
+            cfg.get("preload_timeout", DEFAULT_PRELOAD_TIMEOUT)
+        )
+    prefork.record_app_build(time.perf_counter() - start)
+
+    return app
+
+
+# The app is only built from ./config.json when a server asks for it,
+# so that importing this module (e.g. for create_app) has no side effects
+def __getattr__(name: str):
+    if name == "app":
+        global app
+        app = create_app(load_config())
+        return app
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
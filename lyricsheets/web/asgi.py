@@ -0,0 +1,408 @@
+from collections.abc import Awaitable, Callable, Iterable, Mapping
+from dataclasses import asdict
+from typing import Any, Optional
+from urllib.parse import parse_qs
+import asyncio
+import json
+import logging
+import os
+import re
+import threading
+
+from werkzeug.http import parse_etags, quote_etag
+
+from lyricsheets.service import AsyncSongServiceByDB, SongServiceByDB
+from lyricsheets.service.payload import IDENTITY_ENCODING
+from lyricsheets.service.service import NotFoundError
+from lyricsheets.cache import (
+    AsyncCache,
+    AsyncRedisCache,
+    AsyncTieredCache,
+    Cache,
+    RedisCache,
+    TieredCache,
+    get_cache_stats,
+)
+from lyricsheets.fonts import DEFAULT_FONT_BACKEND
+from lyricsheets.web.batch import (
+    NDJSON_CONTENT_TYPE,
+    get_batch_async,
+    parse_titles,
+    to_json_array,
+    to_ndjson,
+)
+from lyricsheets.web.config import create_l1_cache, create_song_server, load_config
+from lyricsheets.web.http import (
+    DEFAULT_MAX_BATCH_BODY_SIZE,
+    DEFAULT_MAX_BATCH_SIZE,
+    choose_encoding,
+    to_cache_control,
+    to_representation_etag,
+    wants_ndjson,
+)
+from lyricsheets.web.popularity import AsyncRequestCounter, RequestCounter
+from lyricsheets.web.render import (
+    DEFAULT_RENDER_EFFECT,
+    DEFAULT_RENDER_WORKERS,
+    InvalidRenderError,
+    SongRenderer,
+)
+from lyricsheets.web.prefetch import (
+    DEFAULT_PREFETCH_INTERVAL,
+    HotSongPrefetcher,
+    create_prefetcher,
+)
+from lyricsheets.web.startup import DEFAULT_RETRY_AFTER, NotReadyError, Startup
+from lyricsheets.web.warmup import to_warmup_result, warm_cache_with_lock
+
+Scope = Mapping[str, Any]
+Receive = Callable[[], Awaitable[Mapping[str, Any]]]
+Send = Callable[[Mapping[str, Any]], Awaitable[None]]
+
+SONG_PATH = re.compile(r"^/songs/([^/]+)$")
+SONG_EVENTS_PATH = re.compile(r"^/songs/([^/]+)/events$")
+
+EVENTS_CONTENT_TYPE = "text/plain; charset=utf-8"
+
+logger = logging.getLogger(__name__)
+
+
+class BodyTooLargeError(Exception):
+    pass
+
+
+class Request:
+    def __init__(self, scope: Scope, receive: Receive) -> None:
+        self.method: str = scope["method"]
+        self.path: str = scope["path"]
+        self.args = parse_qs(scope["query_string"].decode())
+        self.headers: dict[str, str] = {}
+        for name, val in scope["headers"]:
+            name = name.decode().lower()
+            self.headers[name] = ", ".join(
+                filter(None, [self.headers.get(name), val.decode()])
+            )
+
+        self.receive = receive
+
+    def arg(self, name: str) -> str:
+        return self.args.get(name, [""])[0]
+
+    # Stops reading as soon as the body is known to exceed maxSize
+    async def body(self, maxSize: int) -> bytes:
+        contentLength = self.headers.get("content-length", "")
+        if contentLength.isdigit() and int(contentLength) > maxSize:
+            raise BodyTooLargeError()
+
+        body = b""
+        while True:
+            message = await self.receive()
+            body += message.get("body", b"")
+            if len(body) > maxSize:
+                raise BodyTooLargeError()
+            if not message.get("more_body", False):
+                return body
+
+
+class Response:
+    def __init__(
+        self,
+        body: bytes | Iterable[bytes] = b"",
+        status: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> None:
+        self.body = body
+        self.status = status
+        self.headers = dict(headers or {})
+
+    async def send(self, send: Send):
+        if isinstance(self.body, bytes):
+            self.headers["Content-Length"] = str(len(self.body))
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status,
+                "headers": [
+                    (name.encode(), val.encode()) for name, val in self.headers.items()
+                ],
+            }
+        )
+
+        if isinstance(self.body, bytes):
+            await send({"type": "http.response.body", "body": self.body})
+            return
+
+        # Streamed bodies are sent chunk by chunk
+        for chunk in self.body:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+
+class SongApp:
+    def __init__(
+        self,
+        cfg: Mapping[str, Any],
+        songServer: Optional[SongServiceByDB],
+        cache: RedisCache,
+        asyncCache: AsyncRedisCache,
+    ) -> None:
+        self.cfg = cfg
+        self.cache = cache
+        self.asyncCache = asyncCache
+        self.requestCounter = AsyncRequestCounter(asyncCache.cache)
+        self.cacheControl = to_cache_control(cfg.get("cache_control", {}))
+        self.maxBatchSize = cfg.get("max_batch_size", DEFAULT_MAX_BATCH_SIZE)
+        self.maxBatchBodySize = cfg.get(
+            "max_batch_body_size", DEFAULT_MAX_BATCH_BODY_SIZE
+        )
+
+        # Songs are read through the same L1 as in the Flask app
+        self.l1 = create_l1_cache(cfg)
+        self.songCache: Cache = cache
+        self.asyncSongCache: AsyncCache = asyncCache
+        if self.l1 is not None:
+            self.songCache = TieredCache(self.l1, cache)
+            self.asyncSongCache = AsyncTieredCache(self.l1, asyncCache)
+
+        self.songServer: Optional[AsyncSongServiceByDB] = None
+        self.renderer: Optional[SongRenderer] = None
+        self.prefetcher: Optional[HotSongPrefetcher] = None
+
+        # Listing the songs goes to Sheets, so it happens after the server is up
+        self.startup = Startup(logger, cfg.get("retry_after", DEFAULT_RETRY_AFTER))
+        self.startup.add_step("song_index", lambda: self._load_song_index(songServer))
+        if "prefetch" in cfg:
+            self.startup.add_step(
+                "prefetch", lambda: asdict(self.prefetcher.prefetch())
+            )
+        if cfg.get("warmup_on_startup", False):
+            self.startup.add_step(
+                "warmup",
+                lambda: to_warmup_result(
+                    warm_cache_with_lock(
+                        self.songServer.service,
+                        self.cache,
+                        RequestCounter(self.cache.cache),
+                        logger,
+                    )
+                ),
+                isRequired=False,
+            )
+
+    def _load_song_index(
+        self, songServer: Optional[SongServiceByDB]
+    ) -> Mapping[str, Any]:
+        if songServer is None:
+            songServer = create_song_server(self.cfg, self.songCache)
+
+        self.songServer = AsyncSongServiceByDB(songServer, self.asyncSongCache)
+        self.renderer = SongRenderer(
+            songServer,
+            self.songCache,
+            numWorkers=self.cfg.get("render_workers", DEFAULT_RENDER_WORKERS),
+            fontBackend=self.cfg.get("font_backend", DEFAULT_FONT_BACKEND),
+            fontWorkers=self.cfg.get("font_workers", 0),
+        )
+        if "prefetch" in self.cfg:
+            self.prefetcher = create_prefetcher(
+                self.cfg["prefetch"],
+                songServer,
+                RequestCounter(self.cache.cache),
+                self.l1,
+            )
+
+        return {"songs": len(songServer.songMappings)}
+
+    def _refresh_hot_songs(self):
+        self.startup.wait()
+        self.prefetcher.run_periodically(
+            self.cfg["prefetch"].get("interval", DEFAULT_PREFETCH_INTERVAL), logger
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+
+        request = Request(scope, receive)
+        try:
+            resp = await self._route(request)
+        except NotReadyError as e:
+            resp = json_error(str(e), 503)
+            resp.headers["Retry-After"] = str(e.retryAfter)
+        except NotFoundError as e:
+            resp = json_error(f"Song {e} not found", 404)
+        except InvalidRenderError as e:
+            resp = json_error(str(e))
+        except BodyTooLargeError:
+            resp = json_error("Request body is too large", 413)
+        except Exception:
+            logger.exception("Failed to handle %s %s", request.method, request.path)
+            resp = json_error("Internal server error", 500)
+
+        await resp.send(send)
+
+    async def _lifespan(self, receive: Receive, send: Send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.startup.start()
+                if "prefetch" in self.cfg:
+                    threading.Thread(
+                        target=self._refresh_hot_songs, daemon=True
+                    ).start()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.asyncCache.close()
+                if self.renderer is not None:
+                    self.renderer.executor.shutdown(wait=False, cancel_futures=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _route(self, request: Request) -> Response:
+        match (request.method, request.path):
+            case ("GET", "/metrics"):
+                return self._metrics()
+            case ("GET", "/healthz"):
+                return json_response({"status": "ok", "pid": os.getpid()})
+            case ("GET", "/readyz"):
+                return json_response(
+                    {**self.startup.to_dict(), "pid": os.getpid()},
+                    200 if self.startup.isReady else 503,
+                )
+
+        # Everything else needs the song index
+        self.startup.check_ready()
+
+        match (request.method, request.path):
+            case ("GET", "/songs"):
+                return await self._batch_response(
+                    request, parse_titles(request.args.get("titles", []))
+                )
+            case ("POST", "/songs:batch"):
+                return await self._post_songs_batch(request)
+            case ("GET", "/hot"):
+                return await self._get_hot()
+
+        match = SONG_PATH.match(request.path)
+        if match is not None and request.method == "GET":
+            return await self._get_song(request, match.group(1))
+
+        match = SONG_EVENTS_PATH.match(request.path)
+        if match is not None and request.method == "GET":
+            return await self._get_song_events(request, match.group(1))
+
+        return json_error("Not found", 404)
+
+    async def _get_song(self, request: Request, title: str) -> Response:
+        etag = await self.songServer.get_song_etag(title)
+        await self.requestCounter.record_many([self.songServer.to_song_key(title)])
+
+        encoding = choose_encoding(
+            request.headers.get("accept-encoding", ""),
+            self.songServer.payloadEncodings,
+        )
+        etag = to_representation_etag(etag, encoding)
+        headers = {
+            "ETag": quote_etag(etag),
+            "Vary": "Accept-Encoding",
+            "Cache-Control": self.cacheControl,
+        }
+
+        if parse_etags(request.headers.get("if-none-match")).contains(etag):
+            return Response(status=304, headers=headers)
+
+        body = await self.songServer.get_song_body(title, encoding)
+        headers["Content-Type"] = "application/json"
+        if encoding != IDENTITY_ENCODING:
+            headers["Content-Encoding"] = encoding
+
+        return Response(body, headers=headers)
+
+    async def _get_song_events(self, request: Request, title: str) -> Response:
+        events = await self.renderer.render_async(
+            self.asyncSongCache,
+            title,
+            request.arg("effect") or DEFAULT_RENDER_EFFECT,
+            request.arg("modifiers"),
+            request.arg("title").lower() != "false",
+        )
+
+        return Response(events.encode(), headers={"Content-Type": EVENTS_CONTENT_TYPE})
+
+    async def _post_songs_batch(self, request: Request) -> Response:
+        try:
+            body = json.loads(await request.body(self.maxBatchBodySize))
+        except ValueError:
+            body = None
+
+        titles = body.get("titles") if isinstance(body, dict) else body
+        if not isinstance(titles, list) or not all(isinstance(t, str) for t in titles):
+            return json_error('Expected a JSON body of the form {"titles": [...]}')
+
+        return await self._batch_response(request, titles)
+
+    async def _batch_response(self, request: Request, titles: list[str]) -> Response:
+        if len(titles) > self.maxBatchSize:
+            return json_error(f"At most {self.maxBatchSize} titles can be requested")
+
+        items = await get_batch_async(self.songServer, titles)
+        await self.requestCounter.record_many(
+            [
+                self.songServer.to_song_key(item.title)
+                for item in items
+                if item.body is not None
+            ]
+        )
+
+        if wants_ndjson(request.headers.get("accept", ""), request.arg("format")):
+            return Response(
+                to_ndjson(items), headers={"Content-Type": NDJSON_CONTENT_TYPE}
+            )
+
+        return Response(
+            to_json_array(items), headers={"Content-Type": "application/json"}
+        )
+
+    async def _get_hot(self) -> Response:
+        if self.prefetcher is None:
+            return json_error("Prefetching is not enabled", 404)
+
+        return json_response(await asyncio.to_thread(self.prefetcher.get_status))
+
+    def _metrics(self) -> Response:
+        return json_response(
+            {
+                keyPrefix: stats.to_dict()
+                for keyPrefix, stats in get_cache_stats().items()
+            }
+        )
+
+
+def json_response(body: Any, status: int = 200) -> Response:
+    return Response(
+        json.dumps(body).encode(),
+        status=status,
+        headers={"Content-Type": "application/json"},
+    )
+
+
+def json_error(message: str, status: int = 400) -> Response:
+    return json_response({"error": message}, status)
+
+
+def create_app(
+    cfg: Optional[Mapping[str, Any]] = None,
+    songServer: Optional[SongServiceByDB] = None,
+    cache: Optional[RedisCache] = None,
+    asyncCache: Optional[AsyncRedisCache] = None,
+) -> SongApp:
+    if cfg is None:
+        cfg = load_config()
+    if cache is None:
+        cache = RedisCache.from_config(cfg["redis"])
+    if asyncCache is None:
+        asyncCache = AsyncRedisCache.from_config(cfg["redis"])
+
+    return SongApp(cfg, songServer, cache, asyncCache)
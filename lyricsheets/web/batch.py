@@ -0,0 +1,102 @@
+from collections.abc import Iterator, Sequence
+from dataclasses import dataclass
+from typing import Optional, Union
+import json
+import logging
+
+from lyricsheets.service import AsyncSongServiceByDB, SongServiceByDB
+
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchItem:
+    title: str
+    body: Optional[bytes] = None
+    status: int = 200
+    error: str = ""
+
+    def to_json(self) -> bytes:
+        title = json.dumps(self.title).encode()
+        if self.body is not None:
+            # The cached JSON is spliced in as-is instead of being parsed again
+            return b'{"title": ' + title + b', "song": ' + self.body + b"}"
+
+        return json.dumps(
+            {
+                "title": self.title,
+                "error": {"status": self.status, "message": self.error},
+            }
+        ).encode()
+
+
+def parse_titles(titles: Sequence[str]) -> list[str]:
+    return [title for titles in titles for title in titles.split(",") if title]
+
+
+def get_batch(songService: SongServiceByDB, titles: Sequence[str]) -> list[BatchItem]:
+    items, found = _find_songs(songService, titles)
+
+    # One cache lookup for every song, misses are fetched from Sheets together
+    try:
+        bodies = songService.get_song_bodies([item.title for item in found])
+    except Exception as e:
+        bodies = [e] * len(found)
+    _set_bodies(found, bodies)
+
+    return items
+
+
+async def get_batch_async(
+    songService: AsyncSongServiceByDB, titles: Sequence[str]
+) -> list[BatchItem]:
+    items, found = _find_songs(songService, titles)
+
+    try:
+        bodies = await songService.get_song_bodies([item.title for item in found])
+    except Exception as e:
+        bodies = [e] * len(found)
+    _set_bodies(found, bodies)
+
+    return items
+
+
+def _find_songs(
+    songService: Union[SongServiceByDB, AsyncSongServiceByDB], titles: Sequence[str]
+) -> tuple[list[BatchItem], list[BatchItem]]:
+    items = [BatchItem(title) for title in titles]
+
+    found = []
+    for item in items:
+        if songService.has_song(item.title):
+            found.append(item)
+        else:
+            item.status, item.error = 404, f"Song {item.title} not found"
+
+    return items, found
+
+
+# Songs which failed are reported without the error, which may reveal internals
+def _set_bodies(items: Sequence[BatchItem], bodies: Sequence[Union[bytes, Exception]]):
+    for item, body in zip(items, bodies):
+        if isinstance(body, Exception):
+            logger.error("Failed to fetch song %s", item.title, exc_info=body)
+            item.status, item.error = 502, "Failed to fetch song"
+        else:
+            item.body = body
+
+
+def to_json_array(items: Sequence[BatchItem]) -> Iterator[bytes]:
+    yield b"["
+    for i, item in enumerate(items):
+        if i:
+            yield b", "
+        yield item.to_json()
+    yield b"]"
+
+
+def to_ndjson(items: Sequence[BatchItem]) -> Iterator[bytes]:
+    for item in items:
+        yield item.to_json() + b"\n"
@@ -0,0 +1,33 @@
+from collections.abc import Mapping
+from typing import Any, Optional
+import json
+
+from lyricsheets.cache import Cache, LRUMemoryCache
+from lyricsheets.service import SongServiceByDB
+
+CONFIG_FILE_PATH = "./config.json"
+DEFAULT_L1_MAX_SIZE = 64 * 1024 * 1024
+
+
+def load_config(path: str = CONFIG_FILE_PATH) -> Mapping[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def create_song_server(cfg: Mapping[str, Any], cache: Cache) -> SongServiceByDB:
+    return SongServiceByDB(
+        cfg["google_credentials"],
+        cfg["spreadsheet_id"],
+        cfg["default"],
+        cache,
+        payloadEncodings=cfg.get("precompress", []),
+    )
+
+
+# Entries with generations never change, so every worker can keep its own copy
+def create_l1_cache(cfg: Mapping[str, Any]) -> Optional[LRUMemoryCache]:
+    l1Cfg = cfg.get("l1_cache")
+    if l1Cfg is None:
+        return None
+
+    return LRUMemoryCache(l1Cfg.get("max_size", DEFAULT_L1_MAX_SIZE))
@@ -0,0 +1,48 @@
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header
+
+from lyricsheets.service.payload import IDENTITY_ENCODING
+
+from .batch import NDJSON_CONTENT_TYPE
+
+DEFAULT_MAX_AGE = 60
+DEFAULT_MAX_BATCH_SIZE = 100
+# Far more than the titles of a full batch take
+DEFAULT_MAX_BATCH_BODY_SIZE = 64 * 1024
+
+
+def choose_encoding(acceptEncoding: str, available: Iterable[str]) -> str:
+    return parse_accept_header(acceptEncoding).best_match(
+        [*available, IDENTITY_ENCODING], default=IDENTITY_ENCODING
+    )
+
+
+def to_representation_etag(etag: str, encoding: str) -> str:
+    # Every encoding is a different representation, so it gets its own strong ETag
+    if encoding != IDENTITY_ENCODING:
+        return f"{etag}-{encoding}"
+
+    return etag
+
+
+def wants_ndjson(accept: str, format: str = "") -> bool:
+    return (
+        format == "ndjson"
+        or parse_accept_header(accept, MIMEAccept).best_match(
+            ["application/json", NDJSON_CONTENT_TYPE]
+        )
+        == NDJSON_CONTENT_TYPE
+    )
+
+
+def to_cache_control(cfg: Mapping[str, Any]) -> str:
+    directives = [f"max-age={cfg.get('max_age', DEFAULT_MAX_AGE)}"]
+    if cfg.get("public", True):
+        directives.append("public")
+    if cfg.get("must_revalidate", False):
+        directives.append("must-revalidate")
+
+    return ", ".join(directives)
@@ -0,0 +1,87 @@
+from collections.abc import Sequence
+from typing import Optional
+import time
+
+from redis import Redis, WatchError
+from redis.asyncio import Redis as AsyncRedis
+
+REQUEST_COUNTS_KEY = "Web::request_counts"
+
+# Titles whose decayed count drops below this are forgotten
+MIN_REQUEST_COUNT = 0.01
+
+
+class RequestCounter:
+    def __init__(self, redis: Redis, key: str = REQUEST_COUNTS_KEY) -> None:
+        self.redis = redis
+        self.key = key
+
+    def record(self, title: str):
+        self.redis.zincrby(self.key, 1, title)
+
+    def record_many(self, titles: Sequence[str]):
+        if not titles:
+            return
+
+        pipeline = self.redis.pipeline(transaction=False)
+        for title in titles:
+            pipeline.zincrby(self.key, 1, title)
+        pipeline.execute()
+
+    def top(self, n: int = -1) -> Sequence[str]:
+        return [
+            title.decode()
+            for title in self.redis.zrevrange(self.key, 0, n - 1 if n > 0 else -1)
+        ]
+
+    def top_with_counts(self, n: int = -1) -> Sequence[tuple[str, float]]:
+        return [
+            (title.decode(), count)
+            for title, count in self.redis.zrevrange(
+                self.key, 0, n - 1 if n > 0 else -1, withscores=True
+            )
+        ]
+
+    def total(self) -> float:
+        return sum(
+            count for _, count in self.redis.zrange(self.key, 0, -1, withscores=True)
+        )
+
+    # Halves every count once per half life, so the hot list follows what is requested now
+    def decay(self, halfLife: float, now: Optional[float] = None) -> bool:
+        if now is None:
+            now = time.time()
+
+        decayedAtKey = f"{self.key}:decayed_at"
+        with self.redis.pipeline() as pipeline:
+            try:
+                pipeline.watch(decayedAtKey)
+                decayedAt = pipeline.get(decayedAtKey)
+
+                pipeline.multi()
+                if decayedAt is not None:
+                    factor = 0.5 ** ((now - float(decayedAt)) / halfLife)
+                    pipeline.zunionstore(self.key, {self.key: factor})
+                    pipeline.zremrangebyscore(self.key, 0, MIN_REQUEST_COUNT)
+                pipeline.set(decayedAtKey, now)
+                pipeline.execute()
+            except WatchError:
+                # Another worker decayed the counts at the same time
+                return False
+
+        return decayedAt is not None
+
+
+class AsyncRequestCounter:
+    def __init__(self, redis: AsyncRedis, key: str = REQUEST_COUNTS_KEY) -> None:
+        self.redis = redis
+        self.key = key
+
+    async def record_many(self, titles: Sequence[str]):
+        if not titles:
+            return
+
+        pipeline = self.redis.pipeline(transaction=False)
+        for title in titles:
+            pipeline.zincrby(self.key, 1, title)
+        await pipeline.execute()
@@ -0,0 +1,132 @@
+from collections.abc import Mapping, Sequence
+from dataclasses import asdict, dataclass
+from logging import Logger
+from typing import Any, Optional
+import time
+
+from lyricsheets.cache import LRUMemoryCache
+from lyricsheets.service import SongServiceByDB, warm_songs
+from lyricsheets.service.warmup import DEFAULT_WARMUP_BATCH_SIZE
+
+from .popularity import RequestCounter
+
+DEFAULT_PREFETCH_TOP = 200
+DEFAULT_PREFETCH_INTERVAL = 5 * 60
+DEFAULT_HALF_LIFE = 24 * 60 * 60
+
+
+@dataclass
+class PrefetchReport:
+    songs: int
+    # Songs which were not cached and had to be fetched from Sheets
+    fetched: int
+    # The error of every song which could not be fetched, by title
+    failed: Mapping[str, str]
+    pinnedKeys: int
+    seconds: float
+    finishedAt: float
+
+
+# Keeps the most requested songs cached. Songs are fetched in batches through
+# the service, so misses go through the rate limited Sheets client like any other
+class HotSongPrefetcher:
+    def __init__(
+        self,
+        songService: SongServiceByDB,
+        requestCounter: RequestCounter,
+        l1: Optional[LRUMemoryCache] = None,
+        n: int = DEFAULT_PREFETCH_TOP,
+        halfLife: float = DEFAULT_HALF_LIFE,
+        batchSize: int = DEFAULT_WARMUP_BATCH_SIZE,
+    ) -> None:
+        self.songService = songService
+        self.requestCounter = requestCounter
+        self.l1 = l1
+        self.n = n
+        self.halfLife = halfLife
+        self.batchSize = batchSize
+        self.lastReport: Optional[PrefetchReport] = None
+
+    def get_hot_songs(self) -> Sequence[tuple[str, float]]:
+        return [
+            (title, count)
+            for title, count in self.requestCounter.top_with_counts(self.n)
+            if self.songService.has_song(title)
+        ]
+
+    def prefetch(self) -> PrefetchReport:
+        self.requestCounter.decay(self.halfLife)
+        songNames = [title for title, _ in self.get_hot_songs()]
+
+        # Reading the entries also keeps them recently used in Redis,
+        # so that they are the last to be evicted from it
+        progress = warm_songs(self.songService, songNames, self.batchSize)
+
+        pinnedKeys = []
+        if self.l1 is not None:
+            pinnedKeys = self.songService.get_song_cache_keys(songNames)
+            self.l1.pin(pinnedKeys)
+
+        self.lastReport = PrefetchReport(
+            songs=len(songNames),
+            fetched=progress.fetched,
+            failed=progress.failed,
+            pinnedKeys=len(pinnedKeys),
+            seconds=progress.elapsed,
+            finishedAt=time.time(),
+        )
+        return self.lastReport
+
+    def run_periodically(self, interval: float, logger: Logger):
+        while True:
+            time.sleep(interval)
+            try:
+                report = self.prefetch()
+                logger.info(
+                    "Prefetched %d hot songs (%d fetched) in %.1fs",
+                    report.songs,
+                    report.fetched,
+                    report.seconds,
+                )
+                for songName, error in report.failed.items():
+                    logger.warning("Failed to prefetch %s: %s", songName, error)
+            except Exception:
+                logger.exception("Failed to prefetch hot songs")
+
+    def get_status(self) -> Mapping[str, Any]:
+        hotSongs = self.get_hot_songs()
+        total = self.requestCounter.total()
+
+        status = {
+            "songs": [{"title": title, "count": count} for title, count in hotSongs],
+            # The share of recent requests which were for the hot songs
+            "coverage": sum(count for _, count in hotSongs) / total if total else 0,
+            "lastPrefetch": asdict(self.lastReport) if self.lastReport else None,
+        }
+        if self.l1 is not None:
+            status["l1"] = {
+                "size": self.l1.size,
+                "maxSize": self.l1.maxSize,
+                "pinnedSize": self.l1.get_pinned_size(),
+                "hits": self.l1.hits,
+                "misses": self.l1.misses,
+                "pinnedHits": self.l1.pinnedHits,
+            }
+
+        return status
+
+
+def create_prefetcher(
+    cfg: Mapping[str, Any],
+    songService: SongServiceByDB,
+    requestCounter: RequestCounter,
+    l1: Optional[LRUMemoryCache] = None,
+) -> HotSongPrefetcher:
+    return HotSongPrefetcher(
+        songService,
+        requestCounter,
+        l1,
+        n=cfg.get("top", DEFAULT_PREFETCH_TOP),
+        halfLife=cfg.get("half_life", DEFAULT_HALF_LIFE),
+        batchSize=cfg.get("batch_size", DEFAULT_WARMUP_BATCH_SIZE),
+    )
@@ -0,0 +1,152 @@
+from collections.abc import Iterator, Mapping, Sequence
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Optional
+import gc
+import json
+import os
+import signal
+import socket
+import threading
+import time
+
+from redis import Redis
+
+WORKERS_KEY_PREFIX = "Web::workers"
+
+
+@dataclass
+class MemoryUsage:
+    rss: int
+    # Pages still shared with the master (and the other workers) after forking
+    shared: int
+    private: int
+
+
+@dataclass
+class WorkerReport:
+    pid: int
+    # Time from fork until the worker could serve requests
+    bootTime: float
+    # Time spent building the app, and whether the master built it before forking
+    appBuildTime: float
+    isPreloaded: bool
+    startedAt: float
+    memory: Optional[MemoryUsage] = None
+
+
+_appBuild: Optional[tuple[int, float]] = None
+_bootStart: Optional[float] = None
+
+
+def record_app_build(seconds: float):
+    global _appBuild
+    _appBuild = (os.getpid(), seconds)
+
+
+def freeze():
+    # Objects built before forking are moved out of the collector's reach,
+    # so collections in the workers don't write to their pages and unshare them
+    gc.collect()
+    gc.freeze()
+
+
+# The time limit interrupts the master with SIGALRM, which only its main thread receives
+def can_limit_time() -> bool:
+    return (
+        hasattr(signal, "setitimer")
+        and threading.current_thread() is threading.main_thread()
+    )
+
+
+@contextmanager
+def time_limit(seconds: float) -> Iterator[None]:
+    def raise_timeout(signum, frame):
+        raise TimeoutError(f"Did not finish within {seconds}s")
+
+    previousHandler = signal.signal(signal.SIGALRM, raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previousHandler)
+
+
+def start_boot():
+    global _bootStart
+    _bootStart = time.perf_counter()
+
+
+def finish_boot(redis: Redis):
+    if _bootStart is None or _appBuild is None:
+        return
+
+    builtBy, appBuildTime = _appBuild
+    redis.hset(
+        _to_workers_key(),
+        str(os.getpid()),
+        json.dumps(
+            {
+                "bootTime": time.perf_counter() - _bootStart,
+                "appBuildTime": appBuildTime,
+                "isPreloaded": builtBy != os.getpid(),
+                "startedAt": time.time(),
+            }
+        ),
+    )
+
+
+def get_memory_usage(pid: int) -> Optional[MemoryUsage]:
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            fields = {
+                name: int(val.split()[0]) * 1024
+                for name, _, val in (line.partition(":") for line in f)
+                if val.strip().endswith("kB")
+            }
+    except OSError:
+        return None
+
+    return MemoryUsage(
+        rss=fields["Rss"],
+        shared=fields["Shared_Clean"] + fields["Shared_Dirty"],
+        private=fields["Private_Clean"] + fields["Private_Dirty"],
+    )
+
+
+def get_worker_reports(redis: Redis) -> Sequence[WorkerReport]:
+    workersKey = _to_workers_key()
+
+    reports = []
+    for pid, info in redis.hgetall(workersKey).items():
+        pid = int(pid)
+        if not _is_alive(pid):
+            redis.hdel(workersKey, pid)
+            continue
+
+        reports.append(
+            WorkerReport(pid, **json.loads(info), memory=get_memory_usage(pid))
+        )
+
+    return sorted(reports, key=lambda report: report.pid)
+
+
+def to_dicts(reports: Sequence[WorkerReport]) -> list[Mapping[str, Any]]:
+    return [asdict(report) for report in reports]
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+
+    return True
+
+
+# Workers are registered per host since their memory is read from /proc
+def _to_workers_key() -> str:
+    return f"{WORKERS_KEY_PREFIX}:{socket.gethostname()}"
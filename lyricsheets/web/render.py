@@ -0,0 +1,212 @@
+from collections.abc import Mapping, Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+import asyncio
+
+from lyricsheets.cache import AsyncCache, Cache, with_cache
+from lyricsheets.fonts import DEFAULT_FONT_BACKEND
+from lyricsheets.models import Modifier, Modifiers, Song
+from lyricsheets.service import SongServiceByDB
+
+DEFAULT_RENDER_EFFECT = "default_live_karaoke_effect"
+DEFAULT_RENDER_WORKERS = 2
+
+# These change which code runs, so they are never accepted from a request
+FORBIDDEN_MODIFIERS = {"import", "kfx"}
+
+
+class InvalidRenderError(Exception):
+    pass
+
+
+def normalize_modifiers(modifiersStr: str) -> str:
+    try:
+        modifiers = Modifiers.parse(modifiersStr.strip())
+    except (IndexError, ValueError) as e:
+        raise InvalidRenderError(f"Invalid modifiers {modifiersStr!r}") from e
+
+    for modifier in modifiers:
+        if modifier.operation in FORBIDDEN_MODIFIERS:
+            raise InvalidRenderError(f"Modifier {modifier.operation} is not allowed")
+
+    # Equivalent spellings of the same modifiers share one cache entry
+    return ";".join(
+        ",".join(
+            [
+                modifier.operation,
+                _to_line_range(modifier),
+                *map(str.strip, modifier.rest),
+            ]
+        )
+        for modifier in modifiers
+    )
+
+
+def _to_line_range(modifier: Modifier) -> str:
+    if modifier.end is None:
+        return "-" if modifier.start == 0 else f"{modifier.start + 1}-"
+    if modifier.end == modifier.start + 1:
+        return str(modifier.start + 1)
+
+    return f"{modifier.start + 1}-{modifier.end}"
+
+
+def render_events(
+    song: Song,
+    actorToStyle: Mapping[str, str],
+    effectName: str,
+    modifiersStr: str,
+    shouldPrintTitle: bool,
+    fontBackend: str = DEFAULT_FONT_BACKEND,
+    fontWorkers: int = 0,
+) -> str:
+    # Imported here so that only the render workers load the fonts and effects
+    import pyass
+
+    import lyricsheets.effect as _
+    from lyricsheets.ass import retrieve_effect
+    from lyricsheets.fonts import set_font_backend, set_font_workers
+
+    set_font_backend(fontBackend)
+    set_font_workers(fontWorkers)
+
+    try:
+        effect = retrieve_effect(effectName)
+    except KeyError as e:
+        raise InvalidRenderError(f"Unknown effect {effectName}") from e
+
+    modifiers = Modifiers.parse(modifiersStr)
+
+    # An empty title modifier flips whether the title is shown, like in populate_songs.py
+    shouldPrintTitle ^= any(
+        modifier.operation == "title" and (not modifier.rest or modifier.rest[0] == "")
+        for modifier in modifiers
+    )
+
+    # Modifiers can parse and still refer to lines or syllables the song does not have
+    try:
+        song = song.modify(modifiers)
+    except (IndexError, ValueError) as e:
+        raise InvalidRenderError(
+            f"Modifiers {modifiersStr!r} do not fit the song"
+        ) from e
+
+    events = effect.to_events(
+        song,
+        {actor: pyass.Tags.parse(tags) for actor, tags in actorToStyle.items()},
+        shouldPrintTitle,
+    )
+
+    return str(pyass.EventsSection(events))
+
+
+class SongRenderer:
+    def __init__(
+        self,
+        songService: SongServiceByDB,
+        cache: Optional[Cache],
+        executor: Optional[Executor] = None,
+        numWorkers: int = DEFAULT_RENDER_WORKERS,
+        fontBackend: str = DEFAULT_FONT_BACKEND,
+        fontWorkers: int = 0,
+    ) -> None:
+        self.songService = songService
+        self.cache = cache
+        self.fontBackend = fontBackend
+        self.fontWorkers = fontWorkers
+        # Text is measured by the font workers, so renders can share one process
+        self.executor = executor or (
+            ThreadPoolExecutor(numWorkers)
+            if fontWorkers
+            else ProcessPoolExecutor(numWorkers)
+        )
+
+    def render(
+        self,
+        title: str,
+        effectName: str = DEFAULT_RENDER_EFFECT,
+        modifiersStr: str = "",
+        shouldPrintTitle: bool = True,
+    ) -> str:
+        return self._render_events(
+            *self._to_render_args(title, effectName, modifiersStr, shouldPrintTitle)
+        )
+
+    async def render_async(
+        self,
+        cache: AsyncCache,
+        title: str,
+        effectName: str = DEFAULT_RENDER_EFFECT,
+        modifiersStr: str = "",
+        shouldPrintTitle: bool = True,
+    ) -> str:
+        args = await asyncio.to_thread(
+            self._to_render_args, title, effectName, modifiersStr, shouldPrintTitle
+        )
+
+        async def fill(missing: Sequence[Sequence[str]]) -> Sequence[str]:
+            # Reading the song may still go to Sheets, so it happens off the event loop
+            futures = [
+                await asyncio.to_thread(self._submit, *missingArgs)
+                for missingArgs in missing
+            ]
+            return [await asyncio.wrap_future(future) for future in futures]
+
+        (events,) = await SongRenderer._render_events.get_many_async(
+            self, cache, [args], fill
+        )
+        return events
+
+    def _to_render_args(
+        self, title: str, effectName: str, modifiersStr: str, shouldPrintTitle: bool
+    ) -> tuple[str, ...]:
+        songKey = self.songService.to_existing_song_key(title)
+
+        # The ETag changes whenever the song does, so old renders are never read again
+        return (
+            songKey,
+            self.songService.get_song_etag(songKey),
+            effectName,
+            normalize_modifiers(modifiersStr),
+            "1" if shouldPrintTitle else "0",
+            # Backends lay text out slightly differently
+            self.fontBackend,
+        )
+
+    # The effects style lines with the format tags from every template sheet
+    @with_cache(
+        "SongRenderer::render_events",
+        scopes=lambda self, *args: self.songService._get_all_template_scopes(),
+    )
+    def _render_events(
+        self,
+        songKey: str,
+        etag: str,
+        effectName: str,
+        modifiersStr: str,
+        shouldPrintTitle: str,
+        fontBackend: str,
+    ) -> str:
+        return self._submit(
+            songKey, etag, effectName, modifiersStr, shouldPrintTitle, fontBackend
+        ).result()
+
+    def _submit(
+        self,
+        songKey: str,
+        etag: str,
+        effectName: str,
+        modifiersStr: str,
+        shouldPrintTitle: str,
+        fontBackend: str,
+    ):
+        return self.executor.submit(
+            render_events,
+            self.songService.get_song(songKey),
+            self.songService.get_all_format_tags(),
+            effectName,
+            modifiersStr,
+            shouldPrintTitle == "1",
+            fontBackend,
+            self.fontWorkers,
+        )
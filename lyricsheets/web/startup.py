@@ -0,0 +1,135 @@
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+from logging import Logger
+from typing import Any, Optional
+import threading
+import time
+
+DEFAULT_RETRY_AFTER = 5
+MAX_RETRY_DELAY = 60
+
+
+class NotReadyError(Exception):
+    def __init__(self, retryAfter: int) -> None:
+        super().__init__("Service is starting")
+        self.retryAfter = retryAfter
+
+
+@dataclass
+class StartupStep:
+    name: str
+    run: Callable[[], Optional[Mapping[str, Any]]]
+    # Requests are only served once every required step is done
+    isRequired: bool
+    seconds: Optional[float] = None
+    attempts: int = 0
+    error: Optional[str] = None
+    result: Optional[Mapping[str, Any]] = None
+
+    @property
+    def isDone(self) -> bool:
+        return self.seconds is not None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "isRequired": self.isRequired,
+            "isDone": self.isDone,
+            "seconds": self.seconds,
+            "attempts": self.attempts,
+            "error": self.error,
+            "result": self.result,
+        }
+
+
+# Runs the slow parts of building the app (listing songs in Sheets, filling caches)
+# so that the server can answer health checks while they are still running
+class Startup:
+    def __init__(self, logger: Logger, retryAfter: int = DEFAULT_RETRY_AFTER) -> None:
+        self.logger = logger
+        self.retryAfter = retryAfter
+        self.steps: list[StartupStep] = []
+        self.startedAt = time.perf_counter()
+        self.readyAfter: Optional[float] = None
+        self._ready = threading.Event()
+
+    def add_step(
+        self,
+        name: str,
+        run: Callable[[], Optional[Mapping[str, Any]]],
+        isRequired: bool = True,
+    ):
+        self.steps.append(StartupStep(name, run, isRequired))
+
+    @property
+    def isReady(self) -> bool:
+        return self._ready.is_set()
+
+    def check_ready(self):
+        if not self.isReady:
+            raise NotReadyError(self.retryAfter)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def run_until_ready(self):
+        for step in self.steps:
+            if not step.isDone and not self._update_ready():
+                self._run_step(step)
+
+        self._update_ready()
+
+    def start(self) -> threading.Thread:
+        thread = threading.Thread(target=self._run, daemon=True)
+        thread.start()
+        return thread
+
+    def _run(self):
+        for step in self.steps:
+            delay = 1
+            while not step.isDone:
+                try:
+                    self._run_step(step)
+                except Exception:
+                    if not step.isRequired:
+                        self.logger.exception("Startup step %s failed", step.name)
+                        break
+
+                    # An expired credential or a Sheets outage can last a while,
+                    # so required steps are retried until they succeed
+                    self.logger.exception(
+                        "Startup step %s failed, retrying in %ds", step.name, delay
+                    )
+                    time.sleep(delay)
+                    delay = min(delay * 2, MAX_RETRY_DELAY)
+
+            self._update_ready()
+
+    def _run_step(self, step: StartupStep):
+        step.attempts += 1
+        start = time.perf_counter()
+        try:
+            step.result = step.run()
+        except Exception as e:
+            step.error = f"{type(e).__name__}: {e}"
+            raise
+
+        step.seconds = time.perf_counter() - start
+        step.error = None
+        self.logger.info("Startup step %s took %.2fs", step.name, step.seconds)
+
+    def _update_ready(self) -> bool:
+        if not self.isReady and all(
+            step.isDone for step in self.steps if step.isRequired
+        ):
+            self.readyAfter = time.perf_counter() - self.startedAt
+            self._ready.set()
+
+        return self.isReady
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "status": "ready" if self.isReady else "starting",
+            "readyAfter": self.readyAfter,
+            "steps": [step.to_dict() for step in self.steps],
+        }
@@ -0,0 +1,53 @@
+from collections.abc import Mapping
+from dataclasses import asdict
+from logging import Logger
+from typing import Any, Optional
+
+from lyricsheets.cache import RedisCache
+from lyricsheets.service import (
+    SongServiceByDB,
+    WarmupProgress,
+    format_failures,
+    format_progress,
+    warm_cache,
+)
+
+from .popularity import RequestCounter
+
+WARMUP_LOCK_KEY = "Web::warmup_lock"
+WARMUP_LOCK_TIMEOUT = 60 * 60
+
+
+def warm_cache_with_lock(
+    songService: SongServiceByDB,
+    cache: RedisCache,
+    requestCounter: RequestCounter,
+    logger: Logger,
+) -> Optional[WarmupProgress]:
+    # Only one worker warms the cache, the others serve requests from it
+    lock = cache.cache.lock(WARMUP_LOCK_KEY, timeout=WARMUP_LOCK_TIMEOUT)
+    if not lock.acquire(blocking=False):
+        return None
+
+    try:
+        progress = warm_cache(
+            songService,
+            priority=requestCounter.top(),
+            onProgress=lambda progress: logger.info(
+                "Warming cache: %s", format_progress(progress)
+            ),
+        )
+        logger.info("Warmed cache: %s", format_progress(progress))
+        for failure in format_failures(progress):
+            logger.warning("Failed to warm song %s", failure)
+        return progress
+    finally:
+        lock.release()
+
+
+def to_warmup_result(progress: Optional[WarmupProgress]) -> Mapping[str, Any]:
+    # Another worker holds the lock and warms the cache instead
+    if progress is None:
+        return {"isSkipped": True}
+
+    return {**asdict(progress), "songsPerSecond": progress.songsPerSecond}
@@ -9,16 +9,33 @@ import pyass
 import sys
 
 from lyricsheets.ass import REQUIRED_STYLES, retrieve_effect
-from lyricsheets.cache import MemoryCache
+from lyricsheets.cache import (
+    DiskCache,
+    MemoryCache,
+    default_cache_dir,
+    format_cache_stats,
+)
 import lyricsheets.effect as _
+from lyricsheets.fonts import (
+    DEFAULT_FONT_BACKEND,
+    PREVIEW_FONT_BACKEND,
+    set_font_backend,
+    set_glyph_cache_dir,
+    warn_missing_fonts,
+)
 from lyricsheets.service import SongService, SongServiceByDB
-from lyricsheets.models import Modifier, Modifiers
+from lyricsheets.models import Modifier, Modifiers, Song
 
 SONG_STYLE_NAME = "Song"
 
 EVENT_EFFECT_TEMPLATE = "template"
 EVENT_EFFECT_CODE = "code"
 
+PREVIEW_SCRIPT_INFO_KEY = "Lyricsheets Preview"
+PREVIEW_SCRIPT_INFO_VALUE = (
+    "Text positions are approximate, populate without --preview for exact ones"
+)
+
 
 def populate_styles(styles: Sequence[pyass.Style]) -> Sequence[pyass.Style]:
     ret = list(styles)
@@ -31,6 +48,13 @@ def populate_styles(styles: Sequence[pyass.Style]) -> Sequence[pyass.Style]:
     return ret
 
 
+# Files populated with approximate font metrics are marked until they are populated again without them
+def mark_preview(scriptInfo: pyass.ScriptInfoSection, isPreview: bool):
+    scriptInfo[:] = [(k, v) for k, v in scriptInfo if k != PREVIEW_SCRIPT_INFO_KEY]
+    if isPreview:
+        scriptInfo.append((PREVIEW_SCRIPT_INFO_KEY, PREVIEW_SCRIPT_INFO_VALUE))
+
+
 def filter_old_song_lines(events: Sequence[pyass.Event]) -> Sequence[pyass.Event]:
     return [
         event
@@ -43,7 +67,7 @@ def filter_old_song_lines(events: Sequence[pyass.Event]) -> Sequence[pyass.Event
 
 
 def populate_song(
-    songService: SongService,
+    song: Song,
     inEvent: pyass.Event,
     actorToStyle: Mapping[str, Sequence[pyass.Tag]],
     effectName: str,
@@ -76,7 +100,7 @@ def populate_song(
     songName = inEvent.parts[0].text
     print(f"Populating {songName}")
 
-    song = songService.get_song(songName).modify(Modifiers(allModifiers))
+    song = song.modify(Modifiers(allModifiers))
 
     if not shouldOverwriteEffect:
         for modifier in allModifiers:
@@ -117,10 +141,20 @@ def populate_songs(
 ) -> Sequence[pyass.Event]:
     outEvents = []
 
+    # Fetch every song in the file at once so that cached songs are read in a single batch
+    songEvents = [
+        inEvent
+        for inEvent in inEvents
+        if inEvent.style == SONG_STYLE_NAME and inEvent.text
+    ]
+    songs = iter(
+        songService.get_songs([inEvent.parts[0].text for inEvent in songEvents])
+    )
+
     for inEvent in inEvents:
         if inEvent.style == SONG_STYLE_NAME and inEvent.text:
             outEvents.extend(
-                populate_song(songService, inEvent, actorToStyle, effectName, shouldOverwriteEffect, shouldPrintTitle)
+                populate_song(next(songs), inEvent, actorToStyle, effectName, shouldOverwriteEffect, shouldPrintTitle)
             )
         else:
             outEvents.append(inEvent)
@@ -138,6 +172,27 @@ def main():
         default=True,
     )
     parser.add_argument("--config", help="Path to config file", default="./config.json")
+    parser.add_argument(
+        "--cache-dir",
+        help="Directory to keep the glyph cache, and the song cache of --cache, in",
+        default=default_cache_dir(),
+    )
+    parser.add_argument(
+        "--cache",
+        help=(
+            "Reuse songs cached by previous runs, "
+            "which ignores edits made in the sheets since"
+        ),
+        action="store_true",
+    )
+    parser.add_argument(
+        "--preview",
+        help=(
+            "Lay text out approximately from the glyphs measured by previous runs "
+            "instead of measuring fonts, and mark the output as a preview"
+        ),
+        action="store_true",
+    )
 
     effectGroup = parser.add_mutually_exclusive_group()
     effectGroup.add_argument("--effect", help="Default effect to use", default="default_live_karaoke_effect")
@@ -148,11 +203,18 @@ def main():
     with open(args.config) as f:
         config = json.load(f)
 
+    set_font_backend(
+        PREVIEW_FONT_BACKEND
+        if args.preview
+        else config.get("font_backend", DEFAULT_FONT_BACKEND)
+    )
+    set_glyph_cache_dir(os.path.join(args.cache_dir, "fonts"))
+
     songService = SongServiceByDB(
         config["google_credentials"],
         config["spreadsheets"],
         config["default"],
-        MemoryCache(),
+        DiskCache(args.cache_dir) if args.cache else MemoryCache(),
     )
 
     actorToStyle = {
@@ -170,7 +232,10 @@ def main():
         with open(file, encoding="utf_8_sig") as inputFile:
             inputAss = pyass.load(inputFile)
 
+            mark_preview(inputAss.scriptInfo, args.preview)
             inputAss.styles = populate_styles(inputAss.styles)
+            # Before rendering, since the text of missing fonts would be laid out with another font
+            warn_missing_fonts(style.fontName for style in inputAss.styles)
 
             inputAss.events = filter_old_song_lines(inputAss.events)
             inputAss.events = populate_songs(
@@ -180,6 +245,8 @@ def main():
             with open(file, "w+", encoding="utf_8_sig") as outFile:
                 pyass.dump(inputAss, outFile)
 
+    print(format_cache_stats(), file=sys.stderr)
+
 
 if __name__ == "__main__":
     main()
@@ -1,7 +1,13 @@
 import argparse
 import json
-
-from lyricsheets.cache import MemoryCache
+import sys
+
+from lyricsheets.cache import (
+    DiskCache,
+    MemoryCache,
+    default_cache_dir,
+    format_cache_stats,
+)
 from lyricsheets.service import SongServiceByDB
 
 
@@ -12,6 +18,19 @@ def main():
     parser.add_argument("song_name")
     parser.add_argument("--line-nums", nargs="*", type=int)
     parser.add_argument("--config", help="Path to config file", default="./config.json")
+    parser.add_argument(
+        "--cache-dir",
+        help="Directory to keep the song cache of --cache in",
+        default=default_cache_dir(),
+    )
+    parser.add_argument(
+        "--cache",
+        help=(
+            "Reuse songs cached by previous runs, "
+            "which ignores edits made in the sheets since"
+        ),
+        action="store_true",
+    )
 
     args = parser.parse_args()
 
@@ -22,7 +41,7 @@ def main():
         config["google_credentials"],
         config["spreadsheets"],
         config["default"],
-        MemoryCache(),
+        DiskCache(args.cache_dir) if args.cache else MemoryCache(),
     )
 
     song = songService.get_song(args.song_name)
@@ -30,6 +49,8 @@ def main():
         if not args.line_nums or i + 1 in args.line_nums:
             print("|".join([syllable.text for syllable in line.syllables]))
 
+    print(format_cache_stats(), file=sys.stderr)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,25 @@
+import pickle
+
+import pytest
+
+from lyricsheets.cache.compression import compress, decompress
+
+
+@pytest.mark.parametrize("method", [None, "zlib", "zstd"])
+def test_round_trip(method):
+    if method == "zstd":
+        pytest.importorskip("zstandard")
+
+    val = pickle.dumps(list(range(1000)))
+
+    assert decompress(compress(val, method, threshold=0)) == val
+
+
+def test_below_threshold_is_not_compressed():
+    val = pickle.dumps("short")
+
+    assert compress(val, "zlib", threshold=1024) == val
+
+
+def test_uncompressed_values_are_readable():
+    assert decompress(b"1700000000000000000") == b"1700000000000000000"
@@ -0,0 +1,147 @@
+import asyncio
+
+from lyricsheets.cache import AsyncCache, MemoryCache, with_cache, invalidate
+
+
+class FakeDB:
+    def __init__(self) -> None:
+        self.cache = MemoryCache()
+        self.calls = 0
+
+    @with_cache(
+        "FakeDB::get_sheet",
+        scopes=lambda self, spreadsheetId, sheetName: [
+            f"spreadsheet:{spreadsheetId}",
+            f"spreadsheet:{spreadsheetId}:sheet:{sheetName}",
+        ],
+    )
+    def get_sheet(self, spreadsheetId: str, sheetName: str) -> str:
+        self.calls += 1
+        return f"{spreadsheetId}/{sheetName}/{self.calls}"
+
+    @with_cache("FakeDB::get_unscoped")
+    def get_unscoped(self, spreadsheetId: str) -> str:
+        self.calls += 1
+        return f"{spreadsheetId}/{self.calls}"
+
+
+def test_cache_hit():
+    db = FakeDB()
+
+    assert db.get_sheet("a", "x") == "a/x/1"
+    assert db.get_sheet("a", "x") == "a/x/1"
+    assert db.calls == 1
+
+
+def test_unscoped_key():
+    db = FakeDB()
+
+    assert db.get_unscoped("a") == "a/1"
+    assert "FakeDB::get_unscoped:a" in db.cache.cache
+
+
+def test_invalidate_sheet():
+    db = FakeDB()
+
+    db.get_sheet("a", "x")
+    db.get_sheet("a", "y")
+    invalidate(db.cache, "spreadsheet:a:sheet:x")
+
+    assert db.get_sheet("a", "x") == "a/x/3"
+    assert db.get_sheet("a", "y") == "a/y/2"
+
+
+def test_invalidate_spreadsheet_cascades():
+    db = FakeDB()
+
+    db.get_sheet("a", "x")
+    db.get_sheet("b", "x")
+    invalidate(db.cache, "spreadsheet:a")
+
+    assert db.get_sheet("a", "x") == "a/x/3"
+    assert db.get_sheet("b", "x") == "b/x/2"
+
+
+def test_invalidate_twice():
+    db = FakeDB()
+
+    db.get_sheet("a", "x")
+    invalidate(db.cache, "spreadsheet:a")
+    db.get_sheet("a", "x")
+    invalidate(db.cache, "spreadsheet:a")
+
+    assert db.get_sheet("a", "x") == "a/x/3"
+
+
+def test_evicted_generation_does_not_revive_entries():
+    db = FakeDB()
+
+    db.get_sheet("a", "x")
+    invalidate(db.cache, "spreadsheet:a")
+    for key in [k for k in db.cache.cache if k.startswith("Cache::generation")]:
+        db.cache.delete(key)
+
+    assert db.get_sheet("a", "x") == "a/x/2"
+
+
+def test_put():
+    db = FakeDB()
+
+    db.get_sheet("a", "x")
+    invalidate(db.cache, "spreadsheet:a:sheet:x")
+    FakeDB.get_sheet.put(db, "written", "a", "x")
+
+    assert db.get_sheet("a", "x") == "written"
+    assert db.calls == 1
+
+
+def test_get_many():
+    db = FakeDB()
+
+    db.get_sheet("a", "x")
+    vals = FakeDB.get_sheet.get_many(db, [("a", "x"), ("a", "y"), ("b", "x")])
+
+    assert vals == ["a/x/1", "a/y/2", "b/x/3"]
+    assert db.get_sheet("a", "y") == "a/y/2"
+
+
+def test_get_many_fill():
+    db = FakeDB()
+
+    vals = FakeDB.get_sheet.get_many(
+        db,
+        [("a", "x"), ("a", "y")],
+        fill=lambda argsList: ["/".join(args) for args in argsList],
+    )
+
+    assert vals == ["a/x", "a/y"]
+    assert db.get_sheet("a", "x") == "a/x"
+    assert db.calls == 0
+
+
+class AsyncMemoryCache(AsyncCache):
+    def __init__(self, cache: MemoryCache) -> None:
+        self.cache = cache
+
+    async def get_many(self, keys):
+        return self.cache.get_many(keys)
+
+    async def set_many(self, vals):
+        self.cache.set_many(vals)
+
+
+def test_get_many_async_shares_entries():
+    db = FakeDB()
+    db.get_sheet("a", "x")
+
+    async def fill(argsList):
+        return ["/".join(args) for args in argsList]
+
+    vals = asyncio.run(
+        FakeDB.get_sheet.get_many_async(
+            db, AsyncMemoryCache(db.cache), [("a", "x"), ("a", "y")], fill
+        )
+    )
+
+    assert vals == ["a/x/1", "a/y"]
+    assert db.get_sheet("a", "y") == "a/y"
@@ -0,0 +1,77 @@
+from datetime import timedelta
+import time
+
+from lyricsheets.cache import DiskCache
+
+
+def test_get_set_delete(tmp_path):
+    cache = DiskCache(str(tmp_path))
+
+    assert cache.get("a") is None
+
+    cache.set("a", b"1")
+    assert cache.get("a") == b"1"
+
+    cache.set("a", b"2")
+    assert cache.get("a") == b"2"
+
+    cache.delete("a")
+    assert cache.get("a") is None
+
+
+def test_persists_between_instances(tmp_path):
+    DiskCache(str(tmp_path)).set("a", b"1")
+
+    assert DiskCache(str(tmp_path)).get("a") == b"1"
+
+
+def test_ttl(tmp_path):
+    cache = DiskCache(str(tmp_path), ttl=timedelta(milliseconds=10))
+
+    cache.set("a", b"1")
+    time.sleep(0.02)
+
+    assert cache.get("a") is None
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(str(tmp_path), maxSize=3)
+
+    cache.set("a", b"1")
+    cache.set("b", b"2")
+    cache.set("c", b"3")
+    cache.get("a")
+    cache.set("d", b"4")
+
+    assert cache.get("a") == b"1"
+    assert cache.get("b") is None
+    assert cache.get("c") == b"3"
+    assert cache.get("d") == b"4"
+
+
+def test_reads_do_not_wait_for_writers(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    cache.set("a", b"1")
+
+    writer = DiskCache(str(tmp_path))
+    writer.cache.execute("BEGIN IMMEDIATE")
+    try:
+        cache.cache.execute("PRAGMA busy_timeout = 0")
+        assert cache.get("a") == b"1"
+    finally:
+        writer.cache.execute("ROLLBACK")
+
+
+def test_records_old_uses_right_away(tmp_path, monkeypatch):
+    cache = DiskCache(str(tmp_path))
+    cache.set("a", b"1")
+
+    later = time.time() + timedelta(hours=2).total_seconds()
+    monkeypatch.setattr(time, "time", lambda: later)
+    cache.get("a")
+
+    (accessedAt,) = cache.cache.execute(
+        "SELECT accessedAt FROM entries WHERE key = 'a'"
+    ).fetchone()
+    assert accessedAt == later
+    assert cache.pendingAccesses == {}
@@ -0,0 +1,82 @@
+from datetime import timedelta
+import asyncio
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from lyricsheets.cache import AsyncRedisCache, RedisCache, invalidate, with_cache
+
+VALS = {
+    "Song::get@1.2:a": b"song",
+    "Cache::generation:spreadsheet:a": b"1",
+    "Song::list:a": b"names",
+}
+
+
+def get_ttls(redis) -> dict[str, int]:
+    return {key: redis.ttl(key) for key in VALS}
+
+
+def test_only_keys_with_generations_expire():
+    cache = RedisCache("localhost", 6379, 0, entryTTL=timedelta(hours=1))
+    cache.cache = fakeredis.FakeRedis()
+
+    cache.set_many(VALS)
+    assert get_ttls(cache.cache) == {
+        "Song::get@1.2:a": 3600,
+        "Cache::generation:spreadsheet:a": -1,
+        "Song::list:a": -1,
+    }
+
+    cache.set("Song::get@1.2:a", b"song")
+    assert cache.cache.ttl("Song::get@1.2:a") == 3600
+
+
+def test_entries_of_old_generations_expire():
+    class Songs:
+        def __init__(self, cache) -> None:
+            self.cache = cache
+
+        @with_cache("Songs::get", scopes=lambda self, name: [f"sheet:{name}"])
+        def get(self, name: str) -> str:
+            return name
+
+    cache = RedisCache("localhost", 6379, 0)
+    cache.cache = fakeredis.FakeRedis()
+    songs = Songs(cache)
+
+    songs.get("a")
+    invalidate(cache, "sheet:a")
+    songs.get("a")
+
+    entryKeys = [key for key in cache.cache.keys() if key.startswith(b"Songs::")]
+    assert len(entryKeys) == 2
+    assert all(cache.cache.ttl(key) > 0 for key in entryKeys)
+
+
+def test_entry_ttl_is_configurable():
+    assert RedisCache.from_config(
+        {"host": "localhost", "port": 6379, "db": 0, "entry_ttl": 60}
+    ).entryTTL == timedelta(seconds=60)
+    assert (
+        RedisCache.from_config(
+            {"host": "localhost", "port": 6379, "db": 0, "entry_ttl": None}
+        ).entryTTL
+        is None
+    )
+
+
+def test_async_cache_expires_keys_with_generations():
+    async def run():
+        cache = AsyncRedisCache("localhost", 6379, 0, entryTTL=timedelta(hours=1))
+        cache.cache = fakeredis.FakeAsyncRedis()
+
+        await cache.set_many(VALS)
+        return {key: await cache.cache.ttl(key) for key in VALS}
+
+    assert asyncio.run(run()) == {
+        "Song::get@1.2:a": 3600,
+        "Cache::generation:spreadsheet:a": -1,
+        "Song::list:a": -1,
+    }
@@ -0,0 +1,40 @@
+from lyricsheets.cache import (
+    MemoryCache,
+    format_cache_stats,
+    get_cache_stats,
+    reset_cache_stats,
+    with_cache,
+)
+
+
+class FakeDB:
+    def __init__(self) -> None:
+        self.cache = MemoryCache()
+
+    @with_cache("FakeDB::get_value")
+    def get_value(self, key: str) -> str:
+        return key * 10
+
+
+def test_hits_and_misses():
+    reset_cache_stats()
+    db = FakeDB()
+
+    db.get_value("a")
+    db.get_value("a")
+    FakeDB.get_value.get_many(db, [("a",), ("b",)])
+
+    stats = get_cache_stats()["FakeDB::get_value"]
+    assert stats.hits == 2
+    assert stats.misses == 2
+    assert stats.hitRatio == 0.5
+    assert stats.writes == 2
+    assert stats.writtenBytes > 0
+    assert stats.readBytes > 0
+
+
+def test_format():
+    reset_cache_stats()
+    FakeDB().get_value("a")
+
+    assert "FakeDB::get_value" in format_cache_stats()
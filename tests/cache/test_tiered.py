@@ -0,0 +1,88 @@
+import asyncio
+
+from lyricsheets.cache import (
+    AsyncCache,
+    AsyncTieredCache,
+    LRUMemoryCache,
+    MemoryCache,
+    TieredCache,
+)
+
+
+def test_only_keys_with_generations_are_kept_in_l1():
+    l1, l2 = MemoryCache(), MemoryCache()
+    cache = TieredCache(l1, l2)
+
+    cache.set_many(
+        {
+            "Song::get@1.2:a": b"song",
+            "Cache::generation:spreadsheet:a": b"1",
+            "Song::list:a": b"names",
+        }
+    )
+
+    assert l1.cache == {"Song::get@1.2:a": b"song"}
+    assert len(l2.cache) == 3
+
+
+def test_l2_hits_fill_l1():
+    l1, l2 = MemoryCache(), MemoryCache()
+    l2.set("Song::get@1:a", b"song")
+    cache = TieredCache(l1, l2)
+
+    assert cache.get_many(["Song::get@1:a", "Song::get@1:b"]) == [b"song", None]
+    assert l1.get("Song::get@1:a") == b"song"
+
+
+class AsyncMemoryCache(AsyncCache):
+    def __init__(self) -> None:
+        self.cache = MemoryCache()
+        self.reads = []
+
+    async def get_many(self, keys):
+        self.reads.extend(keys)
+        return self.cache.get_many(keys)
+
+    async def set_many(self, vals):
+        self.cache.set_many(vals)
+
+
+def test_async_tiered_cache_reads_l1_first():
+    l1, l2 = MemoryCache(), AsyncMemoryCache()
+    cache = AsyncTieredCache(l1, l2)
+
+    async def run():
+        await cache.set_many(
+            {"Song::get@1:a": b"song", "Cache::generation:spreadsheet:a": b"1"}
+        )
+        return await cache.get_many(
+            ["Song::get@1:a", "Cache::generation:spreadsheet:a", "Song::get@1:b"]
+        )
+
+    assert asyncio.run(run()) == [b"song", b"1", None]
+    assert l1.cache == {"Song::get@1:a": b"song"}
+    assert l2.reads == ["Cache::generation:spreadsheet:a", "Song::get@1:b"]
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUMemoryCache(maxSize=6)
+
+    cache.set("a", b"aa")
+    cache.set("b", b"bb")
+    cache.get("a")
+    cache.set("c", b"cc")
+    cache.set("d", b"dd")
+
+    assert [cache.get(key) for key in "abcd"] == [b"aa", None, b"cc", b"dd"]
+
+
+def test_pinned_keys_are_not_evicted():
+    cache = LRUMemoryCache(maxSize=4)
+    cache.set("a", b"aa")
+    cache.pin(["a"])
+
+    cache.set("b", b"bb")
+    cache.set("c", b"cc")
+
+    assert [cache.get(key) for key in "abc"] == [b"aa", None, b"cc"]
+    assert cache.pinnedHits == 1
@@ -0,0 +1,23 @@
+from unittest.mock import Mock
+
+from lyricsheets.db import SongDB
+from lyricsheets.sheets import GoogleSheetsClient
+
+
+def test_songs_data_follows_requested_order():
+    client = Mock(spec=GoogleSheetsClient)
+    client.get.return_value = {
+        "sheets": [
+            {"properties": {"title": "a"}, "data": [{"rowData": ["a rows"]}]},
+            {"properties": {"title": "b"}, "data": [{"rowData": ["b rows"]}]},
+        ]
+    }
+    db = SongDB({}, client=client)
+
+    assert db._get_songs_data("id", ["b", "a", "b"]) == [
+        ["b rows"],
+        ["a rows"],
+        ["b rows"],
+    ]
+    assert client.get.call_count == 1
+    assert client.get.call_args.kwargs["ranges"] == ["'b'", "'a'"]
@@ -0,0 +1,72 @@
+from datetime import timedelta
+from unittest.mock import Mock
+
+from lyricsheets.db import SongDB
+from lyricsheets.models import Song, SongLine, SongLineSyllable, SongTitle
+from lyricsheets.sheets import GoogleSheetsClient
+
+
+def create_song_db() -> SongDB:
+    return SongDB({}, client=Mock(spec=GoogleSheetsClient))
+
+
+def create_line(syllables: list[tuple[int, str]], **kwargs) -> SongLine:
+    return SongLine(
+        start=timedelta(seconds=1),
+        end=timedelta(seconds=2),
+        syllables=[
+            SongLineSyllable(timedelta(milliseconds=ms), text) for ms, text in syllables
+        ],
+        **kwargs,
+    )
+
+
+def test_updated_song_keeps_sheet_fields():
+    oldLine = create_line(
+        [(500, "ka"), (500, "ze")],
+        idxInSong=1,
+        en="wind",
+        isSecondary=True,
+        actors=["A"],
+        breakpoints=[0],
+    )
+    newLine = create_line([(300, "ka"), (700, "ze")])
+    newLine.start = timedelta(milliseconds=1234)
+
+    updatedSong = create_song_db()._get_updated_song(
+        Song(title=SongTitle(romaji="Kaze"), lyrics=[oldLine]),
+        Song(title=SongTitle(romaji="Kaze"), lyrics=[newLine]),
+    )
+
+    updatedLine = updatedSong.lyrics[0]
+    assert updatedSong.title.romaji == "Kaze"
+    assert updatedLine.idxInSong == 1
+    assert updatedLine.en == "wind"
+    assert updatedLine.isSecondary
+    assert updatedLine.start == timedelta(milliseconds=1230)
+    assert [s.length for s in updatedLine.syllables] == [
+        timedelta(milliseconds=300),
+        timedelta(milliseconds=700),
+    ]
+    assert updatedLine.actors == ["A"]
+    assert updatedLine.breakpoints == [0]
+
+
+def test_updated_song_derives_actors_for_new_syllables():
+    oldLine = create_line(
+        [(500, "ka"), (500, "ze")],
+        actors=["A", "B"],
+        breakpoints=[0, 1],
+    )
+    newLine = create_line([(250, "k"), (250, "a"), (500, "ze")])
+
+    updatedLine = (
+        create_song_db()
+        ._get_updated_song(Song(lyrics=[oldLine]), Song(lyrics=[newLine]))
+        .lyrics[0]
+    )
+
+    assert [s.text for s in updatedLine.syllables] == ["k", "a", "ze"]
+    assert updatedLine.actors == ["A", "B"]
+    assert updatedLine.breakpoints == [0, 2]
+    assert oldLine.breakpoints == [0, 1]
@@ -0,0 +1,72 @@
+import os
+import sys
+
+import pytest
+
+from lyricsheets.fonts import files
+
+ADVANCES = {".notdef": 500, "space": 250, "A": 600, "V": 580, "a": 480}
+
+
+# A font with known advances, kerning and vertical metrics
+@pytest.fixture
+def fontFile(tmp_path):
+    pytest.importorskip("fontTools")
+    from fontTools.feaLib.builder import addOpenTypeFeaturesFromString
+    from fontTools.fontBuilder import FontBuilder
+    from fontTools.pens.ttGlyphPen import TTGlyphPen
+
+    fb = FontBuilder(1000, isTTF=True)
+    fb.setupGlyphOrder(list(ADVANCES))
+    fb.setupCharacterMap(
+        {ord(" "): "space", ord("A"): "A", ord("V"): "V", ord("a"): "a"}
+    )
+    fb.setupGlyf({name: TTGlyphPen(None).glyph() for name in ADVANCES})
+    fb.setupHorizontalMetrics(
+        {name: (advance, 0) for name, advance in ADVANCES.items()}
+    )
+    fb.setupHorizontalHeader(ascent=800, descent=-200)
+    fb.setupOS2(usWinAscent=900, usWinDescent=300)
+    fb.setupNameTable({"familyName": "Test Sans", "styleName": "Regular"})
+    fb.setupPost()
+    addOpenTypeFeaturesFromString(
+        fb.font,
+        """
+        @FIRST = [a];
+        @SECOND = [V];
+        feature kern {
+            pos A V -80;
+            pos @FIRST @SECOND -30;
+        } kern;
+        """,
+    )
+
+    path = tmp_path / "TestSans.ttf"
+    fb.save(str(path))
+    return str(path)
+
+
+# fc-list lists only the test font as installed, and logs every run
+@pytest.fixture
+def installedFontFile(fontFile, tmp_path, monkeypatch):
+    if sys.platform == "win32":
+        pytest.skip("Fonts are listed from the registry on Windows")
+
+    binDir = tmp_path / "bin"
+    binDir.mkdir()
+    fcList = binDir / "fc-list"
+    fcList.write_text(
+        "#!/bin/sh\n"
+        f"echo run >> '{binDir / 'fc-list.log'}'\n"
+        f"printf 'Test Sans\\t80\\t0\\t%s\\n' '{fontFile}'\n"
+    )
+    fcList.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{binDir}{os.pathsep}{os.environ['PATH']}")
+
+    # Created up front, since changes to the font's directory invalidate the index
+    cacheDir = tmp_path / "cache"
+    cacheDir.mkdir()
+    fontIndexPath = files._fontIndexPath
+    files.set_font_index_path(str(cacheDir / "index.json"))
+    yield fontFile
+    files.set_font_index_path(fontIndexPath)
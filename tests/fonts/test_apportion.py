@@ -0,0 +1,47 @@
+import random
+
+import pytest
+
+from lyricsheets.fonts import FontScaler, apportion
+from lyricsheets.fonts import apportionment
+
+SEED = 20240
+NUM_SONGS = 200
+
+
+def random_song(rng: random.Random) -> tuple[list[int], list[list[int]]]:
+    # Few distinct widths and round durations make ties between remainders common
+    widths = rng.choice([[64], [0, 64, 128], [30, 45, 60, 90], range(0, 2000)])
+    toSplits, widthVectors = [], []
+    for _ in range(rng.randrange(1, 60)):
+        toSplits.append(rng.choice([0, 1, 7, 10, 100, rng.randrange(100000)]))
+        vector = [rng.choice(widths) for _ in range(rng.randrange(0, 12))]
+        if vector and not any(vector):
+            vector.append(1)
+        widthVectors.append(vector)
+    return toSplits, widthVectors
+
+
+@pytest.mark.parametrize(
+    "minVectorizedGlyphs", [0, apportionment.MIN_VECTORIZED_GLYPHS]
+)
+def test_matches_split_by_glyph_widths(monkeypatch, minVectorizedGlyphs):
+    pytest.importorskip("numpy")
+    monkeypatch.setattr(apportionment, "MIN_VECTORIZED_GLYPHS", minVectorizedGlyphs)
+
+    rng = random.Random(SEED)
+    for _ in range(NUM_SONGS):
+        toSplits, widthVectors = random_song(rng)
+        assert apportion(toSplits, widthVectors) == [
+            list(FontScaler.split_by_glyph_widths(toSplit, widths))
+            for toSplit, widths in zip(toSplits, widthVectors)
+        ]
+
+
+def test_zero_width_vector_cannot_be_apportioned(monkeypatch):
+    pytest.importorskip("numpy")
+    monkeypatch.setattr(apportionment, "MIN_VECTORIZED_GLYPHS", 0)
+
+    assert apportion([10, 0], [[], [1, 1]]) == [[], [0, 0]]
+    with pytest.raises(ZeroDivisionError):
+        apportion([10], [[0, 0]])
@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+from lyricsheets.fonts import MissingFontWarning, warn_missing_fonts
+from lyricsheets.fonts import files
+from lyricsheets.fonts.files import find_font_file, find_missing_fonts
+
+
+def count_fc_list_runs(fontFile: str) -> int:
+    with open(os.path.join(os.path.dirname(fontFile), "bin", "fc-list.log")) as f:
+        return len(f.readlines())
+
+
+def test_installed_fonts_are_indexed_once(installedFontFile):
+    assert find_font_file("Test Sans", False, False) == installedFontFile
+    assert find_font_file("test sans", True, True) == installedFontFile
+    assert find_font_file("Proxima Nova", False, False) is None
+    assert find_missing_fonts(["Test Sans", "Proxima Nova"]) == ["Proxima Nova"]
+    assert count_fc_list_runs(installedFontFile) == 1
+
+    # The next run reads the index from disk
+    files.set_font_index_path(files._fontIndexPath)
+    assert find_font_file("Test Sans", False, False) == installedFontFile
+    assert count_fc_list_runs(installedFontFile) == 1
+
+    # Installing a font invalidates it
+    fontDir = os.path.dirname(installedFontFile)
+    os.utime(fontDir, ns=(0, os.stat(fontDir).st_mtime_ns + 1))
+    files.set_font_index_path(files._fontIndexPath)
+    assert find_font_file("Test Sans", False, False) == installedFontFile
+    assert count_fc_list_runs(installedFontFile) == 2
+
+
+def test_fonts_installed_into_new_subdirectories_invalidate_the_index(
+    installedFontFile, tmp_path, monkeypatch
+):
+    fontRoot = tmp_path / "fonts"
+    (fontRoot / "truetype").mkdir(parents=True)
+    monkeypatch.setattr(files, "_get_font_roots", lambda: [str(fontRoot)])
+
+    assert find_font_file("Test Sans", False, False) == installedFontFile
+    assert count_fc_list_runs(installedFontFile) == 1
+
+    # Only the mtime of truetype changes, which neither is a root nor holds a font
+    (fontRoot / "truetype" / "noto").mkdir()
+    (fontRoot / "truetype" / "noto" / "NotoSans.ttf").write_bytes(b"")
+    files.set_font_index_path(files._fontIndexPath)
+    assert find_font_file("Test Sans", False, False) == installedFontFile
+    assert count_fc_list_runs(installedFontFile) == 2
+
+
+def test_missing_fonts_are_warned_about_once(installedFontFile, monkeypatch):
+    monkeypatch.setattr(files, "_warnedMissingFonts", set())
+
+    with pytest.warns(MissingFontWarning, match="Proxima Nova"):
+        warn_missing_fonts(["Test Sans", "Proxima Nova"])
+
+    with pytest.warns(MissingFontWarning) as record:
+        warn_missing_fonts(["Proxima Nova", "Gotham"])
+    assert "Proxima Nova" not in str(record[0].message)
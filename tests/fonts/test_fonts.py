@@ -0,0 +1,64 @@
+import dataclasses
+from datetime import timedelta
+
+import pytest
+
+pytest.importorskip("wx")
+
+from lyricsheets.ass.consts import ROMAJI_STYLE
+from lyricsheets.fonts import get_font_scaler, get_native_call_count
+from lyricsheets.models import SongLine, SongLineSyllable
+from lyricsheets.models.karaoke import to_romaji_k_line
+
+
+def test_styles_differing_only_in_layout_share_a_scaler():
+    movedStyle = dataclasses.replace(ROMAJI_STYLE, marginL=0, marginV=0)
+
+    assert get_font_scaler(movedStyle) is get_font_scaler(ROMAJI_STYLE)
+    assert get_font_scaler(
+        dataclasses.replace(ROMAJI_STYLE, fontSize=ROMAJI_STYLE.fontSize + 1)
+    ) is not get_font_scaler(ROMAJI_STYLE)
+
+
+def test_text_is_measured_in_one_native_call():
+    scaler = get_font_scaler(ROMAJI_STYLE)
+    calls = get_native_call_count()
+
+    prefixWidths = scaler.prefix_widths("sora ni")
+    assert get_native_call_count() - calls <= 2  # The font's height is measured once
+
+    calls = get_native_call_count()
+    assert len(prefixWidths) == len("sora ni")
+    assert list(prefixWidths) == sorted(prefixWidths)
+    assert scaler.get_length("sora ni") == prefixWidths[-1]
+    assert sum(scaler.split_by_rendered_width(100, "sora ni")) == 100
+    assert get_native_call_count() == calls
+
+
+def test_line_layout_is_derived_from_one_measurement():
+    kLine = to_romaji_k_line(
+        SongLine(
+            end=timedelta(seconds=2),
+            syllables=[
+                SongLineSyllable(timedelta(milliseconds=500), text)
+                for text in [" ka", "ze ", "  ", "no", " uta "]
+            ],
+            actors=["A"],
+            breakpoints=[0],
+        )
+    )
+    kLine.style = ROMAJI_STYLE
+    kLine.resX = 1920
+    calls = get_native_call_count()
+
+    for char, nextChar in zip(kLine.chars, kLine.chars[1:]):
+        assert char.left + char.width == pytest.approx(nextChar.left)
+    for syl, nextSyl in zip(kLine.syls, kLine.syls[1:]):
+        assert syl.right + syl.postSpaceWidth + nextSyl.preSpaceWidth == pytest.approx(
+            nextSyl.left
+        )
+    assert kLine.chars[-1].right == pytest.approx(kLine.right)
+    assert [syl._charKaraTimes[-1] for syl in kLine.syls] == [
+        syl.end for syl in kLine.syls
+    ]
+    assert get_native_call_count() - calls <= 2
@@ -0,0 +1,74 @@
+import dataclasses
+
+import pytest
+
+pytest.importorskip("fontTools")
+
+from lyricsheets.ass.consts import ROMAJI_STYLE
+from lyricsheets.fonts import fonts, set_font_backend
+from lyricsheets.fonts.files import find_font_file
+from lyricsheets.fonts.fonts import get_font_scaler
+from lyricsheets.fonts.fonttools_backend import FontToolsFontMetrics
+
+FONT_KEY = ("Test Sans", 20, False, False, False, False)
+# Installed with most Linux distributions
+CONFORMANCE_FONT = "DejaVu Sans"
+CONFORMANCE_TEXTS = ["kaze no uta", "AVATAR To wa", "Mitaiken HORIZON", "Tomorrow"]
+
+
+def test_extents_are_read_from_the_font_file(fontFile):
+    metrics = FontToolsFontMetrics(FONT_KEY, fontFile)
+
+    assert metrics.get_partial_extents("AVa V") == [
+        600,
+        600 - 80 + 580,
+        1100 + 480,
+        1580 + 250,
+        1830 + 580,
+    ]
+    assert metrics.get_partial_extents("aV") == [480, 480 - 30 + 580]
+    # Unknown characters are as wide as the missing glyph
+    assert metrics.get_partial_extents("?") == [500]
+    assert metrics.get_height() == 900 + 300
+
+
+def test_backend_is_selectable(fontFile, monkeypatch):
+    monkeypatch.setattr(fonts, "find_font_file", lambda *args: fontFile)
+    style = dataclasses.replace(ROMAJI_STYLE, fontName="Test Sans")
+
+    set_font_backend("fonttools")
+    try:
+        scaler = get_font_scaler(style)
+        assert isinstance(scaler.metrics, FontToolsFontMetrics)
+        assert scaler.get_length("AV") == pytest.approx(
+            style.scaleX / 100 * style.fontSize * (600 - 80 + 580) / 1200
+        )
+        assert list(scaler.split_by_rendered_width(100, "AV")) == [55, 45]
+    finally:
+        set_font_backend("wx")
+
+    with pytest.raises(ValueError):
+        set_font_backend("gdi")
+
+
+def test_conforms_to_wx_backend():
+    pytest.importorskip("wx")
+    if find_font_file(CONFORMANCE_FONT, False, False) is None:
+        pytest.skip(f"{CONFORMANCE_FONT} is not installed")
+
+    style = dataclasses.replace(ROMAJI_STYLE, fontName=CONFORMANCE_FONT)
+    wxScaler = get_font_scaler(style)
+    set_font_backend("fonttools")
+    try:
+        fontToolsScaler = get_font_scaler(style)
+        for text in CONFORMANCE_TEXTS:
+            assert fontToolsScaler.get_length(text) == pytest.approx(
+                wxScaler.get_length(text), rel=0.02
+            )
+            for fontToolsSplit, wxSplit in zip(
+                fontToolsScaler.split_by_rendered_width(1000, text),
+                wxScaler.split_by_rendered_width(1000, text),
+            ):
+                assert fontToolsSplit == pytest.approx(wxSplit, abs=10)
+    finally:
+        set_font_backend("wx")
@@ -0,0 +1,86 @@
+import os
+
+import pytest
+
+from lyricsheets.fonts.glyphs import ADVANCE_BLOCK_SIZE, open_glyph_table
+
+FONT_KEY = ("Proxima Nova", 20, True, False, False, False)
+
+
+def test_glyphs_are_kept_between_runs(tmp_path):
+    table = open_glyph_table(str(tmp_path), FONT_KEY, "font.otf:1:1")
+    table.set_advance(ord("a"), 640)
+    table.set_advance(0x3042, 1280)
+    table.add_kerns({(ord("a"), ord("v")): -32})
+    table.height = 1536
+    table.close()
+
+    table = open_glyph_table(str(tmp_path), FONT_KEY, "font.otf:1:1")
+    assert table.get_advance(ord("a")) == 640
+    assert table.get_advance(0x3042) == 1280
+    assert table.get_advance(ord("b")) is None
+    assert table.get_advance(ADVANCE_BLOCK_SIZE * 100) is None
+    assert table.get_kern((ord("a"), ord("v"))) == -32
+    assert table.get_kern((ord("v"), ord("a"))) is None
+    assert table.height == 1536
+    table.close()
+
+
+def test_changed_font_file_invalidates_glyphs(tmp_path):
+    table = open_glyph_table(str(tmp_path), FONT_KEY, "font.otf:1:1")
+    table.set_advance(ord("a"), 640)
+    table.close()
+
+    otherTable = open_glyph_table(
+        str(tmp_path), FONT_KEY[:1] + (24,) + FONT_KEY[2:], "font.otf:1:1"
+    )
+    otherTable.set_advance(ord("a"), 768)
+    otherTable.close()
+
+    table = open_glyph_table(str(tmp_path), FONT_KEY, "font.otf:2:2")
+    assert table.get_advance(ord("a")) is None
+    table.close()
+
+    # Only the stale table of the same font was removed
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test_partly_written_metadata_is_measured_again(tmp_path):
+    table = open_glyph_table(str(tmp_path), FONT_KEY, "font.otf:1:1")
+    table.close()
+    with open(table.metaPath, "w") as f:
+        f.write('{"hei')
+
+    table = open_glyph_table(str(tmp_path), FONT_KEY, "font.otf:1:1")
+    assert table.height is None
+    table.height = 1536
+    table.close()
+
+    table = open_glyph_table(str(tmp_path), FONT_KEY, "font.otf:1:1")
+    assert table.height == 1536
+    table.close()
+    assert not [path for path in os.listdir(tmp_path) if path.endswith(".tmp")]
+
+
+def test_composed_extents_match_measured_extents(tmp_path):
+    pytest.importorskip("wx")
+    from lyricsheets.fonts.wx_backend import WxFontMetrics as FontMetrics
+
+    measured = FontMetrics(FONT_KEY)
+    composed = FontMetrics(
+        FONT_KEY, open_glyph_table(str(tmp_path), FONT_KEY, "font.otf:1:1")
+    )
+    for text in ["AVATAR", "To wa", "kaze no uta"]:
+        assert composed.get_partial_extents(text) == pytest.approx(
+            measured.get_partial_extents(text), abs=1
+        )
+
+    # A new run composes known text without measuring
+    rerun = FontMetrics(
+        FONT_KEY, open_glyph_table(str(tmp_path), FONT_KEY, "font.otf:1:1")
+    )
+    assert rerun.get_partial_extents("kaze no uta") == composed.get_partial_extents(
+        "kaze no uta"
+    )
+    assert rerun.get_partial_extents("uta no kaze")
+    assert rerun.nativeCalls <= 1
@@ -0,0 +1,108 @@
+from concurrent.futures import ThreadPoolExecutor
+import dataclasses
+import os
+import signal
+import sys
+
+import pytest
+
+pytest.importorskip("fontTools")
+
+from lyricsheets.ass.consts import ROMAJI_STYLE
+from lyricsheets.fonts import (
+    FontNotFoundError,
+    fonts,
+    set_font_backend,
+    set_font_workers,
+)
+from lyricsheets.fonts.fonts import get_font_scaler
+from lyricsheets.fonts.fonttools_backend import FontToolsFontMetrics
+from lyricsheets.fonts.pool import FontMetricsPool, PooledFontMetrics
+
+FONT_KEY = ("Test Sans", 20, False, False, False, False)
+TEXTS = ["AVa V", "aV", "A", "VAVA", "a a a"]
+
+
+@pytest.fixture
+def pool(installedFontFile):
+    pool = FontMetricsPool(2, "fonttools", None)
+    yield pool
+    pool.close()
+
+
+def test_pooled_metrics_match_in_process_metrics(pool, installedFontFile):
+    local = FontToolsFontMetrics(FONT_KEY, installedFontFile)
+    pooled = PooledFontMetrics(FONT_KEY, pool)
+
+    pooled.prefetch_partial_extents(TEXTS + TEXTS)
+    assert pooled.nativeCalls == 1
+    for text in TEXTS:
+        assert pooled.get_partial_extents(text) == local.get_partial_extents(text)
+    # The height came with the extents
+    assert pooled.get_height() == local.get_height()
+    assert pooled.nativeCalls == 1
+
+
+def test_threads_measure_concurrently(pool, installedFontFile):
+    local = FontToolsFontMetrics(FONT_KEY, installedFontFile)
+    pooled = PooledFontMetrics(FONT_KEY, pool)
+    texts = [f"{text} {i}" for i in range(50) for text in TEXTS]
+
+    with ThreadPoolExecutor(8) as executor:
+        extents = list(executor.map(pooled.get_partial_extents, texts))
+
+    assert extents == [local.get_partial_extents(text) for text in texts]
+
+
+def test_worker_errors_are_raised(pool):
+    pooled = PooledFontMetrics(("Missing Sans",) + FONT_KEY[1:], pool)
+    with pytest.raises(FontNotFoundError):
+        pooled.get_partial_extents("A")
+
+    # The worker keeps serving after an error
+    assert PooledFontMetrics(FONT_KEY, pool).get_partial_extents("A") == [600]
+
+
+def test_font_workers_are_selectable(installedFontFile, monkeypatch):
+    monkeypatch.setattr(fonts, "_glyphCacheDir", None)
+    style = dataclasses.replace(ROMAJI_STYLE, fontName="Test Sans")
+
+    set_font_backend("fonttools")
+    set_font_workers(1)
+    try:
+        scaler = get_font_scaler(style)
+        assert isinstance(scaler.metrics, PooledFontMetrics)
+        assert list(scaler.split_by_rendered_width(100, "AV")) == [55, 45]
+    finally:
+        set_font_workers(0)
+        set_font_backend("wx")
+
+
+def test_dead_workers_are_replaced(pool):
+    for process in list(pool.processes.values()):
+        process.kill()
+        process.join()
+
+    for _ in range(2):
+        with pytest.raises((EOFError, OSError)):
+            pool.measure(FONT_KEY, ["A"])
+
+    _, extents = pool.measure(FONT_KEY, ["A"])
+    assert extents == [[600]]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Needs SIGSTOP")
+def test_hung_workers_time_out(installedFontFile):
+    pool = FontMetricsPool(1, "fonttools", None, timeout=0.5)
+    try:
+        (process,) = pool.processes.values()
+        os.kill(process.pid, signal.SIGSTOP)
+
+        with pytest.raises(TimeoutError):
+            pool.measure(FONT_KEY, ["A"])
+
+        pool.timeout = 60
+        _, extents = pool.measure(FONT_KEY, ["A"])
+        assert extents == [[600]]
+    finally:
+        pool.close()
@@ -0,0 +1,57 @@
+import dataclasses
+
+import pytest
+
+from lyricsheets.ass.consts import ROMAJI_STYLE
+from lyricsheets.fonts import (
+    PREVIEW_FONT_BACKEND,
+    fonts,
+    get_native_call_count,
+    set_font_backend,
+)
+from lyricsheets.fonts.fonts import get_font_scaler
+from lyricsheets.fonts.glyphs import open_glyph_table
+from lyricsheets.fonts.preview_backend import (
+    MONOSPACE_ADVANCE,
+    MONOSPACE_HEIGHT,
+    PreviewFontMetrics,
+)
+
+FONT_KEY = ("Proxima Nova", 20, True, False, False, False)
+
+
+def test_text_is_laid_out_from_measured_glyphs(tmp_path):
+    table = open_glyph_table(str(tmp_path), FONT_KEY, "font.otf:1:1")
+    table.set_advance(ord("A"), 600)
+    table.set_advance(ord("V"), 580)
+    table.add_kerns({(ord("A"), ord("V")): -80})
+    table.height = 1200
+
+    metrics = PreviewFontMetrics(FONT_KEY, table)
+    # Unknown glyphs are as wide as the average known one
+    assert metrics.get_partial_extents("AV?") == [600, 1100, 1690]
+    assert metrics.get_height() == 1200
+    table.close()
+
+
+def test_text_is_monospaced_without_glyphs():
+    metrics = PreviewFontMetrics(FONT_KEY)
+    assert metrics.get_partial_extents("kaze") == [
+        MONOSPACE_ADVANCE * i for i in range(1, 5)
+    ]
+    assert metrics.get_height() == MONOSPACE_HEIGHT
+
+
+def test_preview_measures_nothing(monkeypatch):
+    monkeypatch.setattr(fonts, "_glyphCacheDir", None)
+    style = dataclasses.replace(ROMAJI_STYLE, fontSize=40, scaleX=100, spacing=0)
+
+    set_font_backend(PREVIEW_FONT_BACKEND)
+    try:
+        scaler = get_font_scaler(style)
+        assert scaler.get_length("kaze no uta") == pytest.approx(
+            40 * 11 * MONOSPACE_ADVANCE / MONOSPACE_HEIGHT
+        )
+        assert get_native_call_count() == 0
+    finally:
+        set_font_backend("wx")
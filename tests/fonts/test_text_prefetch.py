@@ -0,0 +1,89 @@
+import dataclasses
+from datetime import timedelta
+
+import pytest
+
+pytest.importorskip("fontTools")
+
+from lyricsheets.ass.consts import EN_STYLE, ROMAJI_STYLE
+from lyricsheets.effect import default_effect
+from lyricsheets.fonts import (
+    fonts,
+    get_native_call_count,
+    prefetch_text_metrics,
+    set_font_backend,
+)
+from lyricsheets.fonts.fonts import FontMetrics
+from lyricsheets.fonts.fonttools_backend import FontToolsFontMetrics
+from lyricsheets.fonts.glyphs import open_glyph_table
+from lyricsheets.models import Song, SongLine, SongLineSyllable
+
+FONT_KEY = ("Test Sans", 20, False, False, False, False)
+TEXTS = ["AVa V", "aV", "A", "VAVA", "a a a"]
+
+
+# Measures with fontTools, composing text from a glyph table like the wx backend
+class TableFontMetrics(FontMetrics):
+    def __init__(self, fontFile: str, tablePath: str):
+        super().__init__(FONT_KEY, open_glyph_table(tablePath, FONT_KEY, "font:1:1"))
+        self.font = FontToolsFontMetrics(FONT_KEY, fontFile)
+
+    def measure_partial_extents(self, text: str):
+        return self.font.measure_partial_extents(text)
+
+    def measure_height(self) -> int:
+        return self.font.measure_height()
+
+
+def test_glyph_table_texts_are_measured_in_one_batch(fontFile, tmp_path):
+    metrics = TableFontMetrics(fontFile, str(tmp_path / "glyphs"))
+
+    metrics.prefetch_partial_extents(TEXTS)
+    # One call per glyph and one for the kerning of every text
+    assert metrics.nativeCalls == len(set("".join(TEXTS))) + 1
+    for text in TEXTS:
+        assert metrics.get_partial_extents(text) == list(
+            metrics.font.get_partial_extents(text)
+        )
+    assert metrics.get_partial_extents("VAVa") == list(
+        metrics.font.get_partial_extents("VAVa")
+    )
+    assert metrics.nativeCalls == len(set("".join(TEXTS))) + 1
+    metrics.glyphTable.close()
+
+
+def test_song_is_laid_out_without_native_calls(installedFontFile, monkeypatch):
+    monkeypatch.setattr(fonts, "_glyphCacheDir", None)
+    for name, style in (("ROMAJI_STYLE", ROMAJI_STYLE), ("EN_STYLE", EN_STYLE)):
+        monkeypatch.setattr(
+            default_effect, name, dataclasses.replace(style, fontName="Test Sans")
+        )
+
+    song = Song(
+        lyrics=[
+            SongLine(
+                idxInSong=i + 1,
+                en=en,
+                end=timedelta(seconds=2),
+                syllables=[
+                    SongLineSyllable(timedelta(milliseconds=500), text)
+                    for text in ("AV", "a ", "VA")
+                ],
+                actors=["A"],
+                breakpoints=[0],
+            )
+            for i, en in enumerate(["a AV", "VVa", "AV a"])
+        ]
+    )
+    effect = default_effect.DefaultLiveKaraokeEffect()
+
+    set_font_backend("fonttools")
+    try:
+        prefetch_text_metrics(effect.get_styled_texts(song))
+        calls = get_native_call_count()
+        assert calls > 0
+
+        effect.to_events(song, {"A": []})
+        assert get_native_call_count() == calls
+    finally:
+        set_font_backend("wx")
@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+HEAVY_MODULES = ["wx", "fontTools", "googleapiclient", "redis", "flask"]
+
+
+@pytest.mark.parametrize(
+    "script",
+    ["populate_songs", "print_song_karaoke", "warm_cache", "edit_song_karaoke"],
+)
+def test_scripts_do_not_import_heavy_dependencies(script: str):
+    proc = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"import sys, {script}; "
+            f"print(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules))",
+        ],
+        cwd=REPO_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert proc.stdout.strip().splitlines()[-1] == "[]"
+
+
+def test_redis_caches_are_imported_on_use():
+    from lyricsheets.cache import RedisCache
+    from lyricsheets.cache.redis import RedisCache as RedisCacheClass
+
+    assert RedisCache is RedisCacheClass
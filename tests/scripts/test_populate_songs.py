@@ -0,0 +1,18 @@
+import pyass
+
+from populate_songs import PREVIEW_SCRIPT_INFO_KEY, mark_preview
+
+
+def test_previews_are_marked_until_populated_exactly():
+    scriptInfo = pyass.ScriptInfoSection([("Title", "Live"), ("ScriptType", "v4.00+")])
+
+    mark_preview(scriptInfo, True)
+    mark_preview(scriptInfo, True)
+    assert [k for k, _ in scriptInfo] == [
+        "Title",
+        "ScriptType",
+        PREVIEW_SCRIPT_INFO_KEY,
+    ]
+
+    mark_preview(scriptInfo, False)
+    assert [k for k, _ in scriptInfo] == ["Title", "ScriptType"]
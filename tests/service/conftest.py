@@ -0,0 +1,53 @@
+from collections.abc import Sequence
+
+import pytest
+
+from lyricsheets.cache import MemoryCache
+from lyricsheets.models import Song, SongTitle
+from lyricsheets.service import SongServiceByDB, db
+
+
+# Parses every listed sheet into a song of the same title, and fails for the broken ones
+class FakeSongDB:
+    def __init__(self, googleCredentials, client=None, cache=None) -> None:
+        self.songNames = ["Kaze", "Hana", "Sora"]
+        self.brokenSongNames: set[str] = set()
+        self.fetches: list[list[str]] = []
+
+    def list_song_names(self, spreadsheetId: str) -> Sequence[str]:
+        return self.songNames
+
+    def get_song_scopes(self, spreadsheetId: str, songName: str) -> Sequence[str]:
+        return [f"{spreadsheetId}:{songName}"]
+
+    def get_song(self, spreadsheetId: str, songName: str) -> Song:
+        (song,) = self.get_songs([(spreadsheetId, songName)])
+        return song
+
+    def get_songs(self, locations: Sequence[tuple[str, str]]) -> Sequence[Song]:
+        songNames = [songName for _, songName in locations]
+        self.fetches.append(songNames)
+        for songName in songNames:
+            if songName in self.brokenSongNames:
+                raise ValueError(f"Cannot parse {songName}")
+
+        return [Song(title=SongTitle(songName)) for songName in songNames]
+
+
+# Records the keys of every read
+class RecordingCache(MemoryCache):
+    def __init__(self) -> None:
+        super().__init__()
+        self.reads: list[str] = []
+
+    def get(self, key: str):
+        self.reads.append(key)
+        return super().get(key)
+
+
+@pytest.fixture
+def songService(monkeypatch) -> SongServiceByDB:
+    monkeypatch.setattr(db, "SongDB", FakeSongDB)
+    return SongServiceByDB(
+        {}, {"": "sheet"}, cache=RecordingCache(), payloadEncodings=["gzip"]
+    )
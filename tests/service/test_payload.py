@@ -0,0 +1,57 @@
+import gzip
+
+from lyricsheets.models import Song, SongTitle
+from lyricsheets.service import to_song_body, to_song_etag
+
+
+def test_encoded_bodies_decode_to_body():
+    song = Song(title=SongTitle("kaze"))
+
+    assert to_song_body(song) == song.to_json().encode()
+    assert gzip.decompress(to_song_body(song, "gzip")) == to_song_body(song)
+
+
+def test_etag_follows_content():
+    etag = to_song_etag(to_song_body(Song(title=SongTitle("kaze"))))
+
+    assert etag == to_song_etag(to_song_body(Song(title=SongTitle("kaze"))))
+    assert etag != to_song_etag(to_song_body(Song(title=SongTitle("hana"))))
+
+
+def test_only_the_served_encoding_is_read(songService):
+    songService.cache_songs(["kaze"])
+    songService.cache.reads.clear()
+
+    body = songService.get_song_body("kaze", "gzip")
+
+    assert gzip.decompress(body) == Song(title=SongTitle("Kaze")).to_json().encode()
+    assert [key for key in songService.cache.reads if "get_song_body" in key] == [
+        key for key in songService.get_song_cache_keys(["kaze"]) if "gzip" in key
+    ]
+    # The bytes are stored as they are served
+    assert body in songService.cache.cache.values()
+    assert songService.service.fetches == [["Kaze"]]
+
+
+def test_a_song_which_fails_to_fetch_does_not_fail_the_others(songService):
+    songService.get_song_bodies(["kaze"])
+    songService.service.brokenSongNames.add("Hana")
+
+    bodies = songService.get_song_bodies(["kaze", "hana", "sora"])
+
+    assert bodies[0] == to_song_body(Song(title=SongTitle("Kaze")))
+    assert isinstance(bodies[1], ValueError)
+    assert bodies[2] == to_song_body(Song(title=SongTitle("Sora")))
+    # The batch of misses is retried one song at a time
+    assert songService.service.fetches == [
+        ["Kaze"],
+        ["Hana", "Sora"],
+        ["Hana"],
+        ["Sora"],
+    ]
+
+    # Failures are not cached
+    songService.service.brokenSongNames.clear()
+    assert songService.get_song_bodies(["hana"]) == [
+        to_song_body(Song(title=SongTitle("Hana")))
+    ]
@@ -0,0 +1,56 @@
+from lyricsheets.service import (
+    format_failures,
+    format_progress,
+    warm_cache,
+    warm_songs,
+)
+
+
+class FakeSongService:
+    def __init__(self, songKeys: list[str]) -> None:
+        self.songMappings = {songKey: {} for songKey in songKeys}
+        self.batches = []
+
+    def to_song_key(self, songName: str) -> str:
+        return songName.lower()
+
+    def cache_songs(self, songNames):
+        self.batches.append(list(songNames))
+        return len(songNames), {}
+
+
+def test_warm_cache_fetches_priority_first():
+    songService = FakeSongService(["a", "b", "c", "d", "e"])
+
+    progress = warm_cache(songService, priority=["D", "unknown", "b"], batchSize=2)
+
+    assert songService.batches == [["d", "b"], ["a", "c"], ["e"]]
+    assert progress.done == progress.total == 5
+
+
+def test_warm_songs_counts_only_the_songs_it_fetched(songService):
+    songService.get_song("kaze")
+
+    progress = warm_songs(songService, ["kaze", "hana", "sora"], batchSize=2)
+
+    assert progress.fetched == 2
+    assert songService.service.fetches == [["Kaze"], ["Hana"], ["Sora"]]
+    assert warm_songs(songService, ["kaze", "hana", "sora"]).fetched == 0
+
+
+def test_warm_songs_reports_the_songs_which_failed(songService):
+    songService.service.brokenSongNames.add("Hana")
+
+    progress = warm_songs(songService, ["kaze", "hana", "sora"])
+
+    assert progress.failed == {"hana": "ValueError: Cannot parse Hana"}
+    assert format_failures(progress) == ["hana: ValueError: Cannot parse Hana"]
+    assert "1 failed" in format_progress(progress)
+    # The others are cached in spite of it
+    assert songService.get_song_body("sora")
+    assert songService.service.fetches == [
+        ["Kaze", "Hana", "Sora"],
+        ["Kaze"],
+        ["Hana"],
+        ["Sora"],
+    ]
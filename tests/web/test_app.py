@@ -0,0 +1,34 @@
+import json
+
+import pytest
+
+# Flask may also be installed against an incompatible Werkzeug
+pytest.importorskip("flask", exc_type=ImportError)
+fakeredis = pytest.importorskip("fakeredis")
+
+from lyricsheets.cache import RedisCache
+from lyricsheets.web.app import create_app
+
+
+class FakeSongServer:
+    songMappings = {}
+
+
+def test_batch_bodies_are_limited():
+    cache = RedisCache("localhost", 6379, 0)
+    cache.cache = fakeredis.FakeRedis()
+    app = create_app(
+        {"redis": {}, "max_batch_body_size": 4096},
+        FakeSongServer(),
+        cache,
+        shouldStartBackgroundTasks=False,
+    )
+    app.extensions["lyricsheets"]["startup"].run_until_ready()
+
+    resp = app.test_client().post(
+        "/songs:batch",
+        data=json.dumps({"titles": ["Kaze"] * 1000}),
+        content_type="application/json",
+    )
+    assert resp.status_code == 413
+    assert resp.json == {"error": "Request body is too large"}
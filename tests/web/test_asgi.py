@@ -0,0 +1,83 @@
+import asyncio
+import json
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from lyricsheets.cache import AsyncRedisCache, AsyncTieredCache, RedisCache
+from lyricsheets.web.asgi import create_app
+
+
+class FakeSongServer:
+    songMappings = {"kaze": {"group": "", "name": "Kaze"}}
+
+    def has_song(self, songName: str) -> bool:
+        return songName.lower() in self.songMappings
+
+    def cache_songs(self, songNames):
+        return 0, {}
+
+    def get_song_cache_keys(self, songNames):
+        return []
+
+
+def create_test_app(**cfg):
+    cache = RedisCache("localhost", 6379, 0)
+    cache.cache = fakeredis.FakeRedis()
+    asyncCache = AsyncRedisCache("localhost", 6379, 0)
+    asyncCache.cache = fakeredis.FakeAsyncRedis()
+
+    app = create_app(cfg, FakeSongServer(), cache, asyncCache)
+    app.startup.run_until_ready()
+    return app
+
+
+def request(app, method: str, path: str, body: bytes = b"", chunkSize: int = 0):
+    chunks = [
+        body[i : i + chunkSize] for i in range(0, len(body), chunkSize or len(body))
+    ] or [b""]
+    messages = [
+        {"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1}
+        for i, chunk in enumerate(chunks)
+    ]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": b"",
+        "headers": [] if chunkSize else [(b"content-length", str(len(body)).encode())],
+    }
+    asyncio.run(app(scope, receive, send))
+
+    return sent[0]["status"], json.loads(sent[1]["body"])
+
+
+@pytest.mark.parametrize("chunkSize", [0, 1024])
+def test_batch_bodies_are_limited(chunkSize: int):
+    app = create_test_app(max_batch_body_size=4096)
+    body = json.dumps({"titles": ["Kaze"] * 1000}).encode()
+
+    status, resp = request(app, "POST", "/songs:batch", body, chunkSize)
+    assert status == 413
+    assert resp == {"error": "Request body is too large"}
+
+
+def test_songs_are_read_through_the_l1_cache():
+    app = create_test_app(
+        l1_cache={"max_size": 1024}, prefetch={"top": 10, "interval": 60}
+    )
+
+    assert isinstance(app.songServer.cache, AsyncTieredCache)
+    assert app.songServer.cache.l1 is app.l1
+    # Hot songs are pinned in the same L1
+    assert app.prefetcher.l1 is app.l1
+    assert app.renderer.cache.l1 is app.l1
@@ -0,0 +1,53 @@
+import json
+
+from lyricsheets.models import Song, SongTitle
+from lyricsheets.service import to_song_body
+from lyricsheets.web.batch import get_batch, parse_titles, to_json_array, to_ndjson
+
+
+class FakeSongService:
+    def __init__(self, titles: list[str], errors: dict[str, Exception] = {}) -> None:
+        self.titles = titles
+        self.errors = errors
+        self.calls = []
+
+    def has_song(self, songName: str) -> bool:
+        return songName in self.titles
+
+    def get_song_bodies(self, songNames):
+        self.calls.append(list(songNames))
+
+        return [
+            self.errors.get(name) or to_song_body(Song(title=SongTitle(name)))
+            for name in songNames
+        ]
+
+
+def test_parse_titles():
+    assert parse_titles(["a,b", "c", ""]) == ["a", "b", "c"]
+
+
+def test_batch_reports_errors_inline():
+    songService = FakeSongService(["a", "b"])
+
+    items = get_batch(songService, ["a", "x", "b"])
+
+    assert songService.calls == [["a", "b"]]
+    assert json.loads(b"".join(to_json_array(items))) == [
+        {"title": "a", "song": {"title": {"romaji": "a"}}},
+        {"title": "x", "error": {"status": 404, "message": "Song x not found"}},
+        {"title": "b", "song": {"title": {"romaji": "b"}}},
+    ]
+
+
+def test_batch_fetch_failure_only_fails_its_title():
+    songService = FakeSongService(["a", "b"], errors={"b": IOError("quota")})
+
+    items = get_batch(songService, ["a", "b"])
+
+    lines = [json.loads(line) for line in b"".join(to_ndjson(items)).splitlines()]
+    assert lines[0] == {"title": "a", "song": {"title": {"romaji": "a"}}}
+    assert lines[1] == {
+        "title": "b",
+        "error": {"status": 502, "message": "Failed to fetch song"},
+    }
@@ -0,0 +1,55 @@
+from lyricsheets.cache import LRUMemoryCache
+from lyricsheets.web.prefetch import HotSongPrefetcher
+
+
+class FakeRequestCounter:
+    def __init__(self, counts: dict[str, float]) -> None:
+        self.counts = counts
+        self.decays = []
+
+    def decay(self, halfLife: float):
+        self.decays.append(halfLife)
+
+    def top_with_counts(self, n: int):
+        return sorted(self.counts.items(), key=lambda item: -item[1])[:n]
+
+    def total(self) -> float:
+        return sum(self.counts.values())
+
+
+class FakeSongService:
+    def __init__(self, titles: list[str], l1: LRUMemoryCache) -> None:
+        self.titles = titles
+        self.l1 = l1
+        self.fetched = []
+
+    def has_song(self, songName: str) -> bool:
+        return songName in self.titles
+
+    def cache_songs(self, songNames):
+        self.fetched.append(list(songNames))
+        for songName in songNames:
+            self.l1.set(f"payload@1:{songName}", songName.encode())
+        return len(songNames), {}
+
+    def get_song_cache_keys(self, songNames):
+        return [f"payload@1:{songName}" for songName in songNames]
+
+
+def test_prefetch_pins_the_hot_songs():
+    l1 = LRUMemoryCache(maxSize=1024)
+    requestCounter = FakeRequestCounter({"a": 5, "gone": 4, "b": 3, "c": 1})
+    songService = FakeSongService(["a", "b", "c"], l1)
+    prefetcher = HotSongPrefetcher(songService, requestCounter, l1, n=3, halfLife=60)
+
+    report = prefetcher.prefetch()
+
+    assert requestCounter.decays == [60]
+    assert songService.fetched == [["a", "b"]]
+    assert l1.pinned == {"payload@1:a", "payload@1:b"}
+    assert (report.songs, report.pinnedKeys) == (2, 2)
+
+    status = prefetcher.get_status()
+    assert [song["title"] for song in status["songs"]] == ["a", "b"]
+    assert status["coverage"] == 8 / 13
+    assert status["l1"]["pinnedSize"] == 2
@@ -0,0 +1,104 @@
+import time
+
+import pytest
+
+# Flask may also be installed against an incompatible Werkzeug
+pytest.importorskip("flask", exc_type=ImportError)
+fakeredis = pytest.importorskip("fakeredis")
+
+from lyricsheets.cache import RedisCache
+from lyricsheets.web import app as appModule
+
+
+class FakeSongServer:
+    songMappings = {"kaze": {"group": "", "name": "Kaze"}}
+
+    def __init__(self) -> None:
+        self.isClosed = False
+
+    def close(self):
+        self.isClosed = True
+
+
+@pytest.fixture
+def attempts(monkeypatch):
+    cache = RedisCache("localhost", 6379, 0)
+    cache.cache = fakeredis.FakeRedis()
+    monkeypatch.setattr(
+        appModule,
+        "load_config",
+        lambda: {"redis": {}, "retry_after": 7, "preload_timeout": 0.2},
+    )
+    monkeypatch.setattr(RedisCache, "from_config", lambda cfg: cache)
+
+    return []
+
+
+def fake_create_song_server(attempts, failure=None):
+    def create_song_server(cfg, songCache):
+        attempts.append(FakeSongServer())
+        if len(attempts) == 1 and failure is not None:
+            failure()
+
+        return attempts[-1]
+
+    return create_song_server
+
+
+def test_preforked_app_builds_the_song_index_before_forking(attempts, monkeypatch):
+    monkeypatch.setattr(
+        appModule, "create_song_server", fake_create_song_server(attempts)
+    )
+
+    app = appModule.create_preforked_app()
+    assert len(attempts) == 1
+    # The workers open their own connections to Sheets
+    assert attempts[0].isClosed
+    assert app.test_client().get("/readyz").status_code == 200
+
+    # As in a worker after forking, nothing is left to do
+    app.extensions["lyricsheets"]["start_background_tasks"]()
+    assert app.extensions["lyricsheets"]["startup"].wait(5)
+    assert len(attempts) == 1
+
+
+def test_preforked_app_starts_while_sheets_fails(attempts, monkeypatch):
+    def fail():
+        raise ConnectionError("Sheets is down")
+
+    monkeypatch.setattr(
+        appModule, "create_song_server", fake_create_song_server(attempts, fail)
+    )
+
+    app = appModule.create_preforked_app()
+    assert len(attempts) == 1
+
+    client = app.test_client()
+    resp = client.get("/songs/kaze")
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "7"
+    assert client.get("/readyz").status_code == 503
+
+    # As in a worker after forking, the failed step is retried in the background
+    app.extensions["lyricsheets"]["start_background_tasks"]()
+    startup = app.extensions["lyricsheets"]["startup"]
+    assert startup.wait(5)
+    assert len(attempts) == 2
+    assert client.get("/readyz").status_code == 200
+
+
+def test_preforked_app_starts_while_sheets_hangs(attempts, monkeypatch):
+    monkeypatch.setattr(
+        appModule,
+        "create_song_server",
+        fake_create_song_server(attempts, lambda: time.sleep(10)),
+    )
+
+    start = time.perf_counter()
+    app = appModule.create_preforked_app()
+    assert time.perf_counter() - start < 5
+    assert app.test_client().get("/readyz").status_code == 503
+
+    app.extensions["lyricsheets"]["start_background_tasks"]()
+    assert app.extensions["lyricsheets"]["startup"].wait(5)
+    assert len(attempts) == 2
@@ -0,0 +1,126 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import timedelta
+
+import pytest
+
+from lyricsheets.cache import MemoryCache
+from lyricsheets.models import Song, SongLine, SongLineSyllable
+from lyricsheets.web.render import (
+    InvalidRenderError,
+    SongRenderer,
+    normalize_modifiers,
+    render_events,
+)
+
+
+def test_normalize_modifiers():
+    assert (
+        normalize_modifiers(" offset,1-1, 0:00:01.00;discard,3-;secondary,-")
+        == "offset,1,0:00:01.00;discard,3-;secondary,-"
+    )
+    assert normalize_modifiers("style,2-4,A") == "style,2-4,A"
+
+
+@pytest.mark.parametrize("modifiers", ["import,-,os", "kfx,-,effect", "discard"])
+def test_normalize_modifiers_rejects(modifiers: str):
+    with pytest.raises(InvalidRenderError):
+        normalize_modifiers(modifiers)
+
+
+@pytest.mark.parametrize(
+    "modifiers", ["karaoke,1", "discard,50", "offset,1", "retime,1-2"]
+)
+def test_render_rejects_modifiers_which_do_not_fit_the_song(modifiers: str):
+    song = Song(
+        lyrics=[
+            SongLine(
+                start=timedelta(seconds=1),
+                end=timedelta(seconds=2),
+                syllables=[SongLineSyllable(timedelta(seconds=1), "ka")],
+                actors=["Honoka"],
+                breakpoints=[0],
+            )
+        ]
+    )
+
+    with pytest.raises(InvalidRenderError):
+        render_events(
+            song,
+            {"Honoka": ""},
+            "default_live_karaoke_effect",
+            normalize_modifiers(modifiers),
+            True,
+        )
+
+
+class FakeSongService:
+    def __init__(self) -> None:
+        self.etag = "v1"
+
+    def to_existing_song_key(self, songName: str) -> str:
+        return songName.lower()
+
+    def _get_all_template_scopes(self):
+        return ["spreadsheet:x"]
+
+    def get_song_etag(self, songKey: str) -> str:
+        return self.etag
+
+    def get_song(self, songKey: str) -> Song:
+        return Song()
+
+    def get_all_format_tags(self):
+        return {}
+
+
+class FakeExecutor:
+    def __init__(self) -> None:
+        self.renders = 0
+
+    def submit(self, fn, *args):
+        self.renders += 1
+        future = Future()
+        future.set_result(f"render {self.renders}")
+        return future
+
+
+def test_render_is_cached_per_song_version():
+    songService = FakeSongService()
+    executor = FakeExecutor()
+    renderer = SongRenderer(songService, MemoryCache(), executor=executor)
+
+    assert renderer.render("Kaze", modifiersStr="discard,1") == "render 1"
+    assert renderer.render("kaze", modifiersStr="discard,1-1") == "render 1"
+    assert renderer.render("kaze", shouldPrintTitle=False) == "render 2"
+
+    songService.etag = "v2"
+    assert renderer.render("kaze", modifiersStr="discard,1") == "render 3"
+
+
+def test_renders_are_cached_per_font_backend():
+    cache = MemoryCache()
+    executor = FakeExecutor()
+    wxRenderer = SongRenderer(FakeSongService(), cache, executor=executor)
+    fontToolsRenderer = SongRenderer(
+        FakeSongService(), cache, executor=executor, fontBackend="fonttools"
+    )
+
+    assert wxRenderer.render("kaze") == "render 1"
+    assert fontToolsRenderer.render("kaze") == "render 2"
+    assert wxRenderer.render("kaze") == "render 1"
+
+
+def test_font_workers_render_in_threads():
+    renderer = SongRenderer(FakeSongService(), MemoryCache(), fontWorkers=2)
+    assert isinstance(renderer.executor, ThreadPoolExecutor)
+    renderer.executor.shutdown()
+
+    # Where text is measured does not change the render
+    cache = MemoryCache()
+    executor = FakeExecutor()
+    renderer = SongRenderer(FakeSongService(), cache, executor=executor)
+    pooledRenderer = SongRenderer(
+        FakeSongService(), cache, executor=executor, fontWorkers=2
+    )
+    assert renderer.render("kaze") == "render 1"
+    assert pooledRenderer.render("kaze") == "render 1"
@@ -0,0 +1,61 @@
+import logging
+import threading
+
+import pytest
+
+from lyricsheets.web.startup import NotReadyError, Startup
+
+logger = logging.getLogger(__name__)
+
+
+def test_not_ready_until_required_steps_are_done():
+    startup = Startup(logger, retryAfter=3)
+    startup.add_step("song_index", lambda: {"songs": 2})
+
+    with pytest.raises(NotReadyError) as e:
+        startup.check_ready()
+    assert e.value.retryAfter == 3
+
+    startup.run_until_ready()
+
+    startup.check_ready()
+    assert startup.to_dict()["steps"][0]["result"] == {"songs": 2}
+
+
+def test_optional_steps_run_after_ready():
+    warmupStarted, finishWarmup = threading.Event(), threading.Event()
+
+    def warmup():
+        warmupStarted.set()
+        finishWarmup.wait()
+
+    startup = Startup(logger)
+    startup.add_step("song_index", lambda: None)
+    startup.add_step("warmup", warmup, isRequired=False)
+
+    startup.run_until_ready()
+    assert startup.isReady
+    assert not warmupStarted.is_set()
+
+    thread = startup.start()
+    assert warmupStarted.wait(1)
+    assert [step["isDone"] for step in startup.to_dict()["steps"]] == [True, False]
+
+    finishWarmup.set()
+    thread.join(1)
+    assert startup.steps[1].isDone
+
+
+def test_failed_steps_are_reported():
+    def fail():
+        raise ConnectionError("Sheets is down")
+
+    startup = Startup(logger)
+    startup.add_step("song_index", fail)
+
+    with pytest.raises(ConnectionError):
+        startup.run_until_ready()
+
+    assert not startup.isReady
+    assert startup.to_dict()["steps"][0]["error"] == "ConnectionError: Sheets is down"
+    assert startup.steps[0].attempts == 1
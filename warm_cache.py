@@ -0,0 +1,71 @@
+import argparse
+import json
+import sys
+
+from lyricsheets.cache import (
+    DiskCache,
+    default_cache_dir,
+    format_cache_stats,
+)
+from lyricsheets.service import (
+    SongServiceByDB,
+    warm_cache,
+    format_failures,
+    format_progress,
+)
+from lyricsheets.service.warmup import DEFAULT_WARMUP_BATCH_SIZE
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Fetches every song into the cache so that later runs do not have to go to Google Sheets"
+    )
+    parser.add_argument("--config", help="Path to config file", default="./config.json")
+    parser.add_argument(
+        "--cache-dir",
+        help="Directory to keep the song cache in when no redis is configured",
+        default=default_cache_dir(),
+    )
+    parser.add_argument(
+        "--batch-size",
+        help="Number of songs fetched per batch",
+        type=int,
+        default=DEFAULT_WARMUP_BATCH_SIZE,
+    )
+    parser.add_argument(
+        "--priority", help="Titles to fetch before the rest", nargs="*", default=[]
+    )
+
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        config = json.load(f)
+
+    if "redis" in config:
+        from lyricsheets.cache import RedisCache
+
+        cache = RedisCache.from_config(config["redis"])
+    else:
+        cache = DiskCache(args.cache_dir)
+
+    songService = SongServiceByDB(
+        config["google_credentials"],
+        config.get("spreadsheets", config.get("spreadsheet_id")),
+        config["default"],
+        cache,
+    )
+
+    progress = warm_cache(
+        songService,
+        priority=args.priority,
+        batchSize=args.batch_size,
+        onProgress=lambda progress: print(format_progress(progress), file=sys.stderr),
+    )
+    for failure in format_failures(progress):
+        print(f"Failed to fetch {failure}", file=sys.stderr)
+
+    print(format_cache_stats(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()